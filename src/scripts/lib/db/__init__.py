@@ -22,4 +22,5 @@
 *        2024-10-28     By Jess Mann                                                                                   *
 *                                                                                                                      *
 *********************************************************************************************************************"""
-from scripts.lib.db.images import ImagesDatabase
\ No newline at end of file
+from scripts.lib.db.images import ImagesDatabase
+from scripts.lib.db.library import LibraryIndex, LibraryRecord
@@ -19,7 +19,7 @@
 *                                                                                                                      *
 *    LAST MODIFIED:                                                                                                    *
 *                                                                                                                      *
-*        2024-10-28     By Jess Mann                                                                                   *
+*        2026-10-18     By Jess Mann                                                                                   *
 *                                                                                                                      *
 *********************************************************************************************************************"""
 from __future__ import annotations
@@ -36,7 +36,7 @@ import colorlog
 from dotenv import load_dotenv
 from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, field_validator
 from pathlib import Path
-from typing import Any, Tuple, Optional, Iterator
+from typing import Any, Tuple, Optional, Iterable, Iterator
 from datetime import datetime
 from decimal import Decimal
 from alive_progress import alive_bar
@@ -48,6 +48,9 @@ logger = logging.getLogger(__name__)
 
 PROJECT_ROOT = Path(__file__).resolve().parents[3]
 
+# The number of rows read from the database at a time, while iterating over records
+FETCH_BATCH_SIZE = 1000
+
 class ImagesDatabase:
     """Class to handle SQLite database operations."""
     db_path : Path
@@ -60,6 +63,8 @@ class ImagesDatabase:
         logger.info(f"Creating database table 'images' in {self.db_path}...")
         with sqlite3.connect(self.db_path) as conn:
             c = conn.cursor()
+            # WAL lets rows be marked as uploaded while another connection is still reading them
+            c.execute('PRAGMA journal_mode=WAL')
             c.execute('''CREATE TABLE IF NOT EXISTS images
                          (path TEXT UNIQUE, date TEXT, latitude REAL, longitude REAL, uploaded BOOLEAN DEFAULT 0)''')
             conn.commit()
@@ -80,6 +85,22 @@ class ImagesDatabase:
             conn.commit()
         logger.debug(f"Marked image as uploaded: {path}")
 
+    def mark_uploaded_many(self, paths: Iterable[Path]) -> int:
+        """
+        Mark many images as uploaded in a single transaction.
+
+        Returns:
+            The number of paths given.
+        """
+        rows = [(str(path),) for path in paths]
+        if not rows:
+            return 0
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany('UPDATE images SET uploaded=1 WHERE path=?', rows)
+            conn.commit()
+        logger.debug(f"Marked {len(rows)} images as uploaded")
+        return len(rows)
+
     def count_records(self, *, uploaded : bool | None = None) -> int:
         with sqlite3.connect(self.db_path) as conn:
             c = conn.cursor()
@@ -90,16 +111,22 @@ class ImagesDatabase:
             count = c.fetchone()[0]
         return count
 
-    def get_records(self, *, uploaded : bool | None = None) -> Iterator[Tuple[str, str, Decimal, Decimal]]:
-        with sqlite3.connect(self.db_path) as conn:
+    def get_records(self, *, uploaded : bool | None = None, batch_size : int = FETCH_BATCH_SIZE) -> Iterator[Tuple[str, str, Decimal, Decimal]]:
+        """
+        Iterate over records, reading batch_size rows at a time, so the whole table is never held in memory.
+        """
+        conn = sqlite3.connect(self.db_path)
+        try:
             c = conn.cursor()
             query = 'SELECT path, date, latitude, longitude FROM images'
             if uploaded is not None:
                 query = f'{query} WHERE uploaded={int(uploaded)}'
             c.execute(query)
-            for row in c.fetchall():
-                yield row
+            while rows := c.fetchmany(batch_size):
+                yield from rows
+        finally:
+            conn.close()
 
-    def get_images(self, *, uploaded : bool | None = None) -> Iterator[Path]:
-        for row in self.get_records(uploaded=uploaded):
+    def get_images(self, *, uploaded : bool | None = None, batch_size : int = FETCH_BATCH_SIZE) -> Iterator[Path]:
+        for row in self.get_records(uploaded=uploaded, batch_size=batch_size):
             yield Path(row[0])
\ No newline at end of file
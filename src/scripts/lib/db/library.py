@@ -0,0 +1,120 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    library.py                                                                                           *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+from __future__ import annotations
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+class LibraryRecord(NamedTuple):
+    path : str
+    size : int
+    mtime : float
+    partial_hash : str | None
+    full_hash : str | None
+
+class LibraryIndex:
+    """
+    A content index of a photo library, stored in SQLite.
+
+    Files are keyed by size, then partial hash, then full hash. Hashes are optional, and are filled in lazily the first
+    time a file of the same size is looked up. This keeps (re)building the index cheap (one stat per file), while still
+    allowing an incoming file to be checked against the entire library without scanning it.
+    """
+    db_path : Path
+
+    def __init__(self, db_path: str | Path):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._create_table()
+
+    def _create_table(self):
+        logger.debug("Creating library index table in %s", self.db_path)
+        with self._lock, self._conn:
+            self._conn.execute('''CREATE TABLE IF NOT EXISTS library
+                                  (path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime REAL NOT NULL DEFAULT 0,
+                                   partial_hash TEXT, full_hash TEXT)''')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS library_content ON library (size, partial_hash, full_hash)')
+
+    def add(self, path: Path, size: int, mtime: float, partial_hash: str | None = None, full_hash: str | None = None):
+        """
+        Add (or replace) a file in the index.
+        """
+        with self._lock, self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO library (path, size, mtime, partial_hash, full_hash) VALUES (?, ?, ?, ?, ?)',
+                               (str(path), size, mtime, partial_hash, full_hash))
+
+    def add_many(self, records: Iterable[LibraryRecord]) -> int:
+        """
+        Add many files to the index in a single transaction.
+
+        Returns:
+            The number of records written.
+        """
+        rows = [tuple(record) for record in records]
+        with self._lock, self._conn:
+            self._conn.executemany('INSERT OR REPLACE INTO library (path, size, mtime, partial_hash, full_hash) VALUES (?, ?, ?, ?, ?)', rows)
+        return len(rows)
+
+    def set_hashes(self, path: Path, *, partial_hash: str | None = None, full_hash: str | None = None):
+        """
+        Fill in the hashes of a file that is already in the index.
+        """
+        with self._lock, self._conn:
+            if partial_hash:
+                self._conn.execute('UPDATE library SET partial_hash=? WHERE path=?', (partial_hash, str(path)))
+            if full_hash:
+                self._conn.execute('UPDATE library SET full_hash=? WHERE path=?', (full_hash, str(path)))
+
+    def remove(self, path: Path):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM library WHERE path=?', (str(path),))
+
+    def find_by_size(self, size: int) -> list[LibraryRecord]:
+        """
+        Get every file in the library with the given size. This is an index seek, so it is cheap to call for every
+        incoming file.
+        """
+        with self._lock:
+            rows = self._conn.execute('SELECT path, size, mtime, partial_hash, full_hash FROM library WHERE size=?', (size,)).fetchall()
+        return [LibraryRecord(*row) for row in rows]
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM library')
+
+    def count_records(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM library').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
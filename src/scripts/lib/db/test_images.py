@@ -0,0 +1,65 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    test_images.py                                                                                       *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+import shutil
+import tempfile
+import unittest
+from decimal import Decimal
+from pathlib import Path
+from scripts.lib.db.images import ImagesDatabase
+import logging
+
+# Disable logging during tests to keep the output clean
+logging.disable(logging.CRITICAL)
+
+class TestImagesDatabase(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        # An absolute path is used as-is, instead of relative to the project root
+        self.db = ImagesDatabase(str(self.test_dir / 'images.db'))
+        for i in range(25):
+            self.db.insert_record(Path(f'/photos/IMG_{i:04d}.jpg'), '2024-10-19', Decimal('1.5'), Decimal('2.5'))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_get_images_in_batches(self):
+        images = list(self.db.get_images(uploaded=False, batch_size=4))
+        self.assertEqual(len(images), 25)
+        self.assertEqual(images[0], Path('/photos/IMG_0000.jpg'))
+
+    def test_mark_uploaded_while_reading(self):
+        uploaded = []
+        for image in self.db.get_images(uploaded=False, batch_size=4):
+            uploaded.append(image)
+            if len(uploaded) % 10 == 0:
+                self.db.mark_uploaded_many(uploaded[-10:])
+
+        self.assertEqual(len(uploaded), 25)
+        self.assertEqual(self.db.count_records(uploaded=True), 20)
+        self.assertEqual(self.db.mark_uploaded_many([]), 0)
+        self.assertEqual(list(self.db.get_images(uploaded=False)), uploaded[20:])
+
+if __name__ == '__main__':
+    unittest.main()
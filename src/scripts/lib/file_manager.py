@@ -24,6 +24,7 @@
 *********************************************************************************************************************"""
 from __future__ import annotations
 import asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from enum import Enum
 import os
 import re
@@ -31,7 +32,7 @@ import subprocess
 import sys
 import threading
 import time
-from typing import Iterator, Literal
+from typing import BinaryIO, Iterable, Iterator, Literal
 
 from alive_progress import alive_bar
 
@@ -85,6 +86,40 @@ PATTERNS = {
     'windows_drive': re.compile(r'[A-Za-z]:[\\/]')
 }
 
+# Size of each read from a file list
+FILE_LIST_CHUNK_SIZE = 64 * 1024
+
+def read_file_list(source : str | Path | BinaryIO) -> Iterator[Path]:
+    """
+    Stream paths from a NUL-delimited file list, such as the output of "find -print0".
+
+    Args:
+        source: The path to the file list, '-' for stdin, or a binary stream.
+
+    Yields:
+        Each path in the list, in order.
+    """
+    if isinstance(source, (str, Path)):
+        if str(source) == '-':
+            yield from read_file_list(sys.stdin.buffer)
+            return
+
+        with open(source, 'rb') as stream:
+            yield from read_file_list(stream)
+        return
+
+    remainder = b''
+    while (chunk := source.read(FILE_LIST_CHUNK_SIZE)):
+        entries = (remainder + chunk).split(b'\0')
+        remainder = entries.pop()
+        for entry in entries:
+            if entry:
+                yield Path(os.fsdecode(entry))
+
+    # The final entry does not require a trailing NUL
+    if remainder.strip(b'\n'):
+        yield Path(os.fsdecode(remainder.strip(b'\n')))
+
 # Tool options (rsync, shutil, teracopy)
 class CopyTools(Enum):
     RSYNC = 'rsync'
@@ -386,7 +421,7 @@ class FileManager(Script):
         Returns:
             The hash of the file.
         """
-        cache_key = (str(filename), partial)
+        cache_key = (str(filename), partial, hashing_algorithm)
 
         with self._cache_lock:
             if cache_key in self._hash_cache:
@@ -415,7 +450,7 @@ class FileManager(Script):
                 hasher.update(f.read(chunk_size))
             else:
                 # File is small, read the whole file
-                for chunk in iter(lambda: f.read(4096), b""):
+                for chunk in iter(lambda: f.read(chunk_size), b""):
                     hasher.update(chunk)
 
         result = hasher.hexdigest()
@@ -425,6 +460,35 @@ class FileManager(Script):
 
         return result
 
+    def get_cached_hash(self, filename: str | Path, partial: bool = False, hashing_algorithm : str = 'xxhash') -> str | None:
+        """
+        Get the hash of a file if it has already been calculated, without reading the file.
+
+        Args:
+            filename: The path that was passed to hash_file.
+            partial: Whether to look up the partial hash.
+            hashing_algorithm: The hashing algorithm that was used.
+
+        Returns:
+            The cached hash, or None if the file has not been hashed.
+        """
+        with self._cache_lock:
+            return self._hash_cache.get((str(filename), partial, hashing_algorithm))
+
+    def cache_hash(self, filename: str | Path, file_hash: str, partial: bool = False, hashing_algorithm : str = 'xxhash') -> None:
+        """
+        Record the hash of a file that was calculated elsewhere (for example, while the file was being downloaded),
+        so that hash_file does not need to read it again.
+
+        Args:
+            filename: The path to the file.
+            file_hash: The hash.
+            partial: Whether this is a partial hash.
+            hashing_algorithm: The hashing algorithm that was used.
+        """
+        with self._cache_lock:
+            self._hash_cache[(str(filename), partial, hashing_algorithm)] = file_hash
+
     def should_ignore_directory(self, directory: Path | str, *, allow_hidden : bool = False) -> bool:
         """
         Check if a directory should be ignored based on the name.
@@ -587,6 +651,26 @@ class FileManager(Script):
             if self.file_matches_globs(filepath) and self.should_include_file(filepath):
                 yield filepath
 
+    def yield_listed_files(self, source : str | Path | BinaryIO) -> Iterator[Path]:
+        """
+        Yield files from a NUL-delimited file list, instead of searching a directory for them.
+
+        This allows other tools which already know which files changed (e.g. find -print0, or a sync hook) to hand them
+        to us without a full directory walk. The list is streamed, so files are yielded as soon as they are read. The
+        same glob and include rules are applied as when searching a directory.
+
+        Args:
+            source: The path to the file list, '-' for stdin, or a binary stream.
+
+        Yields:
+            The next file in the list which should be included.
+        """
+        for filepath in read_file_list(source):
+            if self.file_matches_globs(filepath) and self.should_include_file(filepath):
+                yield filepath
+            else:
+                logger.debug('Skipping listed file: %s', filepath)
+
     def get_all_files(self, directory : Path | None = None, *, recursive : bool = True) -> list[Path]:
         """
         Get a list of files in a directory.
@@ -610,7 +694,8 @@ class FileManager(Script):
             True if the file matches at least 1 glob pattern, False otherwise.
         """
         for glob in self.get_glob_patterns():
-            if file_path.match(glob):
+            # Case insensitive, to match the behavior of glob()
+            if file_path.match(glob, case_sensitive=False):
                 return True
         return False
 
@@ -1181,6 +1266,45 @@ class FileManager(Script):
         logger.debug('File move %s: %s -> %s', 'succeeded' if result else 'failed', source_path, destination_path)
         return result
 
+    def move_files(self, moves : Iterable[tuple[Path, Path]], *, rename_on_collision : bool = False, title : str = 'Moving') -> list[Path]:
+        """
+        Move many files in parallel, using up to max_threads threads.
+
+        Each move goes through move_file, so moves across filesystems are verified. Destination directories are created
+        once each, before any files are moved. Errors are logged and counted, and do not stop the remaining moves.
+
+        Args:
+            moves: Pairs of (source path, destination path).
+            rename_on_collision: Passed to move_file.
+            title: The title of the progress bar.
+
+        Returns:
+            The destination paths of the files that were moved.
+        """
+        moves = list(moves)
+        for directory in {destination.parent for _, destination in moves}:
+            if not directory.exists():
+                self.mkdir(directory)
+
+        def move(source_path : Path, destination_path : Path) -> Path | None:
+            try:
+                return self.move_file(source_path, destination_path, rename_on_collision=rename_on_collision)
+            except (OSError, ChecksumMismatchError, subprocess.SubprocessError) as e:
+                logger.error('Error moving %s to %s: %s', source_path, destination_path, e)
+                self.record_error()
+                return None
+
+        results : list[Path] = []
+        with alive_bar(len(moves), title=title, unit='files') as progress_bar:
+            with ThreadPoolExecutor(max_workers=self.max_threads) as executor:
+                futures = [executor.submit(move, source, destination) for source, destination in moves]
+                for future in as_completed(futures):
+                    if (result := future.result()):
+                        results.append(result)
+                    progress_bar()
+
+        return results
+
     def copy_file(self, source_path : Path, destination_path : Path, skip_existing : bool = False) -> Path:
         """
         Copy a file to a new location.
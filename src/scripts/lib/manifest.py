@@ -0,0 +1,97 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+    A manifest of files placed by one script, to be consumed by the next.
+
+    For example, organize records every file it moves into the library, and upload reads that manifest to upload
+    exactly those files, without walking the library to find them again.
+
+    The manifest is a JSON Lines file, with one entry per line:
+        {"path": "/mnt/i/Photos/2024/2024-10-19/PXL_20241019_101010.jpg", "size": 123, "mtime": 1729332610.0,
+         "digest": "0a4d55a8d778e5022fab701977c5d840bbc486d0", "algorithm": "sha1"}
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    manifest.py                                                                                          *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+from __future__ import annotations
+import logging
+import threading
+from pathlib import Path
+from typing import IO, Iterator
+from pydantic import BaseModel, ValidationError
+
+logger = logging.getLogger(__name__)
+
+# Immich identifies assets by their SHA-1 checksum, so that is the most useful digest to hand off to the uploader.
+DEFAULT_MANIFEST_ALGORITHM = 'sha1'
+
+class ManifestEntry(BaseModel):
+    path : Path
+    size : int
+    mtime : float
+    digest : str | None = None
+    algorithm : str = DEFAULT_MANIFEST_ALGORITHM
+
+class ManifestWriter:
+    """
+    Append entries to a manifest. Safe to call from multiple threads.
+    """
+    path : Path
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._file : IO[str] | None = None
+
+    def __enter__(self) -> ManifestWriter:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def write(self, entry : ManifestEntry) -> None:
+        line = entry.model_dump_json()
+        with self._lock:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(f'{line}\n')
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+def read_manifest(path : str | Path) -> Iterator[ManifestEntry]:
+    """
+    Stream the entries of a manifest, in the order they were written.
+
+    Invalid lines (for example, a partially written final line) are logged and skipped.
+    """
+    with open(path, 'r', encoding='utf-8') as manifest:
+        for line_number, line in enumerate(manifest, start=1):
+            if not (line := line.strip()):
+                continue
+            try:
+                yield ManifestEntry.model_validate_json(line)
+            except ValidationError as e:
+                logger.warning('Skipping invalid manifest entry on line %d of %s: %s', line_number, path, e)
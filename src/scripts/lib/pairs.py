@@ -0,0 +1,154 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+    Index RAW+JPEG pairs (e.g. DSC01234.ARW + DSC01234.JPG) from a single directory listing.
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    pairs.py                                                                                             *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+from __future__ import annotations
+import logging
+import os
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+JPEG_EXTENSIONS = frozenset(['jpg', 'jpeg'])
+RAW_EXTENSIONS = frozenset(['arw', 'nef', 'dng'])
+
+class PairGroup(NamedTuple):
+    """
+    All the JPEGs and RAWs in one directory which share a stem.
+
+    DirEntry objects are kept (rather than Paths), so their cached stat results can be reused. Groups made by
+    index_pair_paths hold Paths instead.
+    """
+    directory : Path
+    stem : str
+    jpegs : list[os.DirEntry | Path]
+    raws : list[os.DirEntry | Path]
+
+    @property
+    def is_pair(self) -> bool:
+        return bool(self.jpegs and self.raws)
+
+def split_extension(name : str) -> tuple[str, str]:
+    """
+    Split a filename into its stem and its lowercase extension (without the dot).
+    """
+    stem, _, extension = name.rpartition('.')
+    if not stem:
+        return name, ''
+    return stem, extension.lower()
+
+def get_pair_kind(extension : str) -> str | None:
+    """
+    Get the list of PairGroup a file with this (lowercase) extension belongs in: 'jpegs', 'raws', or None.
+    """
+    if extension in JPEG_EXTENSIONS:
+        return 'jpegs'
+    if extension in RAW_EXTENSIONS:
+        return 'raws'
+    return None
+
+def index_pairs(directory : Path, entries : Iterable[os.DirEntry]) -> dict[str, PairGroup]:
+    """
+    Group the JPEGs and RAWs in one directory listing by stem. Extensions are compared case-insensitively.
+
+    Args:
+        directory: The directory that was listed.
+        entries: The entries returned by os.scandir(directory).
+
+    Returns:
+        A dict of stem -> PairGroup. Files that are neither JPEG nor RAW are not included.
+    """
+    groups : dict[str, PairGroup] = {}
+    for entry in entries:
+        stem, extension = split_extension(entry.name)
+        if not (kind := get_pair_kind(extension)):
+            continue
+
+        try:
+            if not entry.is_file():
+                continue
+        except OSError:
+            continue
+
+        if stem not in groups:
+            groups[stem] = PairGroup(directory, stem, [], [])
+        getattr(groups[stem], kind).append(entry)
+
+    return groups
+
+def index_pair_paths(directory : Path, files : Iterable[Path]) -> dict[str, PairGroup]:
+    """
+    Group JPEGs and RAWs by stem, like index_pairs, from files in one directory which are already known to be files.
+
+    Args:
+        directory: The directory the files are in.
+        files: The files, e.g. from a search which already filtered out directories.
+
+    Returns:
+        A dict of stem -> PairGroup of Paths. Files that are neither JPEG nor RAW are not included.
+    """
+    groups : dict[str, PairGroup] = {}
+    for file in files:
+        stem, extension = split_extension(file.name)
+        if not (kind := get_pair_kind(extension)):
+            continue
+        if stem not in groups:
+            groups[stem] = PairGroup(directory, stem, [], [])
+        getattr(groups[stem], kind).append(file)
+    return groups
+
+def scan_pairs(directory : Path, *, should_ignore_directory : Callable[[Path], bool] | None = None) -> Iterator[PairGroup]:
+    """
+    Walk a directory tree with one scandir per directory, and yield every RAW+JPEG pair found.
+
+    Args:
+        directory: The root of the tree.
+        should_ignore_directory: A callback to prune subdirectories (e.g. hidden directories, or .trash).
+
+    Yields:
+        Each PairGroup that contains at least one JPEG and one RAW.
+    """
+    pending = [Path(directory)]
+    while pending:
+        current = pending.pop()
+        try:
+            with os.scandir(current) as iterator:
+                entries = list(iterator)
+        except OSError as e:
+            logger.warning('Unable to list directory %s: %s', current, e)
+            continue
+
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdir = Path(entry.path)
+                    if not should_ignore_directory or not should_ignore_directory(subdir):
+                        pending.append(subdir)
+            except OSError:
+                continue
+
+        for group in index_pairs(current, entries).values():
+            if group.is_pair:
+                yield group
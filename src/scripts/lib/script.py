@@ -36,7 +36,8 @@ logger = logging.getLogger(__name__)
 
 class Script(BaseModel, ABC):
 
-    max_threads : int = 0
+    # Validate the default too, so scripts built without max_threads get a sensible number of threads
+    max_threads : int = Field(default=0, validate_default=True)
     _progress_bar : ProgressBar | None = PrivateAttr(default=None)
     _progress_message : str | None = PrivateAttr(default=None)
 
@@ -61,7 +61,6 @@
 from __future__ import annotations
 from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 import datetime
-from ftplib import FTP
 import re
 import subprocess
 import sys
@@ -84,6 +83,8 @@ from scripts.exceptions import ShouldTerminateError
 from scripts.lib.file_manager import StrPattern
 from scripts.monthly.exceptions import OneFileException, DuplicationHandledException
 from scripts.lib.file_manager import FileManager
+from scripts.lib.db.library import LibraryIndex, LibraryRecord
+from scripts.lib.manifest import DEFAULT_MANIFEST_ALGORITHM, ManifestEntry, ManifestWriter
 
 logger = logging.getLogger(__name__)
 
@@ -100,6 +101,10 @@ class FileOrganizer(FileManager):
     - If a file with the same name already exists in the target directory:
         - if hashes match, it is deleted.
         - if hashes do not match, a unique filename is generated.
+    - If a library_index is provided, files which already exist anywhere in the library (under any name or date) are
+      treated as duplicates as well.
+    - If a manifest_path is provided, every file placed in the library is recorded there, so the uploader can pick
+      them up without searching the library.
     """
     batch_size: int = -1
     skip_collision: bool = False
@@ -107,8 +112,12 @@ class FileOrganizer(FileManager):
     target_directory : Path | None = None
     copy_mode : bool = False
     keep_duplicates : bool = False
+    library_index : LibraryIndex | None = None
+    manifest_path : Path | None = None
+    manifest_algorithm : str = DEFAULT_MANIFEST_ALGORITHM
 
     _progress_bar : ProgressBar | None = PrivateAttr(default=None)
+    _manifest : ManifestWriter | None = PrivateAttr(default=None)
 
     @field_validator('target_directory', mode='before')
     def validate_target_directory(cls, value: Any) -> Path | None:
@@ -122,6 +131,30 @@ class FileOrganizer(FileManager):
             
         return dir_path
 
+    @field_validator('library_index', mode='before')
+    def validate_library_index(cls, value: Any) -> LibraryIndex | None:
+        if not value:
+            return None
+
+        if isinstance(value, LibraryIndex):
+            return value
+
+        return LibraryIndex(value)
+
+    @field_validator('manifest_path', mode='before')
+    def validate_manifest_path(cls, value: Any) -> Path | None:
+        if not value:
+            return None
+        return Path(value)
+
+    @property
+    def manifest(self) -> ManifestWriter | None:
+        if self.manifest_path is None:
+            return None
+        if not self._manifest:
+            self._manifest = ManifestWriter(self.manifest_path)
+        return self._manifest
+
     @property
     def progress_bar(self) -> ProgressBar:
         if not self._progress_bar:
@@ -187,94 +220,76 @@ class FileOrganizer(FileManager):
 
         return super().files_match(source_file, destination_path, skip_hash)
     
-    def fetch_files_from_ftp(self, host: str, user: str, password: str, remote_dir: str = '/device/DCIM/Camera') -> None:
+    def fetch_files_from_ftp(self, host: str, user: str, password: str, remote_dir: str = '/device/DCIM/Camera', *, port : int = 21, connections : int = 4) -> list[Path]:
         """
-        Connect to an FTP server and download files from a specified directory.
+        Connect to an FTP server and download files from a specified directory directly into their date folders.
 
-        Untested!
+        See scripts.monthly.organize.ftp for details.
 
         Args:
             host: The FTP server hostname
             user: The FTP username
             password: The FTP password
             remote_dir: The remote directory to download files from
+            port: The FTP server port
+            connections: The number of connections to download with in parallel
+
+        Returns:
+            The paths of the downloaded files.
+
+        Raises:
+            ShouldTerminateError: If the server cannot be reached, or the remote directory cannot be listed.
         """
-        logger.critical('WARNING: This feature is untested.')
-        import time
-        time.sleep(20)
+        # Imported here to avoid a circular import
+        from scripts.monthly.organize.ftp import FTPIngester
+
+        ingester = FTPIngester(
+            organizer   = self,
+            host        = host,
+            user        = user or 'anonymous',
+            password    = password or '',
+            port        = port,
+            remote_dir  = remote_dir,
+            connections = connections,
+        )
         try:
-            with FTP(host) as ftp:
-                ftp.login(user=user, passwd=password)
-                logger.info("Connected to FTP server: %s", host)
-
-                ftp.cwd(remote_dir)
-                file_list = ftp.nlst()
-
-                # Use a progress bar to show file download progress
-                with alive_bar(len(file_list), title="Downloading and Organizing from FTP", unit='files') as progress_bar:
-                    for filename in file_list:
-                        local_file_path: Path | None = None
-                        try:
-                            # Get the modification time of the remote file
-                            mdtm_response = ftp.sendcmd(f"MDTM {filename}")
-                            # The response is in the format '213 YYYYMMDDHHMMSS'
-                            mod_time_str = mdtm_response[4:].strip()
-                            mod_time = datetime.datetime.strptime(mod_time_str, "%Y%m%d%H%M%S")
-
-                            # Determine the expected destination directory and file path
-                            destination_dir = self.create_subdir_from_date(mod_time)
-                            destination_path = destination_dir / filename
-
-                            if destination_path.exists():
-                                logger.debug("File already exists locally, skipping: %s", filename)
-                                continue
-
-                            # Create a temporary file path in a temp directory
-                            temp_dir = self.mkdir('.ftp_downloads')
-                            local_file_path = temp_dir / filename
-
-                            # Download the file to temporary location
-                            with open(local_file_path, 'wb') as local_file:
-                                ftp.retrbinary(f"RETR {filename}", local_file.write)
-                            logger.debug("Downloaded: %s", filename)
-
-                            # Now process the file as per copy mode
-                            self.process_file_threadsafe(local_file_path)
-
-                        except PermissionError as e:
-                            logger.warning("Permission error downloading %s: %s", filename, e)
-                        except Exception as e:
-                            logger.error("Error downloading file %s: %s", filename, e)
-
-                        finally:
-                            # Delete the temporary file if it still exists
-                            if local_file_path and local_file_path.exists():
-                                local_file_path.unlink()
-                            progress_bar()
-
-                # Optionally, remove the temp directory if empty
-                if temp_dir.exists() and not any(temp_dir.iterdir()):
-                    temp_dir.rmdir()
-
-        except Exception as e:
-            logger.error("Failed to fetch files from FTP: %s", e)
-            raise ShouldTerminateError("FTP fetch failed.") from e
-
-    def organize_files(self, *, cleanup : bool = True) -> None:
+            results = ingester.run()
+        finally:
+            self.close_manifest()
+        logger.info(self.report('Finished downloading.'))
+        return results
+
+    def organize_files(self, *, cleanup : bool = True, file_list : str | Path | None = None) -> None:
         """
         Organize files into subdirectories based on their date.
+
+        Args:
+            cleanup: Whether to delete empty directories afterwards.
+            file_list: A NUL-delimited list of files to organize ('-' for stdin). If provided, the directory is not
+                searched, and only the directories under it that contained listed files are cleaned up.
         """
         if self.check_dry_run(f'organizing files with {self.glob_pattern=} in {self.directory.absolute()}'):
             return
 
-        print(f'{RESET}Organizing files in {BLUE}{self.directory.absolute()}{RESET} to {GREEN}{self.get_target_directory().absolute()}{RESET} with {self.max_threads} threads.')
+        source = f'files listed in {file_list}' if file_list else self.directory.absolute()
+        print(f'{RESET}Organizing {BLUE}{source}{RESET} to {GREEN}{self.get_target_directory().absolute()}{RESET} with {self.max_threads} threads.')
+
+        if file_list:
+            files = self.yield_listed_files(file_list)
+        else:
+            files = self.yield_files()
 
+        root = self.directory.absolute()
+        source_directories : set[Path] = set()
         with alive_bar(title=f"{BLUE2}Organize{RESET} {self._shortpath(self.directory.absolute())}", unit='files', dual_line=True, unknown='waves') as self._progress_bar:
             self.progress_message('Searching...')
 
             with ThreadPoolExecutor(max_workers=self.max_threads) as executor:
                 futures = []
-                for filepath in self.yield_files():
+                for filepath in files:
+                    # Never clean up directories outside the one being organized
+                    if file_list and (parent := filepath.parent.absolute()).is_relative_to(root):
+                        source_directories.add(parent)
                     submit_result = executor.submit(self.process_file_threadsafe, filepath)
                     futures.append(submit_result)
                     
@@ -286,11 +301,18 @@ class FileOrganizer(FileManager):
                 if futures:
                     self.handle_futures(futures)
 
+        self.close_manifest()
         self.report('Moving files complete')
 
         # After organization, cleanup empty directories
         if cleanup and not self.copy_mode:
-            self.delete_empty_directories()
+            if file_list:
+                # Only the directories we touched, to avoid walking the whole tree
+                for directory in source_directories:
+                    if self.delete_directory_if_empty(directory, recursive=False):
+                        logger.debug('Deleted empty directory: %s', directory)
+            else:
+                self.delete_empty_directories()
 
         logger.info(self.report('Finished organizing.'))
 
@@ -377,6 +399,9 @@ class FileOrganizer(FileManager):
             logger.debug(f"Skipping file {file_path.absolute()=} as it is already in the correct directory")
             return None
 
+        # Check the whole library for a copy of this file, under any name or date. Raises if a duplicate was handled.
+        self.handle_library_duplicate(file_path)
+
         # Loop in case another process hijacks our destination path
         MAX_ATTEMPTS = 3
         for i in range(MAX_ATTEMPTS):
@@ -385,8 +410,12 @@ class FileOrganizer(FileManager):
 
             try:
                 if self.copy_mode:
-                    return self.copy_file(file_path, destination_file)
-                return self.move_file(file_path, destination_file)
+                    result = self.copy_file(file_path, destination_file)
+                else:
+                    result = self.move_file(file_path, destination_file)
+                self.index_file(result, source_path=file_path)
+                self.record_placed_file(result, source_path=file_path)
+                return result
             except FileExistsError as fee:
                 logger.warning("File was created by another process. Attempt(%d/%d). destination_path='%s' -> %s", i, MAX_ATTEMPTS, destination_file, fee)
                 raise ShouldTerminateError(f"File was created by another process. {destination_file.absolute()=} -> {fee=}")
@@ -564,6 +593,203 @@ class FileOrganizer(FileManager):
 
         return self.mkdir(parent_directory / subdir)
 
+    def find_library_duplicate(self, source_path : Path) -> Path | None:
+        """
+        Find a copy of a file anywhere in the library, using the library index.
+
+        Only files of the same size are considered, so most incoming files are checked with a single index lookup and
+        are never hashed. Hashes of library files are calculated lazily and saved back to the index.
+
+        Args:
+            source_path: The incoming file.
+
+        Returns:
+            The path of the matching file in the library, or None if no match was found.
+
+        Raises:
+            OneFileException: If an error occurs while hashing either file.
+        """
+        if self.library_index is None:
+            return None
+
+        size = self.file_size(source_path)
+        candidates = self.library_index.find_by_size(size)
+        if not candidates:
+            return None
+
+        partial_hash = self.hash_file(source_path, partial=True)
+        for record in candidates:
+            library_path = Path(record.path)
+
+            try:
+                library_stat = library_path.stat()
+                if library_path.samefile(source_path):
+                    continue
+            except FileNotFoundError:
+                # The file was removed from the library since it was indexed
+                self.library_index.remove(library_path)
+                continue
+
+            # The library file changed since it was indexed, so the stored hashes are stale
+            if library_stat.st_size != record.size or library_stat.st_mtime != record.mtime:
+                self.library_index.add(library_path, library_stat.st_size, library_stat.st_mtime)
+                if library_stat.st_size != size:
+                    continue
+                record = LibraryRecord(record.path, library_stat.st_size, library_stat.st_mtime, None, None)
+
+            if not (library_partial_hash := record.partial_hash):
+                library_partial_hash = self.hash_file(library_path, partial=True)
+                self.library_index.set_hashes(library_path, partial_hash=library_partial_hash)
+
+            if library_partial_hash != partial_hash:
+                continue
+
+            if self.skip_hash:
+                return library_path
+
+            if not (library_full_hash := record.full_hash):
+                library_full_hash = self.hash_file(library_path)
+                self.library_index.set_hashes(library_path, full_hash=library_full_hash)
+
+            if library_full_hash == self.hash_file(source_path):
+                return library_path
+
+        return None
+
+    def handle_library_duplicate(self, source_path : Path) -> None:
+        """
+        Trash or skip a file if a copy of it already exists anywhere in the library.
+
+        Args:
+            source_path: The incoming file.
+
+        Raises:
+            DuplicationHandledException: If the duplicate file was handled.
+            OneFileException: If an error occurs while deleting the source file, or hashing either file.
+        """
+        if not (library_path := self.find_library_duplicate(source_path)):
+            return
+
+        logger.debug('Duplicate file found in library: %s -> %s', source_path, library_path)
+        self.record_duplicate_file()
+
+        if not self.keep_duplicates and not self.copy_mode and not self.skip_hash:
+            self.delete_file(source_path)
+            xmp_source_path = source_path.with_suffix('.xmp')
+            if xmp_source_path.exists(follow_symlinks=False):
+                self.delete_file(xmp_source_path)
+            raise DuplicationHandledException(f"Duplicate file {source_path.absolute()=} of {library_path.absolute()=} deleted")
+
+        raise DuplicationHandledException(f"Duplicate file {source_path.absolute()=} of {library_path.absolute()=} skipped")
+
+    def index_file(self, file_path : Path, source_path : Path | None = None) -> None:
+        """
+        Add a file which was just placed in the library to the library index.
+
+        Hashes which were already calculated for the source file are reused. Others are left empty, and are filled in
+        lazily if another file of the same size is ever checked against the index.
+
+        Args:
+            file_path: The file in the library.
+            source_path: The path the file was moved or copied from, if any.
+        """
+        if self.library_index is None or self.dry_run:
+            return
+
+        try:
+            file_stat = file_path.stat()
+        except FileNotFoundError:
+            logger.warning('Unable to index file that no longer exists: %s', file_path)
+            return
+
+        source_path = source_path or file_path
+        self.library_index.add(
+            file_path.absolute(),
+            file_stat.st_size,
+            file_stat.st_mtime,
+            partial_hash = self.get_cached_hash(source_path, partial=True),
+            full_hash = self.get_cached_hash(source_path),
+        )
+
+    def record_placed_file(self, file_path : Path, source_path : Path | None = None) -> None:
+        """
+        Add a file which was just placed in the library to the manifest, if one is being written.
+
+        Args:
+            file_path: The file in the library.
+            source_path: The path the file was moved or copied from, if any. Hashes already calculated for it are reused.
+        """
+        if not (manifest := self.manifest) or self.dry_run:
+            return
+
+        try:
+            file_stat = file_path.stat()
+        except FileNotFoundError:
+            logger.warning('Unable to add file that no longer exists to the manifest: %s', file_path)
+            return
+
+        algorithm = self.manifest_algorithm
+        digest = self.get_cached_hash(source_path or file_path, hashing_algorithm=algorithm) or self.get_cached_hash(file_path, hashing_algorithm=algorithm)
+        if not digest:
+            digest = self.hash_file(file_path, hashing_algorithm=algorithm)
+
+        manifest.write(ManifestEntry(
+            path = file_path.absolute(),
+            size = file_stat.st_size,
+            mtime = file_stat.st_mtime,
+            digest = digest,
+            algorithm = algorithm,
+        ))
+
+    def close_manifest(self) -> None:
+        if self._manifest:
+            self._manifest.close()
+
+    def build_library_index(self, directory : Path | None = None) -> int:
+        """
+        (Re)build the library index from the files in the target directory.
+
+        Only file sizes and modification times are recorded, so this is one walk of the library. Hashes are calculated
+        later, and only for files which share a size with an incoming file.
+
+        Args:
+            directory: The library to index. Defaults to the target directory.
+
+        Returns:
+            The number of files indexed.
+
+        Raises:
+            ShouldTerminateError: If no library index was configured.
+        """
+        if self.library_index is None:
+            raise ShouldTerminateError('No library index was configured.')
+
+        directory = directory or self.get_target_directory()
+        if self.check_dry_run(f'indexing files in {directory.absolute()}'):
+            return 0
+
+        count = 0
+        batch : list[LibraryRecord] = []
+        self.library_index.clear()
+        with alive_bar(title=f"{BLUE2}Index{RESET} {self._shortpath(directory.absolute())}", unit='files', dual_line=True, unknown='waves') as self._progress_bar:
+            for filepath in self.yield_files(directory):
+                try:
+                    file_stat = filepath.stat()
+                except OSError as ose:
+                    logger.warning('Unable to index file: %s -> %s', filepath, ose)
+                    continue
+
+                batch.append(LibraryRecord(str(filepath.absolute()), file_stat.st_size, file_stat.st_mtime, None, None))
+                if len(batch) >= 1000:
+                    count += self.library_index.add_many(batch)
+                    batch = []
+                self._progress_bar()
+
+            count += self.library_index.add_many(batch)
+
+        logger.info('Indexed %d files in %s', count, directory.absolute())
+        return count
+
     def handle_single_conflict(self, source_path : Path, destination_path: Path) -> Path | Literal[False]:
         """
         Handle a single filename conflict.
@@ -784,6 +1010,8 @@ def autopilot(organizer : FileOrganizer) -> None:
             keep_duplicates = organizer.keep_duplicates,
             trash_directory = organizer.trash_directory,
             max_threads     = organizer.max_threads,
+            library_index   = organizer.library_index,
+            manifest_path   = organizer.manifest_path,
         )
         glob_organizer.organize_files(cleanup=False)
 
@@ -806,6 +1034,12 @@ class ArgsNamespace(argparse.Namespace):
     ftp_host: str
     ftp_user: str
     ftp_pass: str
+    ftp_port: int
+    ftp_dir: str
+    ftp_connections: int
+    library_index: str | None
+    files_from: str | None
+    manifest: str | None
 
 
 def main() -> int:
@@ -815,6 +1049,7 @@ def main() -> int:
     
     DEFAULT_TARGET = os.getenv('IMAGEINN_ORGANIZE_TARGET', '.')
     DEFAULT_TRASH = os.getenv('IMAGEINN_ORGANIZE_TRASH', None)
+    DEFAULT_INDEX = os.getenv('IMAGEINN_ORGANIZE_INDEX', None)
 
     # Set up argument parser
     parser = argparse.ArgumentParser(description='Organize files into monthly directories.')
@@ -825,7 +1060,7 @@ def main() -> int:
     parser.add_argument('-k', '--keep-duplicates', action='store_true', help="Keep duplicate files in the source directory (don't delete)")
     parser.add_argument('-l', '--limit', type=int, default=-1, help='Limit the number of files to process')
     parser.add_argument('-v', '--verbose', action='store_true', help='Increase verbosity')
-    parser.add_argument('--action', default='organize', choices=['organize', 'cleanup', 'auto'], help='Action to perform')
+    parser.add_argument('--action', default='organize', choices=['organize', 'cleanup', 'auto', 'index'], help='Action to perform')
     parser.add_argument('--trash', default=DEFAULT_TRASH, help='Directory to move deleted files to. Defaults to env variable ORGANIZE_IMAGE_TRASH, which is "{DEFAULT_TRASH}", or ./.trash/')
     parser.add_argument('--skip-collision', action='store_true', help='Skip moving files on collision')
     parser.add_argument('--skip-hash', action='store_true', help='Skip verifying file hashes')
@@ -834,6 +1069,12 @@ def main() -> int:
     parser.add_argument('--ftp-host', help='FTP host to connect to')
     parser.add_argument('--ftp-user', help='FTP username')
     parser.add_argument('--ftp-pass', help='FTP password')
+    parser.add_argument('--ftp-port', type=int, default=21, help='FTP port')
+    parser.add_argument('--ftp-dir', default='/device/DCIM/Camera', help='Remote directory to download files from')
+    parser.add_argument('--ftp-connections', type=int, default=4, help='Number of FTP connections to download with in parallel')
+    parser.add_argument('--files-from', default=None, help='Organize only the files in this NUL-delimited list (e.g. from "find -print0"), instead of searching the directory. Use "-" for stdin.')
+    parser.add_argument('--manifest', default=None, help='Append every file placed in the target directory to this manifest (JSON lines), for "upload --manifest" to consume')
+    parser.add_argument('--library-index', default=DEFAULT_INDEX, help=f'SQLite content index of the target library, used to find duplicates anywhere in it (defaults to env var IMAGEINN_ORGANIZE_INDEX, which is "{DEFAULT_INDEX}")')
     args = parser.parse_args(namespace=ArgsNamespace())
 
     if args.verbose:
@@ -851,19 +1092,23 @@ def main() -> int:
         keep_duplicates = args.keep_duplicates,
         trash_directory = args.trash,
         max_threads     = args.max_threads,
+        library_index   = args.library_index,
+        manifest_path   = args.manifest,
     )
 
     try:
         match str(args.action).lower():
             case 'organize':
                 if args.ftp_host:
-                    organizer.fetch_files_from_ftp(args.ftp_host, args.ftp_user, args.ftp_pass)
+                    organizer.fetch_files_from_ftp(args.ftp_host, args.ftp_user, args.ftp_pass, args.ftp_dir, port=args.ftp_port, connections=args.ftp_connections)
                 else:
-                    organizer.organize_files()
+                    organizer.organize_files(file_list=args.files_from)
             case 'cleanup':
                 organizer.delete_empty_directories()
             case 'auto':
                 autopilot(organizer)
+            case 'index':
+                organizer.build_library_index()
             case _:
                 logger.error("Invalid action: %s", args.action)
                 return 1
@@ -0,0 +1,341 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+    Download files from an FTP server (such as a phone running an FTP app) directly into the organized library.
+
+    - Several connections are pooled, so downloads are not bound by the round trip time of a single connection.
+    - The remote directory is listed once with MLSD, which returns sizes and modification times for every file.
+    - Partial downloads are kept next to their destination, and resumed with REST on the next run.
+    - Files are hashed while they are downloaded, so they never need to be read again to be verified or indexed.
+    - Files are written to a temporary name in their final date folder, and renamed once complete.
+
+    Example:
+        >>> organize --ftp-host 192.168.1.20 --ftp-user phone --ftp-pass secret --ftp-connections 6
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    ftp.py                                                                                               *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+import datetime
+import ftplib
+import logging
+import os
+import queue
+import threading
+from pathlib import Path
+from typing import Iterator, NamedTuple
+from alive_progress import alive_bar
+from pydantic import BaseModel, ConfigDict, PrivateAttr, field_validator
+from scripts.exceptions import ShouldTerminateError
+from scripts.lib.types import RESET, BLUE2
+from scripts.monthly.exceptions import OneFileException
+from scripts.monthly.organize.base import FileOrganizer
+
+logger = logging.getLogger(__name__)
+
+# Size of each block requested from the server, and written to disk
+BLOCK_SIZE = 1024 * 1024
+
+class RemoteFile(NamedTuple):
+    name : str
+    # None when the server does not report it
+    size : int | None
+    modified : datetime.datetime
+
+class FTPIngester(BaseModel):
+    """
+    Download files from an FTP server into the library of a FileOrganizer.
+    """
+    organizer : FileOrganizer
+    host : str
+    user : str = 'anonymous'
+    password : str = ''
+    port : int = 21
+    remote_dir : str = '/device/DCIM/Camera'
+    connections : int = 4
+    timeout : int = 60
+
+    _pool : queue.Queue = PrivateAttr(default_factory=queue.Queue)
+    _pool_lock : threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _open_connections : list[ftplib.FTP] = PrivateAttr(default_factory=list)
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    @field_validator('connections', mode='before')
+    def validate_connections(cls, value):
+        if not value:
+            return 4
+        if value < 1:
+            raise ValueError("connections must be a positive integer.")
+        return value
+
+    def connect(self) -> ftplib.FTP:
+        """
+        Open a new connection to the server, in binary mode and in the remote directory.
+        """
+        ftp = ftplib.FTP(timeout=self.timeout)
+        ftp.connect(self.host, self.port)
+        ftp.login(user=self.user, passwd=self.password)
+        ftp.voidcmd('TYPE I')
+        ftp.cwd(self.remote_dir)
+        with self._pool_lock:
+            self._open_connections.append(ftp)
+        logger.debug("Opened FTP connection %d to %s", len(self._open_connections), self.host)
+        return ftp
+
+    @contextmanager
+    def connection(self) -> Iterator[ftplib.FTP]:
+        """
+        Borrow a connection from the pool, opening a new one if none are idle.
+
+        Connections which raise an error are closed instead of being returned to the pool.
+        """
+        try:
+            ftp = self._pool.get_nowait()
+        except queue.Empty:
+            ftp = self.connect()
+
+        try:
+            yield ftp
+        except Exception:
+            self.discard(ftp)
+            raise
+
+        self._pool.put(ftp)
+
+    def discard(self, ftp : ftplib.FTP) -> None:
+        with self._pool_lock:
+            if ftp in self._open_connections:
+                self._open_connections.remove(ftp)
+        try:
+            ftp.close()
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        """
+        Close every connection in the pool.
+        """
+        with self._pool_lock:
+            connections = self._open_connections
+            self._open_connections = []
+
+        for ftp in connections:
+            try:
+                ftp.quit()
+            except (OSError, EOFError, ftplib.Error):
+                ftp.close()
+
+        self._pool = queue.Queue()
+
+    @classmethod
+    def parse_timestamp(cls, value : str) -> datetime.datetime:
+        """
+        Parse an MLSD/MDTM timestamp (YYYYMMDDHHMMSS[.sss], in UTC) into a local datetime.
+        """
+        timestamp = datetime.datetime.strptime(value[:14], "%Y%m%d%H%M%S")
+        return timestamp.replace(tzinfo=datetime.timezone.utc).astimezone()
+
+    def list_files(self) -> list[RemoteFile]:
+        """
+        List the files in the remote directory, with their sizes and modification times.
+
+        MLSD returns everything in a single listing. Servers which do not support it fall back to SIZE and MDTM for
+        each file.
+        """
+        remote_files : list[RemoteFile] = []
+        with self.connection() as ftp:
+            try:
+                for name, facts in ftp.mlsd(facts=['type', 'size', 'modify']):
+                    if facts.get('type', 'file') != 'file' or 'modify' not in facts:
+                        continue
+                    remote_files.append(RemoteFile(name, int(facts['size']) if 'size' in facts else None, self.parse_timestamp(facts['modify'])))
+                return remote_files
+            except ftplib.error_perm as e:
+                logger.info("Server does not support MLSD, falling back to SIZE and MDTM: %s", e)
+
+            for name in ftp.nlst():
+                try:
+                    modified = self.parse_timestamp(ftp.sendcmd(f"MDTM {name}")[4:].strip())
+                except ftplib.error_perm as e:
+                    # Most likely a directory
+                    logger.debug("Skipping remote entry %s: %s", name, e)
+                    continue
+                try:
+                    size = ftp.size(name)
+                except ftplib.error_perm as e:
+                    logger.debug("Server did not report the size of %s: %s", name, e)
+                    size = None
+                remote_files.append(RemoteFile(name, size, modified))
+
+        return remote_files
+
+    def should_download(self, remote_file : RemoteFile) -> bool:
+        """
+        Check if a remote file matches the organizer's filename rules.
+        """
+        # Hidden files include our own partial downloads
+        if remote_file.name.startswith('.'):
+            return False
+        return bool(self.organizer.filename_match(remote_file.name))
+
+    def find_destination(self, remote_file : RemoteFile) -> Path | None:
+        """
+        Find the final path for a remote file in its date folder.
+
+        Returns:
+            The destination path, or None if the file has already been downloaded.
+        """
+        destination_dir = self.organizer.create_subdir_from_date(remote_file.modified)
+        destination_path = destination_dir / remote_file.name
+
+        path = Path(remote_file.name)
+        for i in range(1000):
+            if not destination_path.exists():
+                return destination_path
+
+            # Without a size, a file with the same name and date is assumed to be the same file
+            if remote_file.size is None or destination_path.stat().st_size == remote_file.size:
+                return None
+
+            destination_path = destination_dir / f"{path.stem}_{i}{path.suffix}"
+
+        raise OneFileException(f"Could not find a unique filename for {remote_file.name=}... last name tried: {destination_path=}")
+
+    def download(self, remote_file : RemoteFile) -> Path | None:
+        """
+        Download a single file directly into its date folder.
+
+        The file is written to a hidden .part file alongside its destination. If a partial download already exists, it
+        is resumed from where it left off.
+
+        Returns:
+            The path to the downloaded file, or None if it was skipped.
+
+        Raises:
+            OneFileException: If the file could not be downloaded completely.
+        """
+        if not (destination_path := self.find_destination(remote_file)):
+            logger.debug("File already exists locally, skipping: %s", remote_file.name)
+            self.organizer.record_skip_file()
+            return None
+
+        if self.organizer.check_dry_run(f'downloading {remote_file.name} to {destination_path}'):
+            return destination_path
+
+        temp_path = destination_path.with_name(f'.{destination_path.name}.part')
+        hashers = {'xxhash': self.organizer.get_hasher('xxhash')}
+        if self.organizer.manifest_path:
+            # Also calculate the digest for the manifest, so the file is never read again
+            hashers.setdefault(self.organizer.manifest_algorithm, self.organizer.get_hasher(self.organizer.manifest_algorithm))
+
+        offset = temp_path.stat().st_size if temp_path.exists() else 0
+        if remote_file.size is not None and offset > remote_file.size:
+            # Not a prefix of this file, so start over
+            offset = 0
+
+        with open(temp_path, 'r+b' if offset else 'wb') as local_file:
+            # Hash the bytes that were already downloaded, so the digest covers the whole file
+            while local_file.tell() < offset:
+                if not (chunk := local_file.read(min(BLOCK_SIZE, offset - local_file.tell()))):
+                    break
+                for hasher in hashers.values():
+                    hasher.update(chunk)
+            local_file.seek(offset)
+            local_file.truncate()
+
+            if offset:
+                logger.debug("Resuming download of %s at %d/%s bytes", remote_file.name, offset, remote_file.size or '?')
+
+            def write(block : bytes) -> None:
+                local_file.write(block)
+                for hasher in hashers.values():
+                    hasher.update(block)
+
+            if remote_file.size is None or offset < remote_file.size:
+                with self.connection() as ftp:
+                    ftp.retrbinary(f"RETR {remote_file.name}", write, blocksize=BLOCK_SIZE, rest=offset or None)
+
+            received = local_file.tell()
+
+        # Without a size, a download that ended without an error is taken to be complete
+        if remote_file.size is not None and received != remote_file.size:
+            raise OneFileException(f"Incomplete download of {remote_file.name}: {received}/{remote_file.size} bytes")
+
+        # Keep the remote modification time, so the file is organized the same way if it is ever moved again
+        timestamp = remote_file.modified.timestamp()
+        os.utime(temp_path, (timestamp, timestamp))
+
+        if destination_path.exists():
+            raise FileExistsError(f"File was created by another process: {destination_path}")
+        temp_path.rename(destination_path)
+
+        # The digests were calculated while downloading, so the file never needs to be read again
+        for algorithm, hasher in hashers.items():
+            self.organizer.cache_hash(destination_path, hasher.hexdigest(), hashing_algorithm=algorithm)
+        self.organizer.index_file(destination_path)
+        self.organizer.record_placed_file(destination_path)
+        self.organizer.record_copy_file()
+        logger.debug("Downloaded: %s", destination_path)
+        return destination_path
+
+    def download_threadsafe(self, remote_file : RemoteFile) -> Path | None:
+        try:
+            return self.download(remote_file)
+        except (OneFileException, FileExistsError, ftplib.Error, OSError, EOFError) as e:
+            logger.error("Error downloading file %s: %s", remote_file.name, e)
+            self.organizer.record_error()
+            return None
+
+    def run(self) -> list[Path]:
+        """
+        Download every new file from the remote directory.
+
+        Returns:
+            The paths of the downloaded files.
+
+        Raises:
+            ShouldTerminateError: If the server cannot be reached, or the remote directory cannot be listed.
+        """
+        try:
+            remote_files = [f for f in self.list_files() if self.should_download(f)]
+        except (ftplib.Error, OSError, EOFError) as e:
+            logger.error("Failed to list files on FTP server %s: %s", self.host, e)
+            self.close()
+            raise ShouldTerminateError("FTP fetch failed.") from e
+
+        logger.info("Found %d files on FTP server %s in %s", len(remote_files), self.host, self.remote_dir)
+
+        results : list[Path] = []
+        try:
+            with alive_bar(len(remote_files), title=f"{BLUE2}Download{RESET} {self.host}", unit='files', dual_line=True) as progress_bar:
+                with ThreadPoolExecutor(max_workers=self.connections) as executor:
+                    futures = [executor.submit(self.download_threadsafe, remote_file) for remote_file in remote_files]
+                    for future in as_completed(futures):
+                        if (result := future.result()):
+                            results.append(result)
+                        progress_bar()
+                        progress_bar.text(self.organizer.report('Downloading...'))
+        finally:
+            self.close()
+
+        return results
@@ -1,7 +1,10 @@
 """*********************************************************************************************************************
 *                                                                                                                      *
 *                                                                                                                      *
-*                COMPLETELY untested. This is just an idea I had... haven't used it.                                                                                                      *
+    Move RAW files which have a matching JPG (e.g. DSC01234.ARW + DSC01234.JPG) into a separate, dated library.
+
+    The source tree is listed once, with a single scandir per directory, and RAW+JPEG pairs are found in memory.
+    The moves are then run in parallel through FileManager.move_files, which verifies moves across drives.
 *                                                                                                                      *
 * -------------------------------------------------------------------------------------------------------------------- *
 *                                                                                                                      *
@@ -19,86 +22,131 @@
 *                                                                                                                      *
 *    LAST MODIFIED:                                                                                                    *
 *                                                                                                                      *
-*        2024-10-28     By Jess Mann                                                                                   *
+*        2026-10-18     By Jess Mann                                                                                   *
 *                                                                                                                      *
 *********************************************************************************************************************"""
+from __future__ import annotations
 import os
 import sys
 import argparse
 import logging
 from pathlib import Path
-import shutil
 import datetime
+from pydantic import Field, PrivateAttr, field_validator
+from scripts.lib.file_manager import FileManager
+from scripts.lib.pairs import scan_pairs
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def move_raw_files_with_matching_jpg(source_dir, target_dir, dry_run=False, limit=-1, verbose=False):
+class RawSeparator(FileManager):
+    """
+    Move RAW files with a matching JPG from directory into target_directory/YYYY/YYYY-MM-DD.
+    """
+    target_directory : Path = Field(default=Path('/mnt/p/'))
+    limit : int = -1
+
+    # Filenames already present (or planned) in each destination directory, lowercased
+    _destination_names : dict[Path, set[str]] = PrivateAttr(default_factory=dict)
+
+    @field_validator('target_directory', mode='before')
+    def validate_target_directory(cls, v):
+        return Path(v)
+
+    def should_ignore_directory(self, directory: Path | str, *, allow_hidden : bool = False) -> bool:
+        # Don't descend into the target, if it is inside the source
+        if Path(directory).absolute() == self.target_directory.absolute():
+            return True
+        return super().should_ignore_directory(directory, allow_hidden=allow_hidden)
+
+    def get_destination_names(self, directory : Path) -> set[str]:
+        """
+        List the filenames in a destination directory once, and remember names which are reserved by planned moves.
+
+        Names are compared case-insensitively, because the target is often a Windows drive.
+        """
+        if directory not in self._destination_names:
+            try:
+                with os.scandir(directory) as entries:
+                    self._destination_names[directory] = {entry.name.lower() for entry in entries}
+            except FileNotFoundError:
+                self._destination_names[directory] = set()
+        return self._destination_names[directory]
+
+    def find_destination(self, raw_file : os.DirEntry) -> Path | None:
+        """
+        Find a unique destination for a RAW file, based on its modification date.
+
+        Returns:
+            The destination path, or None if the file is already in its destination directory.
+        """
+        # DirEntry caches the stat result
+        mod_time = datetime.datetime.fromtimestamp(raw_file.stat().st_mtime)
+        dest_dir = self.target_directory / mod_time.strftime('%Y/%Y-%m-%d')
+        if Path(raw_file.path).parent.absolute() == dest_dir.absolute():
+            return None
+
+        names = self.get_destination_names(dest_dir)
+        name = raw_file.name
+        stem, suffix = os.path.splitext(name)
+        counter = 0
+        while name.lower() in names:
+            counter += 1
+            name = f"{stem}_{counter}{suffix}"
+
+        names.add(name.lower())
+        return dest_dir / name
+
+    def plan(self) -> list[tuple[Path, Path]]:
+        """
+        Find every RAW file with a matching JPG, and decide where each one will be moved.
+
+        Returns:
+            A list of (source path, destination path) pairs, of at most limit entries.
+        """
+        moves : list[tuple[Path, Path]] = []
+        for group in scan_pairs(self.directory, should_ignore_directory=self.should_ignore_directory):
+            for raw_file in group.raws:
+                if not (destination := self.find_destination(raw_file)):
+                    logger.warning("Source and destination are the same directory: %s", raw_file.path)
+                    continue
+
+                moves.append((Path(raw_file.path), destination))
+                if self.limit > 0 and len(moves) >= self.limit:
+                    logger.info("Limit of %d files reached.", self.limit)
+                    return moves
+
+        return moves
+
+    def run(self) -> list[Path]:
+        """
+        Move every RAW file with a matching JPG into the target directory.
+
+        Returns:
+            The destination paths of the moved files.
+        """
+        if not self.directory.exists():
+            logger.error("Source directory %s does not exist.", self.directory)
+            sys.exit(1)
+
+        moves = self.plan()
+        if not moves:
+            logger.info("No files processed.")
+            return []
+
+        results = self.move_files(moves, title='Separating RAWs')
+        logger.info("Processed %d files, %d errors.", len(results), self.errors)
+        return results
+
+def move_raw_files_with_matching_jpg(source_dir, target_dir, dry_run=False, limit=-1, verbose=False, max_threads=0):
     if verbose:
         logger.setLevel(logging.DEBUG)
     else:
         logger.setLevel(logging.INFO)
 
-    raw_extensions = ['.nef', '.arw']
-    files_processed = 0
-
-    # Ensure the target directory exists
-    target_dir = Path(target_dir)
-    target_dir.mkdir(parents=True, exist_ok=True)
-
-    source_dir = Path(source_dir)
-    if not source_dir.exists():
-        logger.error(f"Source directory {source_dir} does not exist.")
-        sys.exit(1)
-
-    for raw_file in source_dir.rglob('*'):
-        if raw_file.is_file() and raw_file.suffix.lower() in raw_extensions:
-            # Check for matching JPG file
-            jpg_file = raw_file.with_suffix('.jpg')
-            if not jpg_file.exists():
-                continue
-            
-            # Determine the date from the file's modification time
-            mod_time = datetime.datetime.fromtimestamp(raw_file.stat().st_mtime)
-            dest_subdir = mod_time.strftime('%Y/%Y-%m-%d')
-            dest_dir = target_dir / dest_subdir
-            dest_dir.mkdir(parents=True, exist_ok=True)
-
-            # Handle potential filename collisions
-            dest_file = dest_dir / raw_file.name
-            if dest_file.exists():
-                base_name = raw_file.stem
-                extension = raw_file.suffix
-                counter = 1
-                while True:
-                    new_name = f"{base_name}_{counter}{extension}"
-                    dest_file = dest_dir / new_name
-                    if not dest_file.exists():
-                        break
-                    counter += 1
-
-            # Move the RAW file
-            try:
-                if raw_file.resolve() == dest_file.resolve():
-                    logger.warning(f"Source and destination are the same file: {raw_file}")
-                    continue
-                if dry_run:
-                    logger.info(f"Dry run: Would move {raw_file} to {dest_file}")
-                else:
-                    shutil.move(str(raw_file), str(dest_file))
-                    logger.info(f"Moved {raw_file} to {dest_file}")
-                files_processed += 1
-                if limit > 0 and files_processed >= limit:
-                    logger.info(f"Limit of {limit} files reached.")
-                    break
-            except Exception as e:
-                logger.error(f"Error moving {raw_file} to {dest_file}: {e}")
-
-    if files_processed == 0:
-        logger.info("No files processed.")
-    else:
-        logger.info(f"Processed {files_processed} files.")
+    separator = RawSeparator(directory=source_dir, target_directory=target_dir, dry_run=dry_run, limit=limit, max_threads=max_threads)
+    return separator.run()
 
 def main():
     parser = argparse.ArgumentParser(description='Move RAW files with matching JPG files.')
@@ -107,6 +155,7 @@ def main():
     parser.add_argument('-n', '--dry-run', action='store_true', help='Perform a dry run without moving files')
     parser.add_argument('-v', '--verbose', action='store_true', help='Increase verbosity')
     parser.add_argument('-l', '--limit', type=int, default=-1, help='Limit the number of files to process')
+    parser.add_argument('--max-threads', type=int, default=0, help='Maximum number of files to move at once (default: based on the number of CPUs)')
     args = parser.parse_args()
 
     move_raw_files_with_matching_jpg(
@@ -114,8 +163,9 @@ def main():
         target_dir=args.target,
         dry_run=args.dry_run,
         limit=args.limit,
-        verbose=args.verbose
+        verbose=args.verbose,
+        max_threads=args.max_threads
     )
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
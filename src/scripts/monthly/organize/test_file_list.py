@@ -0,0 +1,133 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    test_file_list.py                                                                                    *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+from scripts.lib import file_manager
+from scripts.lib.file_manager import read_file_list
+from scripts.monthly.organize.base import FileOrganizer
+import logging
+
+# Disable logging during tests to keep the output clean
+logging.disable(logging.CRITICAL)
+
+class TestReadFileList(unittest.TestCase):
+    def read(self, data : bytes) -> list[Path]:
+        return list(read_file_list(io.BytesIO(data)))
+
+    def test_entries_split_across_chunks(self):
+        names = [f'/photos/{i:03d}/IMG_{i:04d}.jpg' for i in range(20)]
+        data = b'\0'.join(os.fsencode(name) for name in names) + b'\0'
+
+        # Chunks shorter than a single entry, so every entry is split across reads
+        with patch.object(file_manager, 'FILE_LIST_CHUNK_SIZE', 7):
+            self.assertEqual(self.read(data), [Path(name) for name in names])
+
+    def test_last_entry_without_trailing_nul(self):
+        self.assertEqual(self.read(b'a.jpg\0b.jpg'), [Path('a.jpg'), Path('b.jpg')])
+        # As written by "find -print0 > list; echo >> list"
+        self.assertEqual(self.read(b'a.jpg\0b.jpg\n'), [Path('a.jpg'), Path('b.jpg')])
+
+    def test_empty_entries_are_skipped(self):
+        self.assertEqual(self.read(b'\0a.jpg\0\0\0b.jpg\0\0'), [Path('a.jpg'), Path('b.jpg')])
+        self.assertEqual(self.read(b''), [])
+
+    def test_newlines_within_names_are_kept(self):
+        self.assertEqual(self.read(b'line\nbreak.jpg\0'), [Path('line\nbreak.jpg')])
+
+    def test_reads_stdin(self):
+        stdin = io.TextIOWrapper(io.BytesIO(b'a.jpg\0b.jpg\0'))
+        with patch('sys.stdin', stdin):
+            self.assertEqual(list(read_file_list('-')), [Path('a.jpg'), Path('b.jpg')])
+
+    def test_reads_path(self):
+        with tempfile.TemporaryDirectory() as test_dir:
+            file_list = Path(test_dir) / 'files.lst'
+            file_list.write_bytes(b'a.jpg\0b.jpg\0')
+            self.assertEqual(list(read_file_list(file_list)), [Path('a.jpg'), Path('b.jpg')])
+            self.assertEqual(list(read_file_list(str(file_list))), [Path('a.jpg'), Path('b.jpg')])
+
+class TestOrganizeFileList(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.source_dir = self.test_dir / 'incoming'
+        self.library_dir = self.test_dir / 'library'
+        self.source_dir.mkdir()
+        self.library_dir.mkdir()
+        self.organizer = FileOrganizer(
+            directory=self.source_dir,
+            target_directory=self.library_dir,
+            trash_directory=self.test_dir / '.trash',
+            max_threads=2,
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def create_file(self, path : Path, content=b"Test content") -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        return path
+
+    def write_file_list(self, *paths : Path) -> Path:
+        file_list = self.test_dir / 'files.lst'
+        file_list.write_bytes(b''.join(os.fsencode(path) + b'\0' for path in paths))
+        return file_list
+
+    def test_filters_are_applied(self):
+        listed = [
+            self.create_file(self.source_dir / 'PXL_20211009_143747197.jpg'),
+            self.create_file(self.source_dir / 'notes.txt'),
+            self.create_file(self.source_dir / '.trash' / 'PXL_20211010_143747197.jpg'),
+            self.source_dir / 'PXL_20211011_143747197.jpg',
+            self.source_dir,
+        ]
+        files = list(self.organizer.yield_listed_files(self.write_file_list(*listed)))
+        self.assertEqual(files, [listed[0]])
+
+    def test_organizes_only_listed_files(self):
+        listed = self.create_file(self.source_dir / 'a' / 'PXL_20211009_143747197.jpg')
+        unlisted = self.create_file(self.source_dir / 'b' / 'PXL_20211010_143747197.jpg')
+        self.organizer.organize_files(file_list=self.write_file_list(listed))
+
+        self.assertFalse(listed.exists())
+        self.assertEqual([path.name for path in self.library_dir.rglob('*.jpg')], [listed.name])
+        self.assertTrue(unlisted.exists())
+        # The emptied directory is cleaned up
+        self.assertFalse(listed.parent.exists())
+
+    def test_directories_outside_are_not_cleaned_up(self):
+        outside = self.create_file(self.test_dir / 'elsewhere' / 'PXL_20211009_143747197.jpg')
+        self.organizer.organize_files(file_list=self.write_file_list(outside))
+
+        self.assertFalse(outside.exists())
+        self.assertTrue(outside.parent.exists())
+
+if __name__ == '__main__':
+    unittest.main()
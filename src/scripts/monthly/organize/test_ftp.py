@@ -0,0 +1,158 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    test_ftp.py                                                                                          *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+import datetime
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+import xxhash
+from scripts.monthly.organize.base import FileOrganizer
+from scripts.monthly.organize.ftp import FTPIngester
+import logging
+
+try:
+    from pyftpdlib.authorizers import DummyAuthorizer
+    from pyftpdlib.handlers import FTPHandler
+    from pyftpdlib.servers import ThreadedFTPServer
+except ImportError:
+    ThreadedFTPServer = None
+
+# Disable logging during tests to keep the output clean
+logging.disable(logging.CRITICAL)
+
+# Noon UTC, so the date folder is the same in every local timezone that tests are likely to run in
+MODIFIED = datetime.datetime(2021, 10, 9, 12, 0, tzinfo=datetime.timezone.utc)
+
+@unittest.skipUnless(ThreadedFTPServer, 'pyftpdlib is required to run a local FTP server')
+class TestFTPIngester(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.remote_dir = self.test_dir / 'phone'
+        self.library_dir = self.test_dir / 'library'
+        self.remote_dir.mkdir()
+
+        authorizer = DummyAuthorizer()
+        authorizer.add_user('phone', 'secret', str(self.remote_dir), perm='elr')
+        self.server = ThreadedFTPServer(('127.0.0.1', 0), self.create_handler(authorizer))
+        self.port = self.server.socket.getsockname()[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={'timeout': 0.1}, daemon=True)
+        self.thread.start()
+
+        self.organizer = FileOrganizer(directory=self.test_dir, target_directory=self.library_dir)
+
+    def tearDown(self):
+        self.server.close_all()
+        self.thread.join(timeout=5)
+        shutil.rmtree(self.test_dir)
+
+    def create_handler(self, authorizer : DummyAuthorizer) -> type[FTPHandler]:
+        return type('Handler', (FTPHandler,), {'authorizer': authorizer})
+
+    def create_remote_file(self, name : str, content : bytes) -> Path:
+        path = self.remote_dir / name
+        path.write_bytes(content)
+        os.utime(path, (MODIFIED.timestamp(), MODIFIED.timestamp()))
+        return path
+
+    def fetch(self, connections : int = 3) -> list[Path]:
+        return self.organizer.fetch_files_from_ftp('127.0.0.1', 'phone', 'secret', '/', port=self.port, connections=connections)
+
+    def destination(self, name : str) -> Path:
+        local = MODIFIED.astimezone()
+        return self.library_dir / local.strftime('%Y/%Y-%m-%d') / name
+
+    def test_downloads_into_date_folders(self):
+        contents = {f'IMG_{i:04d}.jpg': os.urandom(1024 * (i + 1)) for i in range(8)}
+        for name, content in contents.items():
+            self.create_remote_file(name, content)
+        self.create_remote_file('notes.txt', b'ignored')
+
+        results = self.fetch()
+
+        self.assertEqual(len(results), len(contents))
+        for name, content in contents.items():
+            destination = self.destination(name)
+            self.assertEqual(destination.read_bytes(), content)
+            self.assertEqual(destination.stat().st_mtime, MODIFIED.timestamp())
+            # The digest was calculated during the download
+            self.assertEqual(self.organizer.get_cached_hash(destination), xxhash.xxh64(content).hexdigest())
+        self.assertFalse(list(self.library_dir.rglob('*.part')))
+
+    def test_skips_existing_files(self):
+        self.create_remote_file('IMG_0001.jpg', b'photo')
+        self.assertEqual(len(self.fetch()), 1)
+        self.assertEqual(self.fetch(), [])
+        self.assertEqual(self.organizer.files_skipped, 1)
+
+    def test_resumes_partial_download(self):
+        content = os.urandom(3 * 1024 * 1024 + 17)
+        self.create_remote_file('VID_0001.mp4', content)
+
+        destination = self.destination('VID_0001.mp4')
+        destination.parent.mkdir(parents=True)
+        partial = destination.with_name('.VID_0001.mp4.part')
+        partial.write_bytes(content[:1024 * 1024])
+
+        self.assertEqual(self.fetch(connections=1), [destination])
+        self.assertEqual(destination.read_bytes(), content)
+        self.assertEqual(self.organizer.get_cached_hash(destination), xxhash.xxh64(content).hexdigest())
+        self.assertFalse(partial.exists())
+
+class TestFTPIngesterWithoutMLSDSize(TestFTPIngester):
+    """
+    Run every download test against a server that lists files with MLSD, without their sizes.
+    """
+    def create_handler(self, authorizer : DummyAuthorizer) -> type[FTPHandler]:
+        class Handler(FTPHandler):
+            proto_cmds = {cmd: info for cmd, info in FTPHandler.proto_cmds.items() if cmd != 'SIZE'}
+
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self._current_facts = [fact for fact in self._current_facts if fact != 'size']
+                self._available_facts = [fact for fact in self._available_facts if fact != 'size']
+
+        Handler.authorizer = authorizer
+        return Handler
+
+    def test_sizes_are_unknown(self):
+        self.create_remote_file('IMG_0001.jpg', b'photo')
+        ingester = FTPIngester(organizer=self.organizer, host='127.0.0.1', user='phone', password='secret', remote_dir='/', port=self.port)
+        try:
+            self.assertEqual([remote_file.size for remote_file in ingester.list_files()], [None])
+        finally:
+            ingester.close()
+
+class TestFTPIngesterWithoutSize(TestFTPIngesterWithoutMLSDSize):
+    """
+    Run every download test against a server that supports neither MLSD nor SIZE.
+    """
+    def create_handler(self, authorizer : DummyAuthorizer) -> type[FTPHandler]:
+        proto_cmds = {cmd: info for cmd, info in FTPHandler.proto_cmds.items() if cmd not in ('MLSD', 'SIZE')}
+        return type('Handler', (FTPHandler,), {'authorizer': authorizer, 'proto_cmds': proto_cmds})
+
+if __name__ == '__main__':
+    unittest.main()
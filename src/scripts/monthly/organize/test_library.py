@@ -0,0 +1,112 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    test_library.py                                                                                      *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from scripts.monthly.exceptions import DuplicationHandledException
+from scripts.monthly.organize.base import FileOrganizer
+import logging
+
+# Disable logging during tests to keep the output clean
+logging.disable(logging.CRITICAL)
+
+class TestLibraryIndex(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.source_dir = self.test_dir / 'incoming'
+        self.library_dir = self.test_dir / 'library'
+        self.source_dir.mkdir()
+        self.library_dir.mkdir()
+        self.organizer = FileOrganizer(
+            directory=self.source_dir,
+            target_directory=self.library_dir,
+            trash_directory=self.test_dir / '.trash',
+            library_index=self.test_dir / 'library.db',
+        )
+
+    def tearDown(self):
+        self.organizer.library_index.close()
+        shutil.rmtree(self.test_dir)
+
+    def create_file(self, path : Path, content=b"Test content"):
+        """Helper method to create a file with specified content."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(content)
+
+    def test_build_index(self):
+        self.create_file(self.library_dir / '2021' / '2021-10-09' / 'IMG_1234.jpg')
+        self.create_file(self.library_dir / '2022' / '2022-01-01' / 'IMG_5678.jpg', b'Other content')
+        self.assertEqual(self.organizer.build_library_index(), 2)
+        self.assertEqual(self.organizer.library_index.count_records(), 2)
+
+    def test_renamed_duplicate_in_other_folder(self):
+        content = b"The same photo"
+        self.create_file(self.library_dir / '2021' / '2021-10-09' / 'IMG_1234.jpg', content)
+        self.organizer.build_library_index()
+
+        source_file = self.source_dir / 'IMG_1234 (1).jpg'
+        self.create_file(source_file, content)
+
+        with self.assertRaises(DuplicationHandledException):
+            self.organizer.process_file(source_file)
+        self.assertFalse(source_file.exists())
+        self.assertEqual(self.organizer.files_duplicated, 1)
+
+    def test_same_size_different_content(self):
+        self.create_file(self.library_dir / '2021' / '2021-10-09' / 'IMG_1234.jpg', b"aaaa")
+        self.organizer.build_library_index()
+
+        source_file = self.source_dir / 'IMG_1234 (1).jpg'
+        self.create_file(source_file, b"bbbb")
+
+        self.assertIsNone(self.organizer.find_library_duplicate(source_file))
+
+    def test_moved_files_are_indexed(self):
+        source_file = self.source_dir / 'PXL_20211009_143747197.jpg'
+        self.create_file(source_file, b"A new photo")
+        destination = self.organizer.process_file(source_file)
+
+        records = self.organizer.library_index.find_by_size(len(b"A new photo"))
+        self.assertEqual([Path(record.path) for record in records], [destination.absolute()])
+
+        # A second copy, under a different name, is now caught by the index
+        self.create_file(self.source_dir / 'copy.jpg', b"A new photo")
+        self.assertEqual(self.organizer.find_library_duplicate(self.source_dir / 'copy.jpg'), destination.absolute())
+
+    def test_stale_records_are_removed(self):
+        library_file = self.library_dir / '2021' / '2021-10-09' / 'IMG_1234.jpg'
+        self.create_file(library_file)
+        self.organizer.build_library_index()
+        library_file.unlink()
+
+        source_file = self.source_dir / 'IMG_1234.jpg'
+        self.create_file(source_file)
+        self.assertIsNone(self.organizer.find_library_duplicate(source_file))
+        self.assertEqual(self.organizer.library_index.count_records(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    test_manifest.py                                                                                     *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+import hashlib
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from scripts.lib.manifest import read_manifest
+from scripts.monthly.organize.base import FileOrganizer
+import logging
+
+# Disable logging during tests to keep the output clean
+logging.disable(logging.CRITICAL)
+
+class TestManifest(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.source_dir = self.test_dir / 'incoming'
+        self.library_dir = self.test_dir / 'library'
+        self.manifest_path = self.test_dir / 'manifest.jsonl'
+        self.source_dir.mkdir()
+        self.organizer = FileOrganizer(
+            directory=self.source_dir,
+            target_directory=self.library_dir,
+            manifest_path=self.manifest_path,
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_placed_files_are_recorded(self):
+        contents = {'IMG_0001.jpg': b'first', 'IMG_0002.jpg': b'second'}
+        for name, content in contents.items():
+            (self.source_dir / name).write_bytes(content)
+
+        self.organizer.organize_files(cleanup=False)
+
+        entries = {entry.path.name: entry for entry in read_manifest(self.manifest_path)}
+        self.assertEqual(set(entries), set(contents))
+        for name, content in contents.items():
+            entry = entries[name]
+            self.assertTrue(entry.path.is_absolute())
+            self.assertTrue(entry.path.is_relative_to(self.library_dir))
+            self.assertEqual(entry.size, len(content))
+            self.assertEqual(entry.algorithm, 'sha1')
+            self.assertEqual(entry.digest, hashlib.sha1(content).hexdigest())
+
+    def test_invalid_lines_are_skipped(self):
+        self.manifest_path.write_text('{"path": "/a.jpg", "size": 1, "mtime": 0}\n{"path": "/b.jp')
+        self.assertEqual([entry.path for entry in read_manifest(self.manifest_path)], [Path('/a.jpg')])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    test_separate_raws.py                                                                                *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+import datetime
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from scripts.lib.pairs import index_pairs
+from scripts.monthly.organize.separate_raws import RawSeparator
+import logging
+
+# Disable logging during tests to keep the output clean
+logging.disable(logging.CRITICAL)
+
+MODIFIED = datetime.datetime(2024, 10, 28, 12, 0)
+
+class TestRawSeparator(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.source_dir = self.test_dir / 'shoot'
+        self.target_dir = self.test_dir / 'raws'
+        self.source_dir.mkdir()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def create_file(self, relative_path : str) -> Path:
+        path = self.source_dir / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(relative_path.encode())
+        os.utime(path, (MODIFIED.timestamp(), MODIFIED.timestamp()))
+        return path
+
+    def destination(self, name : str) -> Path:
+        return self.target_dir / MODIFIED.strftime('%Y/%Y-%m-%d') / name
+
+    def test_index_pairs_is_case_insensitive(self):
+        for name in ['DSC0001.ARW', 'DSC0001.JPG', 'DSC0002.nef', 'DSC0002.jpeg', 'DSC0003.dng', 'DSC0004.jpg', 'notes.txt']:
+            self.create_file(name)
+
+        with os.scandir(self.source_dir) as entries:
+            groups = index_pairs(self.source_dir, entries)
+
+        self.assertEqual(sorted(stem for stem, group in groups.items() if group.is_pair), ['DSC0001', 'DSC0002'])
+        self.assertFalse(groups['DSC0003'].is_pair)
+        self.assertNotIn('notes', groups)
+
+    def test_moves_paired_raws(self):
+        self.create_file('a/DSC0001.ARW')
+        self.create_file('a/DSC0001.JPG')
+        self.create_file('a/DSC0002.ARW')
+        # Same name in another directory, so it must be renamed
+        self.create_file('b/DSC0001.arw')
+        self.create_file('b/DSC0001.jpg')
+
+        separator = RawSeparator(directory=self.source_dir, target_directory=self.target_dir)
+        results = separator.run()
+
+        self.assertEqual(len(results), 2)
+        self.assertTrue(self.destination('DSC0001.ARW').exists() or self.destination('DSC0001.arw').exists())
+        self.assertTrue(self.destination('DSC0001_1.ARW').exists() or self.destination('DSC0001_1.arw').exists())
+        # Unpaired RAWs and the JPGs stay where they are
+        self.assertTrue((self.source_dir / 'a/DSC0002.ARW').exists())
+        self.assertTrue((self.source_dir / 'a/DSC0001.JPG').exists())
+        self.assertTrue((self.source_dir / 'b/DSC0001.jpg').exists())
+
+    def test_dry_run_and_limit(self):
+        for i in range(3):
+            self.create_file(f'DSC000{i}.NEF')
+            self.create_file(f'DSC000{i}.JPG')
+
+        separator = RawSeparator(directory=self.source_dir, target_directory=self.target_dir, limit=2, dry_run=True)
+        self.assertEqual(len(separator.plan()), 2)
+        separator = RawSeparator(directory=self.source_dir, target_directory=self.target_dir, dry_run=True)
+        separator.run()
+        self.assertFalse(self.target_dir.exists())
+        self.assertEqual(len(list(self.source_dir.glob('*.NEF'))), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,6 +6,11 @@ Sync JPG files to a thumbnails directory, so that there are no duplicates.
 This script is useful for collecting all the jpg files scattered throughout a filesystem so that they can be
 uploaded to a cloud provider without making a mess.
 
+The sources are walked in parallel, one scandir per directory, and every copy is planned before any starts. A file
+is only read (to compare its digest) when its destination exists and differs in size or modification time. Digests and
+stats of synced files are kept in a manifest in the target directory, so resyncing an unchanged library reads metadata
+only.
+
 Usage:
     sync.py [-h] [--target TARGET] [--threads THREADS] [--dry-run] sources [sources ...]
 
@@ -48,32 +53,131 @@ Examples:
 *********************************************************************************************************************"""
 from __future__ import annotations
 import os
+import json
 import logging
 import hashlib
+import tempfile
+import threading
 from pathlib import Path
 from datetime import datetime
 import shutil
 import subprocess
 from tqdm import tqdm
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 import argparse
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Kept in the target directory
+MANIFEST_NAME = '.sync_manifest.json'
+
+# Files are hashed in 1MB reads
+HASH_CHUNK_SIZE = 1024 * 1024
+
+class SyncManifest:
+    """
+    Remember every file synced to a target: where it was copied to, and the size, modification time and digest of both
+    copies at the time, so a later sync can tell that neither has changed without reading them.
+    """
+    path : Path
+
+    def __init__(self, path: Path):
+        self.path = path
+        # source path -> {dest, size, mtime_ns, dest_size, dest_mtime_ns, digest}
+        self._records : dict[str, dict] = {}
+        # dest path -> source path
+        self._by_dest : dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> SyncManifest:
+        """
+        Read the manifest, if it exists. A damaged manifest is ignored, and only makes the next sync slower.
+        """
+        try:
+            with self.path.open('r', encoding='utf-8') as f:
+                records = json.load(f)
+        except FileNotFoundError:
+            return self
+        except (OSError, ValueError) as e:
+            logger.warning('Ignoring unreadable sync manifest %s: %s', self.path, e)
+            return self
+
+        with self._lock:
+            self._records = records
+            self._by_dest = {record['dest']: source for source, record in records.items()}
+        return self
+
+    def save(self) -> None:
+        """
+        Write the manifest, replacing the old one only once the new one is complete.
+        """
+        with self._lock:
+            data = json.dumps(self._records)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            Path(temp_path).unlink(missing_ok=True)
+            raise
+
+    def get(self, src: Path) -> dict | None:
+        with self._lock:
+            return self._records.get(str(src))
+
+    def get_dest_digest(self, dest: Path, dest_stat: os.stat_result) -> str | None:
+        """
+        Get the recorded digest of a destination file, if it has not changed since it was recorded.
+        """
+        with self._lock:
+            source = self._by_dest.get(str(dest))
+            record = self._records.get(source) if source else None
+        if record and record['dest_size'] == dest_stat.st_size and record['dest_mtime_ns'] == dest_stat.st_mtime_ns:
+            return record['digest']
+        return None
+
+    def record(self, src: Path, src_stat: os.stat_result, dest: Path, dest_stat: os.stat_result, digest: str | None = None) -> None:
+        with self._lock:
+            if (previous := self._records.get(str(src))):
+                self._by_dest.pop(previous['dest'], None)
+            self._records[str(src)] = {
+                'dest': str(dest),
+                'size': src_stat.st_size,
+                'mtime_ns': src_stat.st_mtime_ns,
+                'dest_size': dest_stat.st_size,
+                'dest_mtime_ns': dest_stat.st_mtime_ns,
+                'digest': digest,
+            }
+            self._by_dest[str(dest)] = str(src)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._records)
+
 class JPGSyncer:
     target_dir: Path
     dry_run: bool
     threads : int
 
+    manifest : SyncManifest
+
     def __init__(self, target_dir: Path, dry_run: bool = False, threads : int = 4):
-        self.target_dir = target_dir
+        # The manifest is keyed by absolute paths, so it works from any working directory
+        self.target_dir = target_dir.absolute()
         self.dry_run = dry_run
         self.threads = threads
+        self.manifest = SyncManifest(self.target_dir / MANIFEST_NAME).load()
+        # target directory -> {name: the file which holds that name}. The file is the existing destination, or the
+        # source planned to be copied there by this sync.
+        self._listings : dict[Path, dict[str, Path]] = {}
+        self._listings_lock = threading.Lock()
 
     def find_jpg_files(self, source_dir: Path) -> list[Path]:
         """
-        Find all JPG files in the source directory.
+        Find all JPG files in the source directory which need to be copied.
 
         Args:
             source_dir (Path): Source directory to search for JPG files.
@@ -81,116 +185,210 @@ class JPGSyncer:
         Returns:
             list[Path]: List of JPG files found in the source directory.
         """
-        jpg_files = []
-        for file in source_dir.rglob("*"):
-            if file.suffix.lower() == ".jpg":
-                dest_path = self.get_file_structure(file)
-                if not self.should_skip_file(file, dest_path):
-                    jpg_files.append(file)
-        return jpg_files
+        return [src for src, _dest in self.plan([source_dir])]
 
-    def get_file_structure(self, file: Path) -> Path:
+    def plan(self, source_dirs: list[Path]) -> list[tuple[Path, Path]]:
         """
-        Generate the target directory structure for the file.
+        Walk the source directories in parallel, and decide where each JPG file which needs to be copied goes.
+
+        Every directory is listed once, by its own task, so a deep or wide tree keeps every thread busy.
 
         Args:
-            file (Path): File to generate the target directory structure for.
+            source_dirs (list[Path]): Source directories to search for JPG files.
 
         Returns:
-            Path: Absolute path for the target file.
+            list[tuple[Path, Path]]: The (source, destination) of every copy to make.
         """
-        mod_time = datetime.fromtimestamp(file.stat().st_mtime)
-        year = mod_time.strftime("%Y")
-        date = mod_time.strftime("%Y-%m-%d")
-        return self.target_dir / year / date / file.name
-
-    def generate_file_hash(self, file: Path) -> str:
+        copies : list[tuple[Path, Path]] = []
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            pending : set[Future] = {executor.submit(self.scan_directory, source_dir.absolute()) for source_dir in source_dirs}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    planned, subdirs = future.result()
+                    copies.extend(planned)
+                    pending.update(executor.submit(self.scan_directory, subdir) for subdir in subdirs)
+        return copies
+
+    def scan_directory(self, directory: Path) -> tuple[list[tuple[Path, Path]], list[Path]]:
         """
-        Generate a SHA-256 hash for the file.
+        List one directory, and plan the copy of each JPG file in it.
 
         Args:
-            file (Path): File to generate the hash for.
+            directory (Path): Directory to list.
 
         Returns:
-            str: SHA-256 hash for the
+            tuple: The planned (source, destination) copies, and the subdirectories still to scan.
         """
-        hash_func = hashlib.sha256()
-        with file.open('rb') as f:
-            for chunk in iter(lambda: f.read(4096), b''):
-                hash_func.update(chunk)
-        return hash_func.hexdigest()
-
-    def should_skip_file(self, src: Path, dest: Path) -> bool:
+        copies : list[tuple[Path, Path]] = []
+        subdirs : list[Path] = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            # Never sync the target into itself
+                            if os.path.abspath(entry.path) != os.path.abspath(self.target_dir):
+                                subdirs.append(Path(entry.path))
+                        elif entry.name.lower().endswith('.jpg') and entry.is_file():
+                            src = Path(entry.path)
+                            if (dest := self.plan_file(src, entry.stat())):
+                                copies.append((src, dest))
+                    except OSError as e:
+                        logger.error("Failed to check %s: %s", entry.path, e)
+        except OSError as e:
+            logger.error("Failed to list %s: %s", directory, e)
+        return copies, subdirs
+
+    def plan_file(self, src: Path, src_stat: os.stat_result) -> Path | None:
         """
-        Check if the file should be skipped based on the destination file.
+        Decide where a file should be copied, if it needs to be.
+
+        The contents of a file are only read when its destination is taken by a file of a different size or
+        modification time, and the manifest doesn't already know that they match.
 
         Args:
-            src (Path): Source file to check.
-            dest (Path): Destination file to check.
+            src (Path): Source file.
+            src_stat (os.stat_result): Stat of the source file.
 
         Returns:
-            bool: True if the file should be skipped, False otherwise.
+            Path | None: Destination to copy the file to, or None if it is already there.
         """
-        if dest.exists() and self.generate_file_hash(src) == self.generate_file_hash(dest):
+        if self.is_synced(src, src_stat):
+            return None
+
+        dest = self.get_file_structure(src, src_stat)
+        with self._listings_lock:
+            names = self.get_listing(dest.parent)
+            existing = names.get(dest.name)
+            if existing is None:
+                names[dest.name] = src
+                return dest
+
+        if existing == src:
+            return None
+
+        # The name is taken. Files with the same size and modification time are the same, as rsync assumes.
+        existing_stat = existing.stat()
+        if existing_stat.st_size == src_stat.st_size and int(existing_stat.st_mtime) == int(src_stat.st_mtime):
+            self.record_synced(src, src_stat, existing, existing_stat)
+            return None
+
+        digest = self.generate_file_hash(src)
+        existing_digest = self.manifest.get_dest_digest(existing, existing_stat) or self.generate_file_hash(existing)
+        if digest == existing_digest:
             logger.debug("Skipping %s as it already exists with the same content.", src)
-            return True
-        return False
+            self.record_synced(src, src_stat, existing, existing_stat, digest)
+            return None
 
-    def get_filename(self, src: Path, dest: Path) -> Path | None:
-        """
-        Get the destination filename for the source file.
+        with self._listings_lock:
+            names = self.get_listing(dest.parent)
+            dest = dest.parent / self.get_unique_name(dest.name, names)
+            names[dest.name] = src
+        return dest
 
-        Args:
-            src (Path): Source file to get the destination filename for.
-            dest (Path): Destination file to check for collisions.
+    def is_synced(self, src: Path, src_stat: os.stat_result) -> bool:
+        """
+        Check the manifest for a file copied by an earlier sync, which hasn't changed since, and whose copy hasn't either.
+        """
+        record = self.manifest.get(src)
+        if not record or record['size'] != src_stat.st_size or record['mtime_ns'] != src_stat.st_mtime_ns:
+            return False
+        try:
+            dest_stat = os.stat(record['dest'])
+        except OSError:
+            return False
+        return record['dest_size'] == dest_stat.st_size and record['dest_mtime_ns'] == dest_stat.st_mtime_ns
+
+    def record_synced(self, src: Path, src_stat: os.stat_result, dest: Path, dest_stat: os.stat_result, digest: str | None = None) -> None:
+        # Only destinations which exist are recorded, not sources which were planned to be copied by this sync
+        if not dest.is_relative_to(self.target_dir):
+            return
+        self.manifest.record(src, src_stat, dest, dest_stat, digest)
 
-        Returns:
-            Path | None: Destination filename if it should be copied, None otherwise.
+    def get_listing(self, directory: Path) -> dict[str, Path]:
         """
-        if self.should_skip_file(src, dest):
-            return None
-        return self.resolve_collision(dest) if dest.exists() else dest
+        Get the names of the files in a target directory, listing it the first time. Call with _listings_lock held.
+        """
+        if (names := self._listings.get(directory)) is None:
+            try:
+                names = {name: directory / name for name in os.listdir(directory)}
+            except FileNotFoundError:
+                names = {}
+            self._listings[directory] = names
+        return names
+
+    @staticmethod
+    def get_unique_name(name: str, taken: dict[str, Path]) -> str:
+        """
+        Get a name which is not taken, by appending a number to the filename.
+        """
+        path = Path(name)
+        i = 1
+        while (candidate := f"{path.stem}-{i}{path.suffix}") in taken:
+            i += 1
+        return candidate
 
-    def check_and_copy(self, src: Path, dest: Path) -> bool:
+    def get_file_structure(self, file: Path, stat: os.stat_result | None = None) -> Path:
         """
-        Check if the file should be copied and copy it if necessary.
+        Generate the target directory structure for the file.
 
         Args:
-            src (Path): Source file to copy.
-            dest (Path): Destination file to copy to.
+            file (Path): File to generate the target directory structure for.
+            stat (os.stat_result): Stat of the file, if it is already known.
 
         Returns:
-            bool: True if the file was copied successfully, False otherwise.
+            Path: Absolute path for the target file.
         """
-        destination = self.get_filename(src, dest)
+        mod_time = datetime.fromtimestamp((stat or file.stat()).st_mtime)
+        year = mod_time.strftime("%Y")
+        date = mod_time.strftime("%Y-%m-%d")
+        return self.target_dir / year / date / file.name
 
-        if not destination:
-            return True
+    def generate_file_hash(self, file: Path) -> str:
+        """
+        Generate a SHA-256 hash for the file.
 
-        # If windows, rsync isn't available, so copy with shutil
-        if os.name == 'nt':
-            return self.copy_with_shutil(src, destination)
+        Args:
+            file (Path): File to generate the hash for.
 
-        return self.copy_with_rsync(src, destination)
+        Returns:
+            str: SHA-256 hash for the
+        """
+        hash_func = hashlib.sha256()
+        with file.open('rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                hash_func.update(chunk)
+        return hash_func.hexdigest()
 
-    def resolve_collision(self, dest: Path) -> Path:
+    def copy_file(self, src: Path, dest: Path) -> bool:
         """
-        Resolve filename collisions by appending a number to the filename.
+        Copy the file to a destination which is known to be free, and record it in the manifest.
 
         Args:
-            dest (Path): Destination file to resolve collisions for.
+            src (Path): Source file to copy.
+            dest (Path): Destination file to copy to.
 
         Returns:
-            Path: Destination filename without collisions.
+            bool: True if the file was copied successfully, False otherwise.
         """
-        dest_dir = dest.parent
-        dest_stem = dest.stem
-        dest_suffix = dest.suffix
-        i = 1
-        while dest.exists():
-            dest = dest_dir / f"{dest_stem}-{i}{dest_suffix}"
-            i += 1
-        return dest
+        try:
+            # If windows, rsync isn't available, so copy with shutil
+            if os.name == 'nt':
+                copied = self.copy_with_shutil(src, dest)
+            else:
+                copied = self.copy_with_rsync(src, dest)
+        except Exception as e:
+            # e.g. rsync is not installed, or the file can't be read. Don't stop the rest of the sync.
+            logger.error(f"Failed to process {src}: {e}")
+            return False
+
+        if copied and not self.dry_run:
+            try:
+                self.manifest.record(src, src.stat(), dest, dest.stat())
+            except OSError as e:
+                logger.warning("Failed to record %s in the sync manifest: %s", src, e)
+        return copied
 
     def copy_with_rsync(self, src: Path, dest: Path) -> bool:
         """
@@ -245,38 +443,30 @@ class JPGSyncer:
         Args:
             source_dirs (list[Path]): Source directories to search for JPG files.
         """
-        jpg_files = []
-        for source_dir in source_dirs:
-            jpg_files.extend(self.find_jpg_files(source_dir))
-
-        total = len(jpg_files)
-
-        if not total:
-            logger.info("No JPG files found to sync.")
-            return
-        logger.info('%s JPG files found.', total)
-
-        with ThreadPoolExecutor(max_workers=self.threads) as executor:
-            list(tqdm(executor.map(self.process_file, jpg_files), total=total, desc="Syncing JPG files"))
+        try:
+            copies = self.plan(source_dirs)
+            total = len(copies)
 
-        logger.info("Sync completed on %s files.", total)
+            if not total:
+                logger.info("No JPG files found to sync.")
+                return
+            logger.info('%s JPG files found.', total)
 
-    def process_file(self, file: Path) -> bool:
-        """
-        Process a single file by copying it to the target directory.
+            with ThreadPoolExecutor(max_workers=self.threads) as executor:
+                futures = [executor.submit(self.copy_file, src, dest) for src, dest in copies]
+                list(tqdm((future.result() for future in futures), total=total, desc="Syncing JPG files"))
 
-        Args:
-            file (Path): File to process.
+            logger.info("Sync completed on %s files.", total)
+        finally:
+            # Save whatever was learned, even if the sync was interrupted
+            if not self.dry_run:
+                self.save_manifest()
 
-        Returns:
-            bool: True if the file was processed successfully, False otherwise.
-        """
+    def save_manifest(self) -> None:
         try:
-            dest_path = self.get_file_structure(file)
-            return self.check_and_copy(file, dest_path)
-        except Exception as e:
-            logger.error(f"Failed to process {file}: {e}")
-        return False
+            self.manifest.save()
+        except OSError as e:
+            logger.error("Failed to save the sync manifest %s: %s", self.manifest.path, e)
 
 def main():
     # Load default target from environment variable IMAGEINN_THUMBNAILS_DIR
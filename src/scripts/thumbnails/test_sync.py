@@ -0,0 +1,131 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    test_sync.py                                                                                         *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+from scripts.thumbnails.sync import MANIFEST_NAME, JPGSyncer
+import logging
+
+# Disable logging during tests to keep the output clean
+logging.disable(logging.CRITICAL)
+
+class TestSyncPlanner(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.source_dir = self.test_dir / 'source'
+        self.target_dir = self.test_dir / 'target'
+        (self.source_dir / 'a' / 'b').mkdir(parents=True)
+        self.target_dir.mkdir()
+
+        self.files = [
+            self.write(self.source_dir / 'IMG_0001.jpg', b'one'),
+            self.write(self.source_dir / 'a' / 'IMG_0002.JPG', b'two'),
+            self.write(self.source_dir / 'a' / 'b' / 'IMG_0003.jpg', b'three'),
+        ]
+        (self.source_dir / 'a' / 'notes.txt').write_text('not a photo')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def write(self, path : Path, content : bytes, mtime : int = 1_700_000_000) -> Path:
+        path.write_bytes(content)
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def syncer(self) -> JPGSyncer:
+        # Copy with shutil, so the tests don't depend on rsync
+        syncer = JPGSyncer(self.target_dir, threads=2)
+        syncer.copy_with_rsync = syncer.copy_with_shutil
+        return syncer
+
+    def test_plans_every_jpg(self):
+        copies = self.syncer().plan([self.source_dir])
+        self.assertEqual(sorted(src for src, _ in copies), sorted(self.files))
+        for src, dest in copies:
+            self.assertEqual(dest, self.syncer().get_file_structure(src))
+
+    def test_resync_reads_metadata_only(self):
+        self.syncer().sync([self.source_dir])
+        self.assertTrue((self.target_dir / MANIFEST_NAME).exists())
+
+        with patch.object(JPGSyncer, 'generate_file_hash') as generate_file_hash:
+            self.assertEqual(self.syncer().plan([self.source_dir]), [])
+        generate_file_hash.assert_not_called()
+
+    def test_unchanged_copy_skipped_without_manifest(self):
+        self.syncer().sync([self.source_dir])
+        (self.target_dir / MANIFEST_NAME).unlink()
+
+        with patch.object(JPGSyncer, 'generate_file_hash') as generate_file_hash:
+            self.assertEqual(self.syncer().plan([self.source_dir]), [])
+        generate_file_hash.assert_not_called()
+
+    def test_conflict_hashed(self):
+        self.syncer().sync([self.source_dir])
+        # A different photo with the same name, taken on the same day
+        (self.test_dir / 'other').mkdir()
+        other = self.write(self.test_dir / 'other' / 'IMG_0001.jpg', b'ONE!', mtime=1_700_000_100)
+
+        copies = self.syncer().plan([self.test_dir / 'other'])
+        self.assertEqual(len(copies), 1)
+        src, dest = copies[0]
+        self.assertEqual(src, other)
+        self.assertEqual(dest.name, 'IMG_0001-1.jpg')
+
+    def test_same_content_not_copied_twice(self):
+        # The same photo, with a different modification time
+        (self.test_dir / 'other').mkdir()
+        self.write(self.test_dir / 'other' / 'IMG_0001.jpg', b'one', mtime=1_700_000_100)
+        self.syncer().sync([self.source_dir])
+
+        copies = self.syncer().plan([self.test_dir / 'other'])
+        self.assertEqual(copies, [])
+
+    def test_target_inside_source_not_scanned(self):
+        self.target_dir = self.source_dir / 'target'
+        self.target_dir.mkdir()
+        self.syncer().sync([self.source_dir])
+
+        copies = self.syncer().plan([self.source_dir])
+        self.assertEqual(copies, [])
+
+    def test_failed_copy_does_not_stop_sync(self):
+        syncer = self.syncer()
+        copy_with_shutil = syncer.copy_with_shutil
+        def copy(src, dest):
+            if src.name == 'IMG_0002.JPG':
+                raise PermissionError('denied')
+            return copy_with_shutil(src, dest)
+        syncer.copy_with_rsync = copy
+
+        syncer.sync([self.source_dir])
+        copied = {path.name for path in self.target_dir.rglob('*.*') if path.name != MANIFEST_NAME}
+        self.assertEqual(copied, {'IMG_0001.jpg', 'IMG_0003.jpg'})
+
+if __name__ == '__main__':
+    unittest.main()
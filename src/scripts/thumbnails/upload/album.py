@@ -0,0 +1,127 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+    Add uploaded assets to an album in batches, instead of one request per asset.
+
+    Asset ids are collected as uploads succeed, and added to the album in bulk when a directory finishes, or every
+    batch_size assets. Files uploaded by the immich CLI are queued by their checksum instead, and their asset ids are
+    found with a single bulk upload check before they are added.
+
+    Every asset added is recorded in the status database, so a resumed run never adds the same asset twice.
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    album.py                                                                                             *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+from __future__ import annotations
+import logging
+import threading
+import requests
+from scripts.thumbnails.upload.client import ImmichClient
+from scripts.thumbnails.upload.meta import ALBUM_BATCH_SIZE
+from scripts.thumbnails.upload.status import AlbumMembership
+
+logger = logging.getLogger(__name__)
+
+class AlbumBatcher:
+    """
+    Collect assets for an album, and add them in bulk.
+
+    add() and add_checksum() are safe to call from upload workers. flush() sends everything collected so far.
+    """
+    def __init__(self, client : ImmichClient, album : str, batch_size : int = ALBUM_BATCH_SIZE):
+        self.client = client
+        self.album = album
+        self.batch_size = batch_size
+        self._asset_ids : list[str] = []
+        self._checksums : list[str] = []
+        self._lock = threading.Lock()
+        # Only one flush talks to Immich at a time
+        self._flush_lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._asset_ids) + len(self._checksums)
+
+    def add(self, asset_id : str) -> None:
+        """
+        Queue an asset to be added to the album.
+        """
+        with self._lock:
+            self._asset_ids.append(asset_id)
+        self._flush_if_full()
+
+    def add_checksum(self, checksum : str) -> None:
+        """
+        Queue an asset to be added to the album, by the SHA-1 checksum of its file, when its id is not known.
+        """
+        with self._lock:
+            self._checksums.append(checksum)
+        self._flush_if_full()
+
+    def _flush_if_full(self) -> None:
+        # Workers don't wait for a flush which is already running
+        if self.pending >= self.batch_size and not self._flush_lock.locked():
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Add every queued asset to the album, skipping assets which were added by an earlier run.
+
+        If Immich can't be reached, the assets stay queued for the next flush.
+
+        Returns:
+            int: The number of assets added.
+        """
+        with self._flush_lock:
+            with self._lock:
+                asset_ids, self._asset_ids = self._asset_ids, []
+                checksums, self._checksums = self._checksums, []
+
+            if not asset_ids and not checksums:
+                return 0
+
+            try:
+                if checksums:
+                    # Immich rejects the checksums of assets it has as duplicates, and returns their ids
+                    results = self.client.bulk_upload_check({str(i): checksum for i, checksum in enumerate(checksums)})
+                    asset_ids.extend(result.asset_id for result in results.values() if result.asset_id)
+                    checksums = []
+
+                asset_ids = list(dict.fromkeys(asset_ids))
+                known = AlbumMembership.get_members(self.album, asset_ids)
+                new_ids = [asset_id for asset_id in asset_ids if asset_id not in known]
+                for start in range(0, len(new_ids), self.batch_size):
+                    batch = new_ids[start:start + self.batch_size]
+                    self.client.add_to_album(self.album, batch)
+                    AlbumMembership.save_many(self.album, batch)
+                    # Don't add this batch again, if a later one fails
+                    added = set(batch)
+                    asset_ids = [asset_id for asset_id in asset_ids if asset_id not in added]
+            except requests.RequestException as e:
+                logger.error('Failed to add %d assets to album %s, will retry: %s', len(asset_ids) + len(checksums), self.album, e)
+                with self._lock:
+                    self._asset_ids.extend(asset_ids)
+                    self._checksums.extend(checksums)
+                return 0
+
+            if new_ids:
+                logger.debug('Added %d assets to album %s', len(new_ids), self.album)
+            return len(new_ids)
@@ -0,0 +1,281 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+    Benchmark the uploader against a local fake Immich server, instead of a real library.
+
+    A synthetic directory tree is generated in a temporary directory, and uploaded with the http backend to a
+    FakeImmichServer, which can emulate latency, limited bandwidth, server errors and files Immich already has. The
+    status database is also temporary, so real upload records are never touched.
+
+    Example:
+        >>> python -m scripts.thumbnails.upload.bench --files 2000 --latency 0.02 --bandwidth 10MB
+        # Fail (for CI) if throughput regresses
+        >>> python -m scripts.thumbnails.upload.bench --min-files-per-second 50 --json
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    bench.py                                                                                             *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+from __future__ import annotations
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from pydantic import BaseModel, Field, PrivateAttr
+from scripts.thumbnails.upload.concurrency import DEFAULT_MAX_CONCURRENCY
+from scripts.thumbnails.upload.fake_immich import FakeImmichServer
+from scripts.thumbnails.upload.progressive import ImmichProgressiveUploader
+from scripts.thumbnails.upload.status import DbManager
+from scripts.thumbnails.upload.throughput import format_snapshot
+
+logger = logging.getLogger(__name__)
+
+class BenchmarkUploader(ImmichProgressiveUploader):
+    """
+    An uploader which measures how long its workers spend uploading.
+    """
+    _busy_seconds : float = PrivateAttr(default=0.0)
+    _busy_lock : threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def busy_seconds(self) -> float:
+        return self._busy_seconds
+
+    def upload_file_threadsafe(self, image_path : Path, *, filtered : bool = False):
+        started = time.monotonic()
+        try:
+            return super().upload_file_threadsafe(image_path, filtered=filtered)
+        finally:
+            with self._busy_lock:
+                self._busy_seconds += time.monotonic() - started
+
+class BenchmarkResult(BaseModel):
+    files : int
+    total_bytes : int
+    # Bytes actually sent, without the files Immich already had
+    bytes_sent : int
+    seconds : float
+    uploaded : int
+    duplicates : int
+    errors : int
+    errors_injected : int
+    max_threads : int
+    busy_seconds : float
+    db_batches : int
+    db_write_seconds : float
+    db_max_write_seconds : float
+    # The uploader's ThroughputTracker.snapshot(), at the end of the run
+    throughput : dict[str, float | int | None] = Field(default_factory=dict)
+
+    @property
+    def files_per_second(self) -> float:
+        return self.files / self.seconds if self.seconds else 0
+
+    @property
+    def mb_per_second(self) -> float:
+        return self.total_bytes / 1024 / 1024 / self.seconds if self.seconds else 0
+
+    @property
+    def sent_mb_per_second(self) -> float:
+        return self.bytes_sent / 1024 / 1024 / self.seconds if self.seconds else 0
+
+    @property
+    def worker_utilization(self) -> float:
+        """
+        The fraction of the time that the workers were uploading, rather than waiting for work.
+        """
+        return self.busy_seconds / (self.seconds * self.max_threads) if self.seconds else 0
+
+    @property
+    def db_mean_write_ms(self) -> float:
+        return self.db_write_seconds * 1000 / self.db_batches if self.db_batches else 0
+
+    def to_dict(self) -> dict[str, float | int]:
+        return {
+            **self.model_dump(),
+            'files_per_second': round(self.files_per_second, 2),
+            'mb_per_second': round(self.mb_per_second, 2),
+            'sent_mb_per_second': round(self.sent_mb_per_second, 2),
+            'worker_utilization': round(self.worker_utilization, 3),
+            'db_mean_write_ms': round(self.db_mean_write_ms, 2),
+        }
+
+    def report(self) -> str:
+        return '\n'.join([
+            f'Files:        {self.files} in {self.seconds:.2f}s ({self.uploaded} uploaded, {self.duplicates} duplicates, {self.errors} errors)',
+            f'Throughput:   {self.files_per_second:.1f} files/s, {self.mb_per_second:.2f} MB/s ({self.sent_mb_per_second:.2f} MB/s sent)',
+            f'Workers:      {self.worker_utilization:.0%} utilized ({self.busy_seconds / self.seconds if self.seconds else 0:.1f} of {self.max_threads} busy on average)',
+            f'Tracked:      {format_snapshot(self.throughput) if self.throughput else "nothing"}',
+            f'DB writes:    {self.db_batches} batches, {self.db_mean_write_ms:.1f}ms mean, {self.db_max_write_seconds * 1000:.1f}ms max',
+            f'Injected:     {self.errors_injected} server errors',
+        ])
+
+def create_tree(root : Path, directories : int, files_per_directory : int, file_size : int, *, seed : int = 0) -> tuple[int, int]:
+    """
+    Create a directory tree of photos with random contents, so every file is unique.
+
+    File sizes vary between half and one and a half times file_size.
+
+    Returns:
+        tuple[int, int]: The number of files, and their total size in bytes.
+    """
+    rng = random.Random(seed)
+    total = 0
+    for d in range(directories):
+        directory = root / f'{2000 + d // 12:04d}' / f'{d % 12 + 1:02d}'
+        directory.mkdir(parents=True, exist_ok=True)
+        for f in range(files_per_directory):
+            size = rng.randint(file_size // 2, file_size * 3 // 2)
+            path = directory / f'IMG_{d:04d}_{f:04d}.jpg'
+            path.write_bytes(rng.randbytes(size))
+            mtime = rng.randint(946_684_800, 1_700_000_000)
+            os.utime(path, (mtime, mtime))
+            total += size
+    return directories * files_per_directory, total
+
+def run_benchmark(
+    directories : int = 10,
+    files_per_directory : int = 100,
+    file_size : int = 256 * 1024,
+    *,
+    latency : float = 0,
+    bandwidth : int = 0,
+    error_rate : float = 0,
+    duplicate_ratio : float = 0,
+    max_threads : int = DEFAULT_MAX_CONCURRENCY,
+    min_threads : int = 1,
+    adaptive : bool = True,
+    precheck : bool = True,
+    seed : int = 0,
+) -> BenchmarkResult:
+    """
+    Upload a synthetic tree to a fake Immich server, and measure the upload.
+    """
+    original_sessionmaker = DbManager._sessionmaker
+    with tempfile.TemporaryDirectory(prefix='immich-bench-') as temp_dir:
+        root = Path(temp_dir) / 'photos'
+        files, total_bytes = create_tree(root, directories, files_per_directory, file_size, seed=seed)
+        logger.info('Created %d files (%.1f MB) in %d directories', files, total_bytes / 1024 / 1024, directories)
+
+        DbManager.initialize_db(Path(temp_dir) / 'status.db')
+        server = FakeImmichServer(latency=latency, bandwidth=bandwidth, error_rate=error_rate, duplicate_ratio=duplicate_ratio, seed=seed)
+        try:
+            with server:
+                uploader = BenchmarkUploader(
+                    url=server.url,
+                    api_key=server.api_key,
+                    directory=root,
+                    backend='http',
+                    max_threads=max_threads,
+                    min_threads=min_threads,
+                    adaptive=adaptive,
+                    precheck=precheck,
+                    large_file_size=0,
+                    retry_delay=0.1,
+                )
+                started = time.monotonic()
+                uploader.upload()
+                uploader.status_store.close()
+                seconds = time.monotonic() - started
+                uploader.client.close()
+        finally:
+            DbManager._sessionmaker = original_sessionmaker
+
+        store = uploader.status_store
+        return BenchmarkResult(
+            files=files,
+            total_bytes=total_bytes,
+            bytes_sent=uploader.throughput.total,
+            seconds=seconds,
+            uploaded=uploader.files_uploaded,
+            duplicates=uploader.files_duplicated,
+            errors=uploader.errors,
+            errors_injected=server.errors_injected,
+            max_threads=max_threads,
+            busy_seconds=uploader.busy_seconds,
+            db_batches=store.batches_written,
+            db_write_seconds=store.write_seconds,
+            db_max_write_seconds=store.max_write_seconds,
+            throughput=uploader.throughput.snapshot(),
+        )
+
+def parse_size(value : str) -> int:
+    """
+    Parse a size in bytes, with an optional KB, MB or GB suffix.
+    """
+    value = value.strip().upper()
+    for suffix, multiplier in (('GB', 1024 ** 3), ('MB', 1024 ** 2), ('KB', 1024), ('B', 1)):
+        if value.endswith(suffix):
+            return int(float(value[:-len(suffix)]) * multiplier)
+    return int(value)
+
+def main():
+    """
+    Called when the script is run from the command line. Runs one benchmark, and reports the results.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the uploader against a local fake Immich server.")
+    parser.add_argument('--directories', type=int, default=10, help='Number of directories to generate')
+    parser.add_argument('--files', type=int, default=1000, help='Total number of files to generate')
+    parser.add_argument('--file-size', type=parse_size, default='256KB', help='Average file size, e.g. 256KB or 4MB')
+    parser.add_argument('--latency', type=float, default=0, help='Seconds added to every request')
+    parser.add_argument('--bandwidth', type=parse_size, default='0', help='Bytes per second the server receives, e.g. 10MB (default: unlimited)')
+    parser.add_argument('--error-rate', type=float, default=0, help='Fraction of uploads which fail with a 503')
+    parser.add_argument('--duplicate-ratio', type=float, default=0, help='Fraction of files which Immich already has')
+    parser.add_argument('--max-threads', type=int, default=DEFAULT_MAX_CONCURRENCY, help='Maximum number of concurrent uploads')
+    parser.add_argument('--min-threads', type=int, default=1, help='Minimum number of concurrent uploads when adaptive')
+    parser.add_argument('--adaptive', action=argparse.BooleanOptionalAction, default=True, help='Tune the number of concurrent uploads to the link')
+    parser.add_argument('--no-precheck', dest='precheck', action='store_false', help="Don't ask the server which files it already has")
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the generated files and injected errors')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    parser.add_argument('--min-files-per-second', type=float, default=0, help='Exit with an error if throughput is lower')
+    parser.add_argument('--min-mb-per-second', type=float, default=0, help='Exit with an error if throughput is lower')
+    args = parser.parse_args()
+
+    result = run_benchmark(
+        directories=args.directories,
+        files_per_directory=max(1, args.files // max(1, args.directories)),
+        file_size=args.file_size,
+        latency=args.latency,
+        bandwidth=args.bandwidth,
+        error_rate=args.error_rate,
+        duplicate_ratio=args.duplicate_ratio,
+        max_threads=args.max_threads,
+        min_threads=args.min_threads,
+        adaptive=args.adaptive,
+        precheck=args.precheck,
+        seed=args.seed,
+    )
+
+    print(json.dumps(result.to_dict(), indent=2) if args.json else result.report())
+
+    if result.files_per_second < args.min_files_per_second:
+        logger.error('Throughput regressed: %.1f files/s is below %.1f files/s', result.files_per_second, args.min_files_per_second)
+        sys.exit(1)
+    if result.mb_per_second < args.min_mb_per_second:
+        logger.error('Throughput regressed: %.2f MB/s is below %.2f MB/s', result.mb_per_second, args.min_mb_per_second)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+    The command line entry point of the uploader.
+
+    Arguments are parsed before anything heavy is imported, and the status database is only opened once the upload
+    starts, so --help (and a mistyped argument) returns immediately. Run with `python -X importtime` to see what
+    startup costs.
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    cli.py                                                                                               *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+from __future__ import annotations
+import argparse
+import logging
+import os
+import sys
+from pathlib import Path
+from dotenv import load_dotenv
+
+# Only lightweight modules (constants, exceptions and the standard library) are imported here
+from scripts import setup_logging
+from scripts.exceptions import AppError
+from scripts.thumbnails.upload.exceptions import AuthenticationError
+from scripts.thumbnails.upload.concurrency import DEFAULT_MAX_CONCURRENCY
+from scripts.thumbnails.upload.meta import DEFAULT_DB_PATH, DEFAULT_PREVIEW_CACHE
+from scripts.thumbnails.upload.schedule import DEFAULT_LOOKAHEAD, UPLOAD_ORDERS
+from scripts.thumbnails.upload.throughput import format_snapshot
+
+logger = setup_logging()
+
+class ArgNamespace(argparse.Namespace):
+    """
+    A custom namespace class for argparse.
+    """
+    url: str
+    api_key: str
+    allow_extension: list[str]
+    ignore_extension: list[str]
+    ignore_path: list[str]
+    max_threads: int
+    verbose: bool
+    templates: list[str]
+    sd: bool
+    use_db: bool
+    db_path : str | Path
+    import_path: str
+    album : str
+    skip : bool
+    move_after_upload : str | None = None
+    files_from : str | None = None
+    manifest : str | None = None
+    backend : str = 'cli'
+    precheck : bool = True
+    adaptive : bool = True
+    min_threads : int = 1
+    previews : str = 'never'
+    preview_size : int = 2560
+    preview_cache : str | None = None
+    order : list[str] | None = None
+    lookahead : int = DEFAULT_LOOKAHEAD
+    pairs : str = 'both'
+    workers : int = 1
+    shard : int | None = None
+    
+def validate_args(args: ArgNamespace) -> bool:
+    """
+    Validate the arguments passed to the script.
+
+    Args:
+        args (argparse.Namespace): The arguments passed to the script.
+
+    Returns:
+        bool: True if the arguments are valid, False otherwise
+    """
+    if not args.url or not args.api_key:
+        logger.error("IMMICH_INSTANCE_URL and IMMICH_API_KEY must be set.")
+        return False
+
+    if not args.sd and not args.import_path:
+        logger.error("IMAGEINN_THUMBNAILS_DIR must be set if not uploading from an SD card.")
+        return False
+
+    if args.workers < 1:
+        logger.error("--workers must be at least 1.")
+        return False
+
+    if args.workers > 1 and (args.sd or args.files_from or args.manifest or args.use_db):
+        logger.error("--workers can only be used when uploading a directory.")
+        return False
+
+    if args.shard is not None and not 0 <= args.shard < args.workers:
+        logger.error("--shard must be between 0 and --workers - 1.")
+        return False
+
+    return True
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the argument parser. Defaults are read from the environment, so call load_dotenv() first.
+    """
+    parser = argparse.ArgumentParser(description="Upload files to Immich.")
+    parser.add_argument("--url", help="Immich URL (default: IMMICH_LOCAL_URL on the home network, or else IMMICH_INSTANCE_URL)", default=None)
+    parser.add_argument("--api-key", help="Immich API key", default=os.getenv("IMMICH_API_KEY"))
+    parser.add_argument('--allow-extension', '-e', help="Allow only files with these extensions", nargs='+')
+    parser.add_argument("--ignore-extension", help="Ignore files with these extensions", nargs='+')
+    parser.add_argument('--ignore-path', help="Ignore files with these paths", nargs='+')
+    parser.add_argument('--max-threads', type=int, default=0, help=f"Maximum number of threads for concurrent uploads (default: {DEFAULT_MAX_CONCURRENCY} when adaptive)")
+    parser.add_argument('--min-threads', type=int, default=1, help="Minimum number of concurrent uploads when adaptive")
+    parser.add_argument('--adaptive', action=argparse.BooleanOptionalAction, default=True, help="Tune the number of concurrent uploads to the network, between --min-threads and --max-threads")
+    parser.add_argument('--verbose', '-v', action='store_true', help="Verbose output")
+    parser.add_argument('--templates', '-T', help="File templates to match", nargs='+')
+    parser.add_argument('--sd', help="Upload files from an SD card", action='store_true')
+    parser.add_argument('--use_db', action='store_true', help='Use the SQLite database to retrieve upload targets')
+    parser.add_argument('--db-path', help='Path to the SQLite database', default=DEFAULT_DB_PATH)
+    parser.add_argument('--album', '-A', help='Immich album to upload files to')
+    parser.add_argument('--skip', help='Skip assets that were previously uploaded.', action='store_true')
+    parser.add_argument('--move-after-upload', help='Move files to this directory after uploading', default=None)
+    parser.add_argument('--files-from', help='Upload only the files in this NUL-delimited list (e.g. from "find -print0"), instead of searching import_path. Use "-" for stdin.', default=None)
+    parser.add_argument('--manifest', help='Upload only the files recorded in this manifest by "organize --manifest", reusing their digests', default=None)
+    parser.add_argument('--backend', choices=['cli', 'http'], default=os.getenv('IMMICH_UPLOAD_BACKEND', 'cli'), help='Upload with the immich CLI (cli), or directly over the Immich API with pooled connections (http)')
+    parser.add_argument('--no-precheck', dest='precheck', action='store_false', help="Don't ask Immich which files it already has before uploading them")
+    parser.add_argument('--previews', choices=['never', 'remote', 'always'], default=os.getenv('IMMICH_PREVIEWS', 'never'), help='Upload reduced previews of large photos in place of the originals: never, only when away from the home network (remote), or always')
+    parser.add_argument('--preview-size', type=int, default=2560, help='The longest edge of a preview, in pixels')
+    parser.add_argument('--preview-cache', default=os.getenv('IMMICH_PREVIEW_CACHE', str(DEFAULT_PREVIEW_CACHE)), help='Directory to cache previews in')
+    parser.add_argument('--order', choices=UPLOAD_ORDERS, nargs='+', default=[], help='Upload files in this order: newest first, smallest first, or one directory at a time in turn (round-robin). Later orders break ties.')
+    parser.add_argument('--lookahead', type=int, default=DEFAULT_LOOKAHEAD, help='The number of discovered files to choose the next upload from, when --order is set')
+    parser.add_argument('--pairs', choices=['both', 'jpeg', 'raw', 'raw-local'], default=os.getenv('IMMICH_PAIRS', 'both'), help='Which files of each RAW+JPEG pair to upload: both, only the JPEG, only the RAW, or the RAW only on the home network (raw-local). Skipped files are uploaded by a later run that includes them.')
+    parser.add_argument('--workers', type=int, default=1, help='Upload with this many processes, each uploading a different set of directories. Each process runs its own pool of upload threads.')
+    # Set on each process started by --workers
+    parser.add_argument('--shard', type=int, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("import_path", nargs='?', default=os.getenv("IMMICH_THUMBNAILS_DIR", '.'), help="Path to import files from")
+    return parser
+
+def main():
+    """
+    Called when the script is run from the command line. Parses arguments and uploads files to Immich.
+    """
+    try:
+        load_dotenv()
+        args = build_parser().parse_args(namespace=ArgNamespace())
+
+        if args.verbose:
+            logger.setLevel(logging.DEBUG)
+
+        # Deferred until the arguments are parsed, because these load pydantic, sqlalchemy and requests
+        from scripts.thumbnails.upload.preview import PreviewPolicy
+        from scripts.thumbnails.upload.progressive import ImmichProgressiveUploader
+        from scripts.thumbnails.upload.template import PixelFiles
+
+        # Detecting the network runs a subprocess, so it is only done once it is needed
+        home_network = ImmichProgressiveUploader.is_home_network()
+        if not args.url:
+            args.url = os.getenv("IMMICH_LOCAL_URL") if home_network else os.getenv("IMMICH_INSTANCE_URL")
+
+        if not validate_args(args):
+            sys.exit(1)
+
+        if args.workers > 1 and args.shard is None:
+            from scripts.thumbnails.upload.shard import run_workers
+            sys.exit(run_workers(args.workers, sys.argv[1:]))
+
+        templates = []
+        if args.templates:
+            template : str
+            for template in args.templates:
+                match template.lower():
+                    case 'pixel':
+                        templates.append(PixelFiles)
+                    case _:
+                        logger.error("Unknown template: %s. See --help for available templates.", template)
+                        sys.exit(1)
+
+        previews = None
+        if args.previews == 'always' or (args.previews == 'remote' and not home_network):
+            previews = PreviewPolicy(max_dimension=args.preview_size)
+
+        # raw-local sends only the JPEG when away from home, and leaves the RAW for the next run on the home network
+        prefer_pair = {'jpeg': 'jpeg', 'raw': 'raw', 'raw-local': None if home_network else 'jpeg'}.get(args.pairs)
+
+        immich = ImmichProgressiveUploader(
+            url=args.url,
+            api_key=args.api_key,
+            directory=args.import_path,
+            ignore_extensions=args.ignore_extension,
+            ignore_paths=args.ignore_path,
+            extensions=args.allow_extension,
+            templates=templates,
+            use_db=args.use_db,
+            db_path=args.db_path,
+            album=args.album,
+            skip=args.skip,
+            max_threads=args.max_threads or (DEFAULT_MAX_CONCURRENCY if args.adaptive else 0),
+            min_threads=args.min_threads,
+            adaptive=args.adaptive,
+            # Cloudflare prevents uploads over 100MB. 
+            # ...On the local network, disable skipping large files.
+            # ...Everywhere else, use the default large file size of 100MB.
+            # ...The http backend uploads larger files in chunks, instead of skipping them.
+            large_file_size = 0 if home_network else (1024 * 1024 * 100),
+            move_after_upload=args.move_after_upload,
+            backend=args.backend,
+            precheck=args.precheck,
+            previews=previews,
+            preview_cache=args.preview_cache,
+            order=args.order,
+            lookahead=args.lookahead,
+            prefer_pair=prefer_pair,
+            shard=args.shard or 0,
+            shards=args.workers,
+        )
+
+        try:
+            if args.sd:
+                immich.handle_sd_card()
+            elif args.files_from:
+                immich.upload_listed(args.files_from)
+            elif args.manifest:
+                immich.upload_manifest(args.manifest)
+            else:
+                immich.run()
+
+        except AuthenticationError:
+            logger.error("Authentication failed. Check your API key and URL.")
+            sys.exit(1)
+        except (FileNotFoundError, FileExistsError, AppError) as e:
+            logger.error('Exiting. %s', e)
+            raise
+        finally:
+            immich.flush_db()
+            immich.flush_album()
+            immich.close_moves()
+            immich.close_previews()
+            immich.close_leases()
+            # Last, so any status updates made while closing the rest are written too
+            immich.status_store.close()
+            logger.info("Stats: %d uploaded, %d previews, %d skipped, %d duplicates, %d paired, %d errors",
+                immich.files_uploaded,
+                immich.files_previewed,
+                immich.files_skipped,
+                immich.files_duplicated,
+                immich.files_paired,
+                immich.errors
+            )
+            logger.info("Throughput: %s", format_snapshot(immich.throughput.snapshot()))
+    except KeyboardInterrupt:
+        logger.info("Upload cancelled by user.")
+
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main()
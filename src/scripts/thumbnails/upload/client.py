@@ -0,0 +1,514 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+    A native client for the Immich asset API.
+
+    Files are uploaded from the worker threads over a pooled, keep-alive HTTP session, instead of starting the
+    immich CLI once per file. Request bodies are streamed from disk, and results are read from the status code and
+    JSON response, instead of from the CLI's output.
+
+    Files too large for a single request (e.g. behind Cloudflare, which rejects requests over 100MB) are uploaded in
+    chunks, with the tus resumable upload protocol. An interrupted upload continues from the last chunk the server
+    received, instead of starting over.
+
+    Example:
+        >>> client = ImmichClient(url='https://photos.example.com', api_key='...', max_connections=4)
+        >>> client.upload_asset(Path('/mnt/i/Phone/2024/2024-10-19/PXL_20241019_101010.jpg'))
+        UploadResult(status=<StatusOptions.UPLOADED: 'uploaded'>, asset_id='...')
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    client.py                                                                                            *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+from __future__ import annotations
+import base64
+import datetime
+import logging
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, NamedTuple
+from urllib.parse import urljoin
+import requests
+from requests.adapters import HTTPAdapter
+from pydantic import BaseModel, ConfigDict, PrivateAttr, field_validator
+from scripts.thumbnails.upload.exceptions import AuthenticationError, UploadError
+from scripts.thumbnails.upload.status import StatusOptions
+
+logger = logging.getLogger(__name__)
+
+DEVICE_ID = 'imageinn'
+
+# Size of each read from disk while streaming a request body
+CHUNK_SIZE = 1024 * 1024
+
+# Status codes which are worth retrying
+RETRY_STATUS_CODES = frozenset([408, 429, 500, 502, 503, 504])
+
+# The maximum number of assets sent in one bulk upload check
+BULK_CHECK_BATCH_SIZE = 500
+
+# The version of the tus protocol used for chunked uploads
+TUS_VERSION = '1.0.0'
+
+# The size of each chunk of a chunked upload. Well under Cloudflare's 100MB request limit.
+CHUNKED_UPLOAD_SIZE = 50 * 1024 * 1024
+
+class UploadResult(NamedTuple):
+    status : StatusOptions
+    asset_id : str | None = None
+
+class BulkCheckResult(NamedTuple):
+    # 'accept' or 'reject'
+    action : str
+    # For rejected assets, 'duplicate' or 'unsupported-format'
+    reason : str | None = None
+    asset_id : str | None = None
+
+    @property
+    def is_duplicate(self) -> bool:
+        return self.action == 'reject' and self.reason == 'duplicate'
+
+class MultipartStream:
+    """
+    A multipart/form-data body which streams a single file from disk.
+
+    requests sends file-like objects with a known length as-is, so the file is never read into memory.
+    """
+    def __init__(self, fields : dict[str, str], file_field : str, file_path : Path, content_type : str = 'application/octet-stream'):
+        self.boundary = uuid.uuid4().hex
+        self.file_path = file_path
+
+        preamble = []
+        for name, value in fields.items():
+            preamble.append(f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n')
+        filename = file_path.name.replace('"', '%22')
+        preamble.append(
+            f'--{self.boundary}\r\nContent-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'
+        )
+        self._preamble = ''.join(preamble).encode('utf-8')
+        self._epilogue = f'\r\n--{self.boundary}--\r\n'.encode('utf-8')
+        self._file_size = file_path.stat().st_size
+        self._file : BinaryIO | None = None
+        self._position = 0
+        self.bytes_sent = 0
+
+    @property
+    def content_type(self) -> str:
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    def __len__(self) -> int:
+        return len(self._preamble) + self._file_size + len(self._epilogue)
+
+    def __enter__(self) -> MultipartStream:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def read(self, size : int = -1) -> bytes:
+        if size is None or size < 0:
+            size = len(self)
+
+        buffer = bytearray()
+        while len(buffer) < size:
+            if self._position < len(self._preamble):
+                chunk = self._preamble[self._position:self._position + size - len(buffer)]
+            elif self._position < len(self._preamble) + self._file_size:
+                if self._file is None:
+                    self._file = open(self.file_path, 'rb')
+                chunk = self._file.read(min(size - len(buffer), CHUNK_SIZE))
+                if not chunk:
+                    raise UploadError(f'File changed while uploading: {self.file_path}')
+            else:
+                offset = self._position - len(self._preamble) - self._file_size
+                chunk = self._epilogue[offset:offset + size - len(buffer)]
+                if not chunk:
+                    break
+
+            buffer.extend(chunk)
+            self._position += len(chunk)
+
+        self.bytes_sent += len(buffer)
+        return bytes(buffer)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+class FileSlice:
+    """
+    A request body which streams length bytes of a file, starting at offset.
+    """
+    def __init__(self, file : BinaryIO, offset : int, length : int):
+        self._file = file
+        self._remaining = length
+        self._length = length
+        file.seek(offset)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def read(self, size : int = -1) -> bytes:
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        chunk = self._file.read(min(size, CHUNK_SIZE))
+        self._remaining -= len(chunk)
+        return chunk
+
+class ImmichClient(BaseModel):
+    """
+    A thread-safe client for the Immich API. All threads share one pool of keep-alive connections.
+    """
+    url : str
+    api_key : str
+    max_connections : int = 4
+    timeout : float = 60
+    # The tus endpoint for chunked uploads, relative to /api
+    chunked_endpoint : str = 'upload'
+    chunk_size : int = CHUNKED_UPLOAD_SIZE
+
+    _session : requests.Session | None = PrivateAttr(default=None)
+    _session_lock : threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _album_ids : dict[str, str] = PrivateAttr(default_factory=dict)
+    _album_lock : threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    @field_validator('url', mode='before')
+    def validate_url(cls, value):
+        # Accept the url with or without the /api suffix, as the immich CLI does
+        value = str(value).rstrip('/')
+        if value.endswith('/api'):
+            value = value[:-4]
+        return value
+
+    @property
+    def session(self) -> requests.Session:
+        with self._session_lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_connections, pool_block=True)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                session.headers.update({'x-api-key': self.api_key, 'Accept': 'application/json'})
+                self._session = session
+            return self._session
+
+    def close(self) -> None:
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def request(self, method : str, endpoint : str, **kwargs) -> requests.Response:
+        """
+        Send a request to the Immich API.
+
+        Raises:
+            AuthenticationError: If the API key is rejected.
+            requests.RequestException: If the server could not be reached.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        url = self.get_url(endpoint)
+        response = self.session.request(method, url, **kwargs)
+        if response.status_code in (401, 403):
+            raise AuthenticationError(f'Immich rejected the API key ({response.status_code}): {response.text[:200]}')
+        return response
+
+    def get_url(self, endpoint : str) -> str:
+        """
+        Get the full url of an API endpoint. Absolute urls (such as the location of a chunked upload) are kept as-is.
+        """
+        if endpoint.startswith(('http://', 'https://')):
+            return endpoint
+        return f'{self.url}/api/{endpoint.lstrip("/")}'
+
+    def authenticate(self) -> dict[str, Any]:
+        """
+        Check that the API key is valid.
+
+        Returns:
+            The user that owns the API key.
+
+        Raises:
+            AuthenticationError: If authentication fails.
+        """
+        try:
+            response = self.request('GET', 'users/me')
+        except requests.RequestException as e:
+            raise AuthenticationError(f'Unable to reach Immich at {self.url}: {e}') from e
+
+        if not response.ok:
+            raise AuthenticationError(f'Authentication failed ({response.status_code}): {response.text[:200]}')
+        return response.json()
+
+    @classmethod
+    def get_upload_timeout(cls, file_size : int) -> float:
+        # A minimum of 60 seconds, plus 10 seconds per MB (the same as the CLI backend)
+        return 60 + file_size * 10 / (1024 * 1024)
+
+    def upload_asset(self, file_path : Path, checksum : str | None = None) -> UploadResult:
+        """
+        Upload a single file.
+
+        Args:
+            file_path: The file to upload.
+            checksum: The SHA-1 digest of the file, if known. Immich uses it to reject duplicates before the body is sent.
+
+        Returns:
+            UploadResult: UPLOADED or DUPLICATE, and the id of the asset.
+
+        Raises:
+            AuthenticationError: If the API key is rejected.
+            UploadError: If Immich rejected the file. retryable is set if the request may succeed later.
+            requests.RequestException: If the connection failed.
+        """
+        stat = file_path.stat()
+        fields = self.get_asset_fields(file_path, stat)
+
+        headers = {}
+        if checksum:
+            headers['x-immich-checksum'] = checksum
+
+        with MultipartStream(fields, 'assetData', file_path) as body:
+            headers['Content-Type'] = body.content_type
+            response = self.request('POST', 'assets', data=body, headers=headers, timeout=(10, self.get_upload_timeout(stat.st_size)))
+
+        if response.status_code in (200, 201):
+            data = response.json()
+            # Newer servers return a status, older servers return a duplicate flag
+            if data.get('status') == 'duplicate' or data.get('duplicate'):
+                return UploadResult(StatusOptions.DUPLICATE, data.get('id'))
+            return UploadResult(StatusOptions.UPLOADED, data.get('id'))
+
+        raise UploadError(
+            f'Upload of {file_path.name} failed ({response.status_code}): {response.text[:200]}',
+            status_code=response.status_code,
+            retryable=response.status_code in RETRY_STATUS_CODES,
+        )
+
+    def get_asset_fields(self, file_path : Path, stat : os.stat_result) -> dict[str, str]:
+        """
+        Get the fields Immich requires with every asset, which identify it and its dates.
+        """
+        modified = datetime.datetime.fromtimestamp(stat.st_mtime, tz=datetime.timezone.utc).isoformat()
+        return {
+            'deviceAssetId': f'{file_path.name}-{stat.st_size}'.replace(' ', ''),
+            'deviceId': DEVICE_ID,
+            'fileCreatedAt': modified,
+            'fileModifiedAt': modified,
+            'isFavorite': 'false',
+            'filename': file_path.name,
+        }
+
+    def create_chunked_upload(self, file_path : Path, checksum : str | None = None) -> str:
+        """
+        Start a chunked upload. No data is sent until upload_chunk is called.
+
+        Returns:
+            The url of the upload, which identifies it when sending chunks or resuming.
+
+        Raises:
+            AuthenticationError: If the API key is rejected.
+            UploadError: If the server refused to start the upload. A 404 means it does not support chunked uploads.
+            requests.RequestException: If the connection failed.
+        """
+        stat = file_path.stat()
+        fields = self.get_asset_fields(file_path, stat)
+        if checksum:
+            fields['checksum'] = checksum
+        metadata = ','.join(f'{key} {base64.b64encode(value.encode("utf-8")).decode("ascii")}' for key, value in fields.items())
+
+        response = self.request('POST', self.chunked_endpoint, headers={
+            'Tus-Resumable': TUS_VERSION,
+            'Upload-Length': str(stat.st_size),
+            'Upload-Metadata': metadata,
+        })
+        if response.status_code != 201 or not response.headers.get('Location'):
+            raise UploadError(
+                f'Unable to start a chunked upload of {file_path.name} ({response.status_code}): {response.text[:200]}',
+                status_code=response.status_code,
+                retryable=response.status_code in RETRY_STATUS_CODES,
+            )
+
+        # The location may be relative to the endpoint
+        return urljoin(self.get_url(self.chunked_endpoint), response.headers['Location'])
+
+    def get_chunked_upload_offset(self, upload_url : str) -> int | None:
+        """
+        Ask the server how much of a chunked upload it has received.
+
+        Returns:
+            The number of bytes received, or None if the server no longer knows about the upload.
+        """
+        response = self.request('HEAD', upload_url, headers={'Tus-Resumable': TUS_VERSION})
+        if response.status_code in (404, 410):
+            return None
+        if not response.ok or 'Upload-Offset' not in response.headers:
+            raise UploadError(
+                f'Unable to resume upload ({response.status_code})',
+                status_code=response.status_code,
+                retryable=response.status_code in RETRY_STATUS_CODES,
+            )
+        return int(response.headers['Upload-Offset'])
+
+    def upload_chunk(self, upload_url : str, file : BinaryIO, offset : int, length : int) -> requests.Response:
+        """
+        Send length bytes of a file, starting at offset.
+
+        Raises:
+            UploadError: If the server rejected the chunk. A 409 means the offset does not match what it received.
+        """
+        response = self.request('PATCH', upload_url, data=FileSlice(file, offset, length), headers={
+            'Tus-Resumable': TUS_VERSION,
+            'Upload-Offset': str(offset),
+            'Content-Type': 'application/offset+octet-stream',
+            'Content-Length': str(length),
+        }, timeout=(10, self.get_upload_timeout(length)))
+
+        if response.status_code not in (200, 201, 204):
+            raise UploadError(
+                f'Chunk at offset {offset} failed ({response.status_code}): {response.text[:200]}',
+                status_code=response.status_code,
+                # The server has a different offset. Resuming will ask it where to continue from.
+                retryable=response.status_code in RETRY_STATUS_CODES or response.status_code == 409,
+            )
+        return response
+
+    def upload_asset_chunked(
+        self,
+        file_path : Path,
+        checksum : str | None = None,
+        *,
+        upload_url : str | None = None,
+        on_progress : Callable[[str, int], None] | None = None,
+    ) -> UploadResult:
+        """
+        Upload a single file in chunks of chunk_size, resuming an earlier upload if its url is given.
+
+        Args:
+            file_path: The file to upload.
+            checksum: The SHA-1 digest of the file, if known.
+            upload_url: The url of an interrupted upload of the same file, to continue from where it stopped.
+            on_progress: Called with (upload_url, offset) once the upload is created, and after every chunk, so the
+                upload can be resumed later.
+
+        Returns:
+            UploadResult: UPLOADED or DUPLICATE, and the id of the asset if the server returned it.
+
+        Raises:
+            AuthenticationError: If the API key is rejected.
+            UploadError: If the server rejected the upload. retryable is set if the request may succeed later.
+            requests.RequestException: If the connection failed.
+        """
+        size = file_path.stat().st_size
+
+        offset = None
+        if upload_url:
+            offset = self.get_chunked_upload_offset(upload_url)
+            if offset is None:
+                logger.info('Server no longer has the upload of %s, restarting it', file_path.name)
+            else:
+                logger.info('Resuming upload of %s at %d of %d bytes', file_path.name, offset, size)
+
+        if offset is None:
+            upload_url = self.create_chunked_upload(file_path, checksum)
+            offset = 0
+            if on_progress:
+                on_progress(upload_url, offset)
+
+        response = None
+        with open(file_path, 'rb') as file:
+            while offset < size or response is None:
+                length = min(self.chunk_size, size - offset)
+                response = self.upload_chunk(upload_url, file, offset, length)
+                received = int(response.headers.get('Upload-Offset', offset + length))
+                if length and received <= offset:
+                    raise UploadError(f'Server did not accept the chunk of {file_path.name} at offset {offset}', retryable=True)
+                offset = received
+                if on_progress:
+                    on_progress(upload_url, offset)
+
+        # tus itself returns no content. Servers which create the asset when the last chunk arrives may return it.
+        data = response.json() if response.content else {}
+        if data.get('status') == 'duplicate' or data.get('duplicate'):
+            return UploadResult(StatusOptions.DUPLICATE, data.get('id'))
+        return UploadResult(StatusOptions.UPLOADED, data.get('id'))
+
+    def bulk_upload_check(self, checksums : dict[str, str]) -> dict[str, BulkCheckResult]:
+        """
+        Ask Immich which files it already has, by their SHA-1 checksums, without uploading them.
+
+        Args:
+            checksums: A dict of id -> SHA-1 checksum. The ids are any unique strings, and are returned in the results.
+                Large dicts are sent in batches of BULK_CHECK_BATCH_SIZE.
+
+        Returns:
+            A dict of id -> BulkCheckResult.
+
+        Raises:
+            AuthenticationError: If the API key is rejected.
+            requests.RequestException: If the server could not be reached, or does not support the bulk check.
+        """
+        items = list(checksums.items())
+        results : dict[str, BulkCheckResult] = {}
+        for start in range(0, len(items), BULK_CHECK_BATCH_SIZE):
+            batch = [{'id': asset_id, 'checksum': checksum} for asset_id, checksum in items[start:start + BULK_CHECK_BATCH_SIZE]]
+            response = self.request('POST', 'assets/bulk-upload-check', json={'assets': batch})
+            response.raise_for_status()
+            for result in response.json().get('results', []):
+                results[result['id']] = BulkCheckResult(result.get('action', 'accept'), result.get('reason'), result.get('assetId'))
+
+        return results
+
+    def get_album_id(self, album_name : str) -> str:
+        """
+        Find an album by name, creating it if it does not exist. The id is cached for the life of the client.
+        """
+        with self._album_lock:
+            if album_name in self._album_ids:
+                return self._album_ids[album_name]
+
+            response = self.request('GET', 'albums')
+            response.raise_for_status()
+            for album in response.json():
+                if album.get('albumName') == album_name:
+                    self._album_ids[album_name] = album['id']
+                    return album['id']
+
+            response = self.request('POST', 'albums', json={'albumName': album_name})
+            response.raise_for_status()
+            album_id = response.json()['id']
+            logger.info('Created album %s', album_name)
+            self._album_ids[album_name] = album_id
+            return album_id
+
+    def add_to_album(self, album_name : str, asset_ids : list[str]) -> None:
+        """
+        Add assets to an album (by name). Assets which are already in the album are ignored by Immich.
+        """
+        if not asset_ids:
+            return
+        album_id = self.get_album_id(album_name)
+        response = self.request('PUT', f'albums/{album_id}/assets', json={'ids': asset_ids})
+        response.raise_for_status()
@@ -0,0 +1,187 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+    Adapt the number of uploads in flight to the link they are running over.
+
+    On the home network, many parallel uploads saturate the LAN. Over the internet, the same number of uploads
+    compete for a thin uplink, and time out. The controller starts small, and every few seconds looks at the uploads
+    that finished since it last adjusted:
+
+    - If errors or timeouts are frequent, or latency has ballooned, it halves the limit (multiplicative decrease).
+    - If throughput improved since the last change, it adds one more upload (additive increase).
+    - Otherwise, it holds steady.
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    concurrency.py                                                                                       *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+from __future__ import annotations
+import logging
+import threading
+import time
+from typing import Callable, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+# The upper bound on uploads in flight when adapting, unless --max-threads is given
+DEFAULT_MAX_CONCURRENCY = 16
+
+# The minimum time between adjustments, in seconds
+WINDOW_SECONDS = 5.0
+
+# The minimum number of finished uploads between adjustments
+WINDOW_SAMPLES = 4
+
+# Back off if more than this fraction of uploads in a window failed or timed out
+ERROR_RATE_THRESHOLD = 0.1
+
+# Back off if the latency per MB is this many times the best seen so far
+LATENCY_THRESHOLD = 3.0
+
+# Keep increasing only while each increase improves throughput by at least this fraction
+THROUGHPUT_GAIN_THRESHOLD = 0.05
+
+class Sample(NamedTuple):
+    latency : float
+    bytes_sent : int
+    error : bool
+    timeout : bool
+
+class ConcurrencyController:
+    """
+    A resizable semaphore, sized by additive-increase/multiplicative-decrease from the results of recent uploads.
+
+    Call acquire() before starting an upload, release() when it finishes, and record() with its results.
+    If adaptive is False, the limit is fixed at maximum.
+
+    Throughput is measured from the bytes of the uploads which finished in each window, unless a throughput callable
+    is given (e.g. ThroughputTracker.rate), which smooths out windows where a few large files happen to finish.
+    """
+    def __init__(
+        self,
+        minimum : int = 1,
+        maximum : int = 8,
+        initial : int | None = None,
+        *,
+        adaptive : bool = True,
+        throughput : Callable[[], float] | None = None,
+    ):
+        if minimum < 1 or maximum < minimum:
+            raise ValueError(f"Invalid concurrency bounds: {minimum=}, {maximum=}")
+
+        self.minimum = minimum
+        self.maximum = maximum
+        self.adaptive = adaptive
+        self.throughput = throughput
+        if not adaptive:
+            initial = maximum
+        elif initial is None:
+            initial = min(maximum, max(minimum, 2))
+        self._limit = min(maximum, max(minimum, initial))
+
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._samples : list[Sample] = []
+        self._window_start = time.monotonic()
+        self._previous_throughput : float | None = None
+        self._best_latency_per_mb : float | None = None
+
+    @property
+    def limit(self) -> int:
+        with self._condition:
+            return self._limit
+
+    @property
+    def in_flight(self) -> int:
+        with self._condition:
+            return self._in_flight
+
+    def acquire(self) -> None:
+        """
+        Block until fewer than limit uploads are in flight.
+        """
+        with self._condition:
+            while self._in_flight >= self._limit:
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify()
+
+    def record(self, latency : float, bytes_sent : int = 0, *, error : bool = False, timeout : bool = False) -> None:
+        """
+        Record the result of one upload (or one failed attempt), and adjust the limit if a window has passed.
+
+        Args:
+            latency: The time the upload took, in seconds.
+            bytes_sent: The number of bytes uploaded. Duplicates and errors send none.
+            error: Whether the upload failed.
+            timeout: Whether the upload timed out, or its connection failed.
+        """
+        if not self.adaptive:
+            return
+
+        with self._condition:
+            self._samples.append(Sample(latency, bytes_sent, error, timeout))
+            elapsed = time.monotonic() - self._window_start
+            if elapsed < WINDOW_SECONDS or len(self._samples) < max(WINDOW_SAMPLES, self._limit):
+                return
+
+            self._adjust(elapsed)
+            self._samples = []
+            self._window_start = time.monotonic()
+            self._condition.notify_all()
+
+    def record_timeout(self, latency : float = 0) -> None:
+        self.record(latency, error=True, timeout=True)
+
+    def _adjust(self, elapsed : float) -> None:
+        samples = self._samples
+        failures = sum(1 for sample in samples if sample.error or sample.timeout)
+        error_rate = failures / len(samples)
+        bytes_sent = sum(sample.bytes_sent for sample in samples)
+        throughput = self.throughput() if self.throughput else bytes_sent / elapsed
+
+        latency_per_mb = None
+        if (sized := [sample for sample in samples if sample.bytes_sent and not sample.error]):
+            latency_per_mb = sum(sample.latency for sample in sized) / (sum(sample.bytes_sent for sample in sized) / 1024 / 1024)
+            if self._best_latency_per_mb is None or latency_per_mb < self._best_latency_per_mb:
+                self._best_latency_per_mb = latency_per_mb
+
+        previous = self._limit
+        if error_rate > ERROR_RATE_THRESHOLD:
+            reason = f'{error_rate:.0%} of uploads failed or timed out'
+            self._limit = max(self.minimum, self._limit // 2)
+        elif latency_per_mb and self._best_latency_per_mb and latency_per_mb > self._best_latency_per_mb * LATENCY_THRESHOLD:
+            reason = f'latency rose to {latency_per_mb:.1f}s/MB (best {self._best_latency_per_mb:.1f}s/MB)'
+            self._limit = max(self.minimum, self._limit // 2)
+        elif self._previous_throughput is None or throughput > self._previous_throughput * (1 + THROUGHPUT_GAIN_THRESHOLD):
+            reason = f'throughput is {throughput / 1024 / 1024:.2f} MB/s'
+            self._limit = min(self.maximum, self._limit + 1)
+        else:
+            reason = f'throughput stayed at {throughput / 1024 / 1024:.2f} MB/s'
+
+        self._previous_throughput = throughput
+
+        if self._limit != previous:
+            logger.info("Concurrency %d -> %d: %s", previous, self._limit, reason)
+        else:
+            logger.debug("Concurrency holding at %d: %s", self._limit, reason)
@@ -8,3 +8,12 @@ class AuthenticationError(AppError):
 
 class ConfigurationError(AppError):
     pass
+
+class UploadError(AppError):
+    """
+    Immich rejected an upload.
+    """
+    def __init__(self, message : str, *, status_code : int | None = None, retryable : bool = False):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retryable = retryable
@@ -0,0 +1,429 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+    A minimal, in-memory stand-in for the Immich API, for testing the HTTP upload backend without a real server.
+
+    Only the endpoints used by ImmichClient are implemented. Assets are identified by their SHA-1 checksum, as they are
+    by Immich, so uploading the same content twice returns a duplicate.
+
+    Chunked uploads use the core of the tus protocol, at /api/upload. Setting max_request_size rejects larger requests
+    with a 413, as Cloudflare does.
+
+    For benchmarks, the server can also emulate a slow or unreliable link, and a library which already holds some of
+    the files being uploaded:
+
+    - latency: Seconds added to every request.
+    - bandwidth: Bytes per second, shared by every connection, at which request bodies are received.
+    - error_rate: The fraction of uploads answered with a 503.
+    - duplicate_ratio: The fraction of new checksums which Immich reports it already has.
+
+    Example:
+        >>> with FakeImmichServer(api_key='secret') as server:
+        ...     client = ImmichClient(url=server.url, api_key='secret')
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    fake_immich.py                                                                                       *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+from __future__ import annotations
+import base64
+import hashlib
+import json
+import random
+import threading
+import time
+import uuid
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+class FakeAsset(dict):
+    """
+    An uploaded asset: its id, checksum, form fields, and size.
+    """
+
+class FakeImmichHandler(BaseHTTPRequestHandler):
+    server : FakeImmichHTTPServer
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self) -> None:
+        super().setup()
+        with self.server.fake.lock:
+            self.server.fake.connections += 1
+
+    def log_message(self, format, *args) -> None:
+        # Keep test output clean
+        pass
+
+    def send_json(self, status : int, data : Any) -> None:
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_body(self) -> bytes:
+        length = int(self.headers.get('Content-Length') or 0)
+        if not self.server.fake.bandwidth:
+            return self.rfile.read(length)
+
+        # Receive the body a piece at a time, at the speed of the emulated link
+        chunks = []
+        while length > 0 and (chunk := self.rfile.read(min(length, 64 * 1024))):
+            self.server.fake.throttle(len(chunk))
+            chunks.append(chunk)
+            length -= len(chunk)
+        return b''.join(chunks)
+
+    def authorized(self) -> bool:
+        fake = self.server.fake
+        if self.headers.get('x-api-key') == fake.api_key or self.headers.get('Authorization') == f'Bearer {fake.api_key}':
+            return True
+        self.send_json(401, {'message': 'Invalid API key', 'statusCode': 401})
+        return False
+
+    def inject_error(self) -> bool:
+        if not self.server.fake.should_fail():
+            return False
+        self.send_json(503, {'message': 'Service Unavailable (injected)'})
+        return True
+
+    def do_GET(self) -> None:
+        self.server.fake.record_request('GET', self.path)
+        if not self.authorized():
+            return
+
+        match self.path:
+            case '/api/users/me':
+                self.send_json(200, {'id': 'user', 'email': 'test@example.com'})
+            case '/api/albums':
+                self.send_json(200, [{'id': album_id, 'albumName': album['albumName']} for album_id, album in self.server.fake.albums.items()])
+            case _:
+                self.send_json(404, {'message': 'Not found'})
+
+    def too_large(self) -> bool:
+        limit = self.server.fake.max_request_size
+        if not limit or int(self.headers.get('Content-Length') or 0) <= limit:
+            return False
+        # Cloudflare responds without reading the body, and closes the connection
+        self.close_connection = True
+        self.send_json(413, {'message': 'Payload Too Large'})
+        return True
+
+    def do_HEAD(self) -> None:
+        self.server.fake.record_request('HEAD', self.path)
+        if not self.authorized():
+            return
+
+        if not (upload := self.server.fake.get_chunked_upload(self.path)):
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Tus-Resumable', '1.0.0')
+        self.send_header('Upload-Offset', str(len(upload['data'])))
+        self.send_header('Upload-Length', str(upload['length']))
+        self.send_header('Cache-Control', 'no-store')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_PATCH(self) -> None:
+        self.server.fake.record_request('PATCH', self.path)
+        if self.too_large():
+            return
+        body = self.read_body()
+        if not self.authorized():
+            return
+
+        if not (upload := self.server.fake.get_chunked_upload(self.path)):
+            self.send_json(404, {'message': 'Upload not found'})
+            return
+        if self.inject_error():
+            return
+        if self.headers.get('Content-Type') != 'application/offset+octet-stream':
+            self.send_json(415, {'message': 'Expected application/offset+octet-stream'})
+            return
+
+        with self.server.fake.lock:
+            if int(self.headers.get('Upload-Offset', -1)) != len(upload['data']):
+                conflict = True
+            else:
+                conflict = False
+                upload['data'].extend(body[:upload['length'] - len(upload['data'])])
+            offset = len(upload['data'])
+
+        if conflict:
+            self.send_json(409, {'message': 'Offset does not match'})
+            return
+
+        if offset < upload['length']:
+            self.send_response(204)
+            self.send_header('Tus-Resumable', '1.0.0')
+            self.send_header('Upload-Offset', str(offset))
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        # The last chunk creates the asset
+        data = bytes(upload['data'])
+        status, asset = self.server.fake.add_asset(hashlib.sha1(data).hexdigest(), upload['metadata'], len(data))
+        self.server.fake.finish_chunked_upload(self.path)
+        body = json.dumps({'id': asset['id'], 'status': status}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Tus-Resumable', '1.0.0')
+        self.send_header('Upload-Offset', str(offset))
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self) -> None:
+        self.server.fake.record_request('POST', self.path)
+        if self.too_large():
+            return
+        body = self.read_body()
+        if self.path != '/api/auth/login' and not self.authorized():
+            return
+
+        match self.path:
+            case '/api/auth/login':
+                # Sessions are not emulated. The access token is the API key.
+                self.send_json(201, {'accessToken': self.server.fake.api_key, 'userId': 'user', 'userEmail': json.loads(body).get('email')})
+            case '/api/assets':
+                if not self.inject_error():
+                    self.handle_upload(body)
+            case '/api/upload':
+                self.handle_create_chunked_upload()
+            case '/api/assets/bulk-upload-check':
+                self.handle_bulk_upload_check(json.loads(body))
+            case '/api/albums':
+                self.send_json(201, self.server.fake.create_album(json.loads(body)['albumName']))
+            case _:
+                self.send_json(404, {'message': 'Not found'})
+
+    def do_PUT(self) -> None:
+        self.server.fake.record_request('PUT', self.path)
+        body = self.read_body()
+        if not self.authorized():
+            return
+
+        parts = self.path.strip('/').split('/')
+        if len(parts) == 4 and parts[:2] == ['api', 'albums'] and parts[3] == 'assets' and parts[2] in self.server.fake.albums:
+            album = self.server.fake.albums[parts[2]]
+            results = []
+            with self.server.fake.lock:
+                for asset_id in json.loads(body)['ids']:
+                    duplicate = asset_id in album['assets']
+                    album['assets'].add(asset_id)
+                    results.append({'id': asset_id, 'success': not duplicate, **({'error': 'duplicate'} if duplicate else {})})
+            self.send_json(200, results)
+            return
+
+        self.send_json(404, {'message': 'Not found'})
+
+    def handle_bulk_upload_check(self, body : dict[str, Any]) -> None:
+        results = []
+        for item in body['assets']:
+            if (asset := self.server.fake.get_asset(item['checksum'])):
+                results.append({'id': item['id'], 'action': 'reject', 'reason': 'duplicate', 'assetId': asset['id']})
+            else:
+                results.append({'id': item['id'], 'action': 'accept'})
+        self.send_json(200, {'results': results})
+
+    def handle_create_chunked_upload(self) -> None:
+        if self.headers.get('Tus-Resumable') != '1.0.0' or not self.headers.get('Upload-Length'):
+            self.send_json(400, {'message': 'Expected a tus 1.0.0 creation request'})
+            return
+
+        metadata = {}
+        for pair in filter(None, self.headers.get('Upload-Metadata', '').split(',')):
+            key, _, value = pair.strip().partition(' ')
+            metadata[key] = base64.b64decode(value).decode('utf-8')
+
+        upload_id = self.server.fake.create_chunked_upload(int(self.headers['Upload-Length']), metadata)
+        self.send_response(201)
+        self.send_header('Tus-Resumable', '1.0.0')
+        self.send_header('Location', f'/api/upload/{upload_id}')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def handle_upload(self, body : bytes) -> None:
+        content_type = self.headers.get('Content-Type', '')
+        message = BytesParser(policy=HTTP).parsebytes(f'Content-Type: {content_type}\r\n\r\n'.encode('utf-8') + body)
+        if not message.is_multipart():
+            self.send_json(400, {'message': 'Expected multipart/form-data'})
+            return
+
+        fields : dict[str, str] = {}
+        data : bytes | None = None
+        for part in message.iter_parts():
+            name = part.get_param('name', header='content-disposition')
+            if name == 'assetData':
+                data = part.get_payload(decode=True)
+            else:
+                fields[name] = part.get_content().strip()
+
+        if data is None:
+            self.send_json(400, {'message': 'assetData is required'})
+            return
+
+        status, asset = self.server.fake.add_asset(hashlib.sha1(data).hexdigest(), fields, len(data))
+        self.send_json(201 if status == 'created' else 200, {'id': asset['id'], 'status': status})
+
+class FakeImmichHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    fake : FakeImmichServer
+
+class FakeImmichServer:
+    """
+    Run a fake Immich server on localhost, in a background thread.
+    """
+    def __init__(
+        self,
+        api_key : str = 'secret',
+        host : str = '127.0.0.1',
+        port : int = 0,
+        max_request_size : int = 0,
+        *,
+        latency : float = 0,
+        bandwidth : int = 0,
+        error_rate : float = 0,
+        duplicate_ratio : float = 0,
+        seed : int | None = None,
+    ):
+        self.api_key = api_key
+        self.max_request_size = max_request_size
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.duplicate_ratio = duplicate_ratio
+        self.lock = threading.Lock()
+        self._random = random.Random(seed)
+        # When the emulated link is next free to receive, by time.monotonic()
+        self._link_free_at = 0.0
+        # Uploads answered with an injected error
+        self.errors_injected = 0
+        self.assets : dict[str, FakeAsset] = {}
+        # Unfinished chunked uploads, by id
+        self.chunked_uploads : dict[str, dict[str, Any]] = {}
+        self.albums : dict[str, dict[str, Any]] = {}
+        self.requests : list[tuple[str, str]] = []
+        # The number of TCP connections accepted, to check that clients reuse them
+        self.connections = 0
+        self._server = FakeImmichHTTPServer((host, port), FakeImmichHandler)
+        self._server.fake = self
+        self._thread : threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def __enter__(self) -> FakeImmichServer:
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def record_request(self, method : str, path : str) -> None:
+        with self.lock:
+            self.requests.append((method, path))
+        if self.latency:
+            time.sleep(self.latency)
+
+    def throttle(self, size : int) -> None:
+        """
+        Wait until size more bytes could have crossed the emulated link. Concurrent requests share the link.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self._link_free_at = max(now, self._link_free_at) + size / self.bandwidth
+            wait = self._link_free_at - now
+        time.sleep(wait)
+
+    def should_fail(self) -> bool:
+        if not self.error_rate:
+            return False
+        with self.lock:
+            if self._random.random() >= self.error_rate:
+                return False
+            self.errors_injected += 1
+            return True
+
+    def is_preexisting(self, checksum : str) -> bool:
+        """
+        Whether a checksum is one of the duplicate_ratio of checksums which the library already held. The same checksum
+        always gets the same answer.
+        """
+        return bool(self.duplicate_ratio) and int(hashlib.sha1(checksum.encode('utf-8')).hexdigest()[:8], 16) / 0x100000000 < self.duplicate_ratio
+
+    def get_asset(self, checksum : str) -> FakeAsset | None:
+        with self.lock:
+            return self._get_asset(checksum)
+
+    def _get_asset(self, checksum : str) -> FakeAsset | None:
+        if checksum not in self.assets and self.is_preexisting(checksum):
+            self.assets[checksum] = FakeAsset(id=str(uuid.uuid4()), checksum=checksum, size=0, preexisting=True)
+        return self.assets.get(checksum)
+
+    def add_asset(self, checksum : str, fields : dict[str, str], size : int) -> tuple[str, FakeAsset]:
+        with self.lock:
+            if (existing := self._get_asset(checksum)):
+                return 'duplicate', existing
+            asset = FakeAsset(id=str(uuid.uuid4()), checksum=checksum, size=size, **fields)
+            self.assets[checksum] = asset
+            return 'created', asset
+
+    def create_chunked_upload(self, length : int, metadata : dict[str, str]) -> str:
+        with self.lock:
+            upload_id = uuid.uuid4().hex
+            self.chunked_uploads[upload_id] = {'length': length, 'metadata': metadata, 'data': bytearray()}
+            return upload_id
+
+    def get_chunked_upload(self, path : str) -> dict[str, Any] | None:
+        prefix = '/api/upload/'
+        if not path.startswith(prefix):
+            return None
+        with self.lock:
+            return self.chunked_uploads.get(path[len(prefix):])
+
+    def finish_chunked_upload(self, path : str) -> None:
+        with self.lock:
+            self.chunked_uploads.pop(path.rsplit('/', 1)[-1], None)
+
+    def create_album(self, album_name : str) -> dict[str, Any]:
+        with self.lock:
+            album_id = str(uuid.uuid4())
+            self.albums[album_id] = {'albumName': album_name, 'assets': set()}
+            return {'id': album_id, 'albumName': album_name}
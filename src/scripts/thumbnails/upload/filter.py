@@ -0,0 +1,202 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+    The rules which decide whether a file is uploaded, compiled once into sets, a trie, and a single regex.
+
+    Rules are evaluated from cheapest to most expensive, so most files are rejected by a set lookup on their name. The
+    file is only stat'ed for the size limit, and a DirEntry from os.scandir provides that stat for free on Windows, and
+    caches it everywhere else.
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    filter.py                                                                                            *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+from __future__ import annotations
+import fnmatch
+import os
+import re
+import stat
+from pathlib import Path
+from typing import Iterable, Sequence
+
+from scripts.thumbnails.upload.template import FileTemplate
+
+class PathTrie:
+    """
+    A set of paths, split into components, to check whether a path is (or is inside) any of them in O(depth).
+    """
+    _END = '\0'
+
+    def __init__(self, paths : Iterable[str | Path] = ()):
+        self._root : dict[str, dict] = {}
+        for path in paths:
+            self.add(path)
+
+    @classmethod
+    def split(cls, path : str | Path) -> list[str]:
+        return [part for part in os.path.normpath(str(path)).split(os.sep) if part]
+
+    def add(self, path : str | Path) -> None:
+        node = self._root
+        for part in self.split(path):
+            node = node.setdefault(part, {})
+        node[self._END] = {}
+
+    def contains(self, path : str | Path) -> bool:
+        """
+        Check whether path, or any of its parents, was added.
+        """
+        node = self._root
+        for part in self.split(path):
+            if (node := node.get(part)) is None:
+                return False
+            if self._END in node:
+                return True
+        return False
+
+    def __bool__(self) -> bool:
+        return bool(self._root)
+
+def compile_templates(templates : Sequence[FileTemplate]) -> re.Pattern | None:
+    """
+    Combine templates into a single regex, which matches a filename if every template matches it.
+
+    Each template matches if any of its patterns match, so each becomes an alternation inside a lookahead.
+    """
+    lookaheads = []
+    for template in templates:
+        alternatives = []
+        for pattern in template.patterns:
+            if pattern.flags & ~(re.UNICODE | re.IGNORECASE):
+                raise ValueError(f"Unable to combine pattern with flags {pattern.flags}: {pattern.pattern}")
+            alternatives.append(f'(?i:{pattern.pattern})' if pattern.flags & re.IGNORECASE else f'(?:{pattern.pattern})')
+        lookaheads.append(f'(?={"|".join(alternatives)})')
+    return re.compile(''.join(lookaheads)) if lookaheads else None
+
+class IgnoreFilter:
+    """
+    Decide whether a file should be skipped, without touching the disk unless the size limit applies.
+
+    Args:
+        extensions: The extensions which may be uploaded (without the '.', in any case).
+        ignore_extensions: Extensions which must not be uploaded, even if they are in extensions.
+        ignore_paths: Files, or directories of files, which must not be uploaded.
+        templates: Every template must match the filename.
+        filename_pattern: A regex which must match the filename.
+        globs: Glob patterns, at least one of which must match the filename. Case insensitive.
+        large_file_size: Files larger than this are skipped. 0 disables the limit.
+    """
+    def __init__(
+        self,
+        *,
+        extensions : Iterable[str],
+        ignore_extensions : Iterable[str] = (),
+        ignore_paths : Iterable[str | Path] = (),
+        templates : Sequence[FileTemplate] = (),
+        filename_pattern : re.Pattern | None = None,
+        globs : Iterable[str] = (),
+        large_file_size : int = 0,
+    ):
+        ignored = {ext.lstrip('.').lower() for ext in ignore_extensions}
+        self.extensions = frozenset(ext.lstrip('.').lower() for ext in extensions) - ignored
+        self.ignore_paths = PathTrie(ignore_paths)
+        try:
+            self.template_pattern = compile_templates(templates)
+            self.templates : Sequence[FileTemplate] = ()
+        except ValueError:
+            # Templates with other flags are matched one by one
+            self.template_pattern = None
+            self.templates = templates
+        # The default pattern matches everything
+        self.filename_pattern = filename_pattern if filename_pattern and filename_pattern.pattern != '.*' else None
+        globs = [glob for glob in globs if glob != '*']
+        self.glob_pattern = re.compile('|'.join(f'(?:{fnmatch.translate(glob)})' for glob in globs), re.IGNORECASE) if globs else None
+        self.large_file_size = large_file_size
+
+    @classmethod
+    def get_suffix(cls, name : str) -> str:
+        # The same as Path.suffix, without creating a Path
+        index = name.rfind('.')
+        return name[index + 1:].lower() if index > 0 else ''
+
+    def reason(self, file : os.DirEntry | Path, *, allow_hidden : bool = True, size : int | None = None) -> str | None:
+        """
+        Check every rule against a file, cheapest first.
+
+        Args:
+            file: The file to check. A DirEntry avoids a stat, unless the size limit applies.
+            allow_hidden: Whether files starting with '.' may be uploaded.
+            size: The size of a regular file, if it is already known (e.g. from a manifest). This avoids the stat.
+
+        Returns:
+            The reason the file should be ignored, or None if it should be uploaded.
+        """
+        name = file.name
+        if not allow_hidden and name.startswith('.'):
+            return 'hidden'
+
+        if self.get_suffix(name) not in self.extensions:
+            return 'extension'
+
+        if self.glob_pattern and not self.glob_pattern.match(name):
+            return 'glob'
+
+        if self.filename_pattern and not self.filename_pattern.match(name):
+            return 'filename'
+
+        if self.template_pattern and not self.template_pattern.match(name):
+            return 'template'
+        for template in self.templates:
+            if not template.match(name):
+                return f'template {template}'
+
+        path = file.path if isinstance(file, os.DirEntry) else str(file)
+        if self.ignore_paths and self.ignore_paths.contains(path):
+            return 'path'
+
+        # DirEntry knows its type from the directory listing. A Path needs one stat, which is shared with the size check.
+        # A known size is only ever recorded for a regular file, so it needs neither.
+        if size is None:
+            try:
+                if isinstance(file, os.DirEntry):
+                    if not file.is_file():
+                        return 'not a file'
+                    size = file.stat().st_size if self.large_file_size else 0
+                else:
+                    result = os.stat(file)
+                    if not stat.S_ISREG(result.st_mode):
+                        return 'not a file'
+                    size = result.st_size
+            except OSError:
+                return 'not a file'
+
+        if self.large_file_size and size > self.large_file_size:
+            return f'larger than {self.large_file_size} bytes'
+
+        return None
+
+    def should_ignore(self, file : os.DirEntry | Path, *, allow_hidden : bool = True) -> bool:
+        return self.reason(file, allow_hidden=allow_hidden) is not None
+
+    def scan(self, directory : Path, *, allow_hidden : bool = True) -> list[os.DirEntry]:
+        """
+        List the files in a directory (not recursively) which should be uploaded, with one scandir.
+        """
+        with os.scandir(directory) as entries:
+            return [entry for entry in entries if self.reason(entry, allow_hidden=allow_hidden) is None]
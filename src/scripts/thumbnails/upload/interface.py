@@ -43,7 +43,6 @@ from __future__ import annotations
 import os
 import sys
 import threading
-import time
 
 # Add the root directory of the project to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
@@ -51,15 +50,18 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.
 import subprocess
 from pathlib import Path
 from pydantic import Field, PrivateAttr, field_validator
-from typing import Iterable
+from typing import Iterable, Literal
 from abc import ABC, abstractmethod
 from scripts import setup_logging
 from scripts.lib.file_manager import FileManager
 from scripts.lib.db import ImagesDatabase
-from scripts.thumbnails.upload.meta import ALLOWED_EXTENSIONS, DEFAULT_DB_PATH, IGNORE_DIRS
+from scripts.thumbnails.upload.client import ImmichClient
+from scripts.thumbnails.upload.meta import ALLOWED_EXTENSIONS, DB_BATCH_SIZE, DEFAULT_DB_PATH, IGNORE_DIRS
 from scripts.thumbnails.upload.exceptions import AuthenticationError, ConfigurationError
-from scripts.thumbnails.upload.status import FileStatus
+from scripts.thumbnails.upload.filter import IgnoreFilter
+from scripts.thumbnails.upload.status import StatusStore
 from scripts.thumbnails.upload.template import FileTemplate
+from scripts.thumbnails.upload.throughput import ThroughputTracker
 
 logger = setup_logging()
 
@@ -71,6 +73,7 @@ class ImmichInterface(FileManager, ABC):
     api_key: str
     ignore_extensions: list[str] = Field(default_factory=list)
     ignore_paths: list[str] = Field(default_factory=list)
+    # Larger files are skipped by the cli backend, and uploaded in chunks by the http backend
     large_file_size: int = 1024 * 1024 * 100  # 100 MB
     backup_directories : list[Path] = Field(default_factory=list)
     templates : list[FileTemplate] = Field(default_factory=list)
@@ -79,12 +82,24 @@ class ImmichInterface(FileManager, ABC):
     album : str | None = None
     skip : bool = False
     move_after_upload : Path | None = None
+    # 'cli' runs the immich CLI for each file. 'http' talks to the Immich API directly, over pooled connections.
+    backend : Literal['cli', 'http'] = 'cli'
 
     _authenticated: bool = PrivateAttr(default=False)
     _db : ImagesDatabase | None = PrivateAttr(default=None)
-    _start_ns : int = PrivateAttr(default=0)
+    # Paths to mark as uploaded in the images database, in the next batch
+    _db_uploaded : list[Path] = PrivateAttr(default_factory=list)
+    _db_lock : threading.Lock = PrivateAttr(default_factory=lambda: threading.Lock())
+    _client : ImmichClient | None = PrivateAttr(default=None)
+    _ignore_filter : IgnoreFilter | None = PrivateAttr(default=None)
+    _status_store : StatusStore = PrivateAttr(default_factory=StatusStore)
+    _throughput : ThroughputTracker = PrivateAttr(default_factory=ThroughputTracker)
     _bytes_lock : threading.Lock = PrivateAttr(default_factory=lambda: threading.Lock())
     _bytes_uploaded : int = PrivateAttr(default=0)
+    # Facts about files which were recorded elsewhere (e.g. in a manifest), until each file is uploaded or skipped
+    _digests : dict[str, str] = PrivateAttr(default_factory=dict)
+    _file_stats : dict[str, tuple[int, float]] = PrivateAttr(default_factory=dict)
+    _known_lock : threading.Lock = PrivateAttr(default_factory=lambda: threading.Lock())
 
     @field_validator('directory', mode="before")
     def validate_directory(cls, v):
@@ -161,6 +176,21 @@ class ImmichInterface(FileManager, ABC):
 
         return self._db
 
+    @property
+    def client(self) -> ImmichClient:
+        # Cache it, so every thread shares the same connection pool
+        if not self._client:
+            self._client = ImmichClient(url=self.url, api_key=self.api_key, max_connections=self.max_threads)
+        return self._client
+
+    @property
+    def status_store(self) -> StatusStore:
+        return self._status_store
+
+    @property
+    def throughput(self) -> ThroughputTracker:
+        return self._throughput
+
     @property
     def bytes_uploaded(self) -> int:
         with self._bytes_lock:
@@ -171,15 +201,106 @@ class ImmichInterface(FileManager, ABC):
         # A temporary hack to inject a class attribute into a pydantic model.
         return ALLOWED_EXTENSIONS.copy()
 
-    def record_bytes_uploaded(self, bytes_uploaded: int):
+    def mark_db_uploaded(self, image_path : Path) -> None:
+        """
+        Mark a file as uploaded in the images database. Rows are written in batches of DB_BATCH_SIZE.
         """
-        Record the number of bytes uploaded.
+        if not self.db:
+            return
+
+        with self._db_lock:
+            self._db_uploaded.append(image_path)
+            if len(self._db_uploaded) < DB_BATCH_SIZE:
+                return
+            batch, self._db_uploaded = self._db_uploaded, []
+        self.db.mark_uploaded_many(batch)
+
+    def flush_db(self) -> None:
+        """
+        Write every pending mark_db_uploaded.
+        """
+        with self._db_lock:
+            batch, self._db_uploaded = self._db_uploaded, []
+        if batch and self.db:
+            self.db.mark_uploaded_many(batch)
+
+    def record_bytes_uploaded(self, bytes_uploaded: int, endpoint : str = 'default'):
+        """
+        Record the number of bytes uploaded. Only bytes which were actually sent should be recorded.
 
         Args:
             bytes_uploaded (int): The number of bytes uploaded.
+            endpoint (str): Where they were sent, for the throughput of each endpoint.
         """
         with self._bytes_lock:
             self._bytes_uploaded += bytes_uploaded
+        self._throughput.record(bytes_uploaded, endpoint)
+
+    def remember_digest(self, file_path : Path, digest : str) -> None:
+        """
+        Remember the SHA-1 digest of a file that was calculated elsewhere (e.g. by organize, via a manifest).
+
+        Args:
+            file_path (Path): The file.
+            digest (str): The SHA-1 digest of the file, as a hex string.
+        """
+        with self._known_lock:
+            self._digests[str(file_path)] = digest
+
+    def get_known_digest(self, file_path : Path) -> str | None:
+        """
+        Get the SHA-1 digest of a file, if it is already known. The file is never read.
+
+        Args:
+            file_path (Path): The file.
+
+        Returns:
+            str | None: The SHA-1 digest as a hex string, or None if it is not known.
+        """
+        with self._known_lock:
+            return self._digests.get(str(file_path))
+
+    def remember_stat(self, file_path : Path, size : int, mtime : float) -> None:
+        """
+        Remember the size and modification time of a file that was recorded elsewhere (e.g. in a manifest).
+
+        Args:
+            file_path (Path): The file.
+            size (int): The size of the file, in bytes.
+            mtime (float): The modification time of the file.
+        """
+        with self._known_lock:
+            self._file_stats[str(file_path)] = (size, mtime)
+
+    def get_known_stat(self, file_path : Path) -> tuple[int, float] | None:
+        """
+        Get the size and modification time of a file, if they are already known. The file is never stat'd.
+
+        Args:
+            file_path (Path): The file.
+
+        Returns:
+            tuple[int, float] | None: (size, mtime), or None if they are not known.
+        """
+        with self._known_lock:
+            return self._file_stats.get(str(file_path))
+
+    def forget_file(self, file_path : Path) -> None:
+        """
+        Drop everything remembered about a file, once it has been uploaded or skipped.
+
+        Args:
+            file_path (Path): The file.
+        """
+        with self._known_lock:
+            self._digests.pop(str(file_path), None)
+            self._file_stats.pop(str(file_path), None)
+
+    def file_size(self, filepath : Path) -> int:
+        # Known sizes need no stat
+        if (known := self.get_known_stat(filepath)):
+            return known[0]
+        return super().file_size(filepath)
 
     def authenticate(self):
         """
@@ -192,6 +313,12 @@ class ImmichInterface(FileManager, ABC):
             return
 
         logger.debug("Authenticating with Immich at %s", self.url)
+
+        if self.backend == 'http':
+            user = self.client.authenticate()
+            self._authenticated = True
+            logger.debug("Authenticated successfully as %s.", user.get('email'))
+            return
         
         try:
             self.subprocess(["immich", "login-key", self.url, self.api_key])
@@ -212,57 +339,56 @@ class ImmichInterface(FileManager, ABC):
         """
         raise NotImplementedError("upload method must be implemented in a subclass.")
 
-    def should_ignore_file(self, image_path: Path, *, allow_hidden : bool = True, **kwargs) -> bool:
+    @property
+    def ignore_filter(self) -> IgnoreFilter:
+        # Compile the rules once, instead of for every file
+        if not self._ignore_filter:
+            self._ignore_filter = IgnoreFilter(
+                extensions=self.extensions,
+                ignore_extensions=self.ignore_extensions,
+                ignore_paths=self.ignore_paths,
+                templates=self.templates,
+                filename_pattern=self.filename_pattern,
+                globs=[self.glob_pattern] if self.glob_pattern else [],
+                # The http backend uploads large files in chunks
+                large_file_size=self.large_file_size if self.backend == 'cli' else 0,
+            )
+        return self._ignore_filter
+
+    def should_ignore_file(self, image_path: Path | os.DirEntry, *, allow_hidden : bool = True, filtered : bool = False, **kwargs) -> bool:
         """
-        Check if a file should be ignored based on the extension, size, and status.
+        Check if a file should be ignored based on the extension, path, templates, size, and status.
 
         Args:
-            file (Path): The file to check.
+            file (Path | DirEntry): The file to check. A DirEntry from discovery avoids another stat.
             allow_hidden (bool): Whether to include hidden files.
+            filtered (bool): Whether the file was already found with scan_files, so only its status needs checking.
             **kwargs: Additional arguments that subclasses may implement.
 
         Returns:
             bool: True if the file should be ignored, False otherwise
         """
-        if not image_path.is_file():
-            return True
-
-        # Run super() first for optimization
-        if super().should_ignore_file(image_path, allow_hidden=allow_hidden):
+        if not filtered and (reason := self.ignore_filter.reason(image_path, allow_hidden=allow_hidden)):
+            logger.debug("Ignoring %s (%s)", image_path, reason)
             return True
 
-        suffix = image_path.suffix.lstrip('.').lower()
-
-        # Ignore non-image extensions
-        if suffix not in self.extensions:
-            logger.debug("Ignoring non-media file due to extension: %s", image_path)
-            return True
-
-        if suffix in self.ignore_extensions:
-            logger.debug("Ignoring file due to extension per user request: %s", image_path)
-            return True
-
-        if str(image_path) in self.ignore_paths:
-            logger.debug("Ignoring file due to path: %s", image_path)
-            return True
-
-        for template in self.templates:
-            if not template.match(image_path):
-                logger.debug(f"Ignoring file {image_path} due to template {template}")
-                return True
-
         if self.skip:
-            if FileStatus.was_successful(image_path):
+            if self.status_store.was_successful(Path(image_path)):
                 logger.debug("Skipping already uploaded file %s", image_path)
                 return True
 
-        if self.large_file_size and self.file_size(image_path) > self.large_file_size:
-            logger.debug(f"File {image_path} is larger than {self.large_file_size} bytes and will be skipped.")
-            return True
-
         # No rules broken, so don't ignore
         return False
 
+    def scan_files(self, directory : Path) -> list[Path]:
+        """
+        List the files in one directory (not recursively) which pass the ignore filter, with a single scandir.
+
+        Equivalent to get_all_files(directory, recursive=False), followed by should_ignore_file, without a stat per
+        file. The status of each file is not checked.
+        """
+        return [Path(entry.path) for entry in self.ignore_filter.scan(directory)]
+
     def should_ignore_directory(self, directory: Path | str, *, allow_hidden : bool = False) -> bool:
         """
         Check if a directory should be ignored based on the name.
@@ -331,17 +457,12 @@ class ImmichInterface(FileManager, ABC):
 
     def get_upload_speed(self, decimal_places : int | None = 2) -> float:
         """
-        Calculate the upload speed in MB/s.
+        Calculate the upload speed in MB/s, over the last few seconds (see ThroughputTracker).
 
         Returns:
             float: The upload speed in MB/s
         """
-        if not self._start_ns:
-            return 0
-        
-        time_now = time.time_ns()
-        elapsed = (time_now - self._start_ns) / 1e9
-        speed = self._bytes_uploaded / 1024 / 1024 / elapsed
+        speed = self._throughput.rate() / 1024 / 1024
         if decimal_places is not None:
             speed = round(speed, decimal_places)
         return speed
\ No newline at end of file
@@ -48,5 +48,23 @@ IGNORE_DIRS = [
 
 DEFAULT_DB_PATH = Path(__file__).resolve().parents[3] / 'image_search.db'
 
+# Where previews of large photos are cached, when uploading previews in place of originals
+DEFAULT_PREVIEW_CACHE = Path.home() / '.cache' / 'imageinn' / 'previews'
+
 MAX_RETRIES = 50
-SECONDS_PER_RETRY = 15
\ No newline at end of file
+SECONDS_PER_RETRY = 15
+
+# The number of rows of the images database marked as uploaded in one transaction
+DB_BATCH_SIZE = 500
+
+# The number of assets added to an album in one request
+ALBUM_BATCH_SIZE = 500
+
+# The number of files checked for existence ahead of the uploads, when uploading from the images database
+EXISTS_QUEUE_SIZE = 256
+
+# Seconds before a directory leased by an upload process which stopped renewing it can be taken over by another
+LEASE_SECONDS = 120
+
+# The number of uploaded files moved together from one directory, if the directory hasn't finished uploading yet
+MOVE_BATCH_SIZE = 200
@@ -0,0 +1,178 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+    Move files after they are uploaded, on a background thread, instead of in the upload workers.
+
+    Uploaded files are collected by the directory they are in. Once a directory finishes (or batch_size of its files
+    are collected), they are moved together: the destination is created once, collisions are resolved against one
+    listing of the destination, and files on the same filesystem are renamed without any further checks. Moves to
+    another filesystem still go through FileManager.move_file, which verifies the copy.
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    move.py                                                                                              *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+from __future__ import annotations
+import logging
+import os
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from scripts.exceptions import ChecksumMismatchError
+from scripts.lib.file_manager import FileManager
+from scripts.thumbnails.upload.meta import MOVE_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+class MoveStage:
+    """
+    Move uploaded files to a target directory in batches, one source directory at a time, on a single background thread.
+
+    add() is safe to call from upload workers, and never touches the filesystem. Call close() to finish every move.
+
+    Args:
+        manager: Moves files across filesystems, records stats, and honours dry runs.
+        target: The directory to move files to. A relative target is resolved against each file's own directory.
+        batch_size: The number of files collected from one directory before they are moved, if it hasn't finished yet.
+    """
+    def __init__(self, manager : FileManager, target : Path, batch_size : int = MOVE_BATCH_SIZE):
+        self.manager = manager
+        self.target = target
+        self.batch_size = batch_size
+        self._pending : dict[Path, list[Path]] = {}
+        self._lock = threading.Lock()
+        self._executor : ThreadPoolExecutor | None = None
+
+    def get_target(self, directory : Path) -> Path:
+        """
+        Get the directory which files from directory are moved to.
+        """
+        if self.target.is_absolute():
+            return self.target
+        return directory.absolute() / self.target
+
+    def add(self, file_path : Path) -> None:
+        """
+        Queue an uploaded file to be moved.
+        """
+        with self._lock:
+            files = self._pending.setdefault(file_path.parent, [])
+            files.append(file_path)
+            if len(files) < self.batch_size:
+                return
+            del self._pending[file_path.parent]
+        self._submit(file_path.parent, files)
+
+    def flush_directory(self, directory : Path) -> None:
+        """
+        Start moving every queued file from directory, once its uploads have finished.
+        """
+        with self._lock:
+            files = self._pending.pop(directory, None)
+        if files:
+            self._submit(directory, files)
+
+    def close(self) -> None:
+        """
+        Move every queued file, and wait for all the moves to finish.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for directory, files in pending.items():
+            self._submit(directory, files)
+
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=True)
+
+    def _submit(self, directory : Path, files : list[Path]) -> None:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='MoveStage')
+            self._executor.submit(self.move_batch, directory, files)
+
+    def move_batch(self, directory : Path, files : list[Path]) -> list[Path]:
+        """
+        Move files from one source directory to its target.
+
+        Returns:
+            list[Path]: The destinations of the files which were moved.
+        """
+        target = self.get_target(directory)
+        if self.manager.check_dry_run(f'moving {len(files)} files from {directory} to {target}'):
+            return []
+
+        try:
+            if not target.exists():
+                self.manager.mkdir(target)
+            # One listing of the destination, instead of probing for every file and every collision
+            taken = set(os.listdir(target))
+            same_filesystem = self.manager.is_same_filesystem(directory, target)
+        except OSError as e:
+            logger.error('Unable to prepare %s for moving %d files: %s', target, len(files), e)
+            self.manager.record_error(len(files))
+            return []
+
+        moved = []
+        for file_path in files:
+            destination = target / self.get_unique_name(file_path.name, taken)
+            taken.add(destination.name)
+            try:
+                if same_filesystem:
+                    file_path.rename(destination)
+                    self.manager.record_move_file()
+                    self.move_sidecar(file_path, destination, taken)
+                else:
+                    destination = self.manager.move_file(file_path, destination)
+            except (OSError, ChecksumMismatchError, subprocess.SubprocessError) as e:
+                logger.error('Error moving %s to %s: %s', file_path, destination, e)
+                self.manager.record_error()
+                continue
+            moved.append(destination)
+
+        logger.info('Moved %d files from %s to %s', len(moved), directory, target)
+        return moved
+
+    def move_sidecar(self, file_path : Path, destination : Path, taken : set[str]) -> None:
+        """
+        Move the XMP file of a photo alongside it, like FileManager.move_file. Sidecars are not critical, so errors are only
+        logged.
+        """
+        sidecar = file_path.with_suffix('.xmp')
+        try:
+            if sidecar.exists(follow_symlinks=False):
+                sidecar.rename(destination.with_suffix('.xmp'))
+                taken.add(destination.with_suffix('.xmp').name)
+        except OSError as e:
+            logger.warning('Error moving XMP file: %s', e)
+
+    @staticmethod
+    def get_unique_name(name : str, taken : set[str]) -> str:
+        """
+        Get a name which is not in taken, by suffixing a number to the stem of name if needed.
+        """
+        if name not in taken:
+            return name
+        path = Path(name)
+        count = 1
+        while (candidate := f'{path.stem}_{count}{path.suffix}') in taken:
+            count += 1
+        return candidate
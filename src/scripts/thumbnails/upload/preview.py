@@ -0,0 +1,292 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+    Generate reduced previews of large photos, to upload in their place over slow links.
+
+    JPEGs are decoded at a reduced scale with Pillow's draft mode (the decoder skips most of the DCT work), reduced by
+    an integer factor, and then resampled to fit. RAW files are not decoded at all: the JPEG preview which the camera
+    embedded in the file is extracted with rawpy, and reduced the same way.
+
+    Previews are written to a content-addressed cache. The key is the SHA-1 of the original file and the settings which
+    produced the preview, so a preview is generated once, no matter where the original is moved, and changing the
+    settings never reuses a stale preview. Each preview keeps the name (and modification time) of its original, so
+    Immich files it in the same place.
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    preview.py                                                                                           *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+from __future__ import annotations
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from pydantic import BaseModel
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+try:
+    import rawpy
+except ImportError:
+    rawpy = None
+
+logger = logging.getLogger(__name__)
+
+# Decoded at a reduced scale with Pillow
+IMAGE_EXTENSIONS = ['jpg', 'jpeg', 'tif', 'tiff']
+
+# The camera's embedded JPEG preview is extracted with rawpy
+RAW_EXTENSIONS = ['arw', 'cr2', 'cr3', 'dng', 'nef', 'orf', 'raf', 'rw2']
+
+class PreviewPolicy(BaseModel):
+    """
+    Which files are replaced by a preview, and how large the previews are.
+    """
+    # The longest edge of a preview, in pixels
+    max_dimension : int = 2560
+    # JPEG quality of the previews
+    quality : int = 85
+    # Smaller files are uploaded as they are
+    min_file_size : int = 4 * 1024 * 1024
+
+    def applies_to(self, file_path : Path, size : int) -> bool:
+        """
+        Check if a file should be uploaded as a preview.
+
+        Args:
+            file_path (Path): The original file.
+            size (int): The size of the original file, in bytes.
+
+        Returns:
+            bool: True if the file is large enough, and a preview can be made from its format.
+        """
+        if size < self.min_file_size:
+            return False
+
+        suffix = file_path.suffix.lower().lstrip('.')
+        if suffix in RAW_EXTENSIONS:
+            return rawpy is not None and Image is not None
+        return suffix in IMAGE_EXTENSIONS and Image is not None
+
+    def get_key(self, digest : str) -> str:
+        """
+        Get the cache key of the preview of a file, from the SHA-1 digest of its contents.
+        """
+        return hashlib.sha1(f'{digest}:{self.max_dimension}:{self.quality}'.encode('utf-8')).hexdigest()
+
+def open_preview_source(file_path : Path, max_dimension : int) -> Image.Image:
+    """
+    Open an image, decoding no more of it than a preview of max_dimension needs.
+
+    Args:
+        file_path (Path): A JPEG, a TIFF, or a RAW file with an embedded preview.
+        max_dimension (int): The longest edge of the preview, in pixels.
+
+    Returns:
+        Image: The image, reduced to at least max_dimension on its longest edge.
+
+    Raises:
+        OSError: If the image can't be read, or a RAW file has no embedded JPEG preview.
+    """
+    if file_path.suffix.lower().lstrip('.') in RAW_EXTENSIONS:
+        try:
+            with rawpy.imread(str(file_path)) as raw:
+                thumbnail = raw.extract_thumb()
+        except (rawpy.LibRawNoThumbnailError, rawpy.LibRawUnsupportedThumbnailError) as e:
+            raise OSError(f'{file_path} has no embedded preview') from e
+        except rawpy.LibRawError as e:
+            raise OSError(f'Unable to read {file_path}: {e}') from e
+
+        if thumbnail.format == rawpy.ThumbFormat.JPEG:
+            image = Image.open(io.BytesIO(thumbnail.data))
+        else:
+            image = Image.fromarray(thumbnail.data)
+    else:
+        image = Image.open(file_path)
+
+    # JPEGs decode at 1/2, 1/4 or 1/8 scale, to the smallest size still larger than requested. Other formats ignore this.
+    image.draft('RGB', (max_dimension, max_dimension))
+
+    # Integer reduction is much cheaper than resampling the whole image
+    if (factor := max(image.size) // max_dimension) >= 2:
+        image = image.reduce(factor)
+
+    return image
+
+def render_preview(source : str, cache_dir : str, digest : str | None, max_dimension : int, quality : int) -> str | None:
+    """
+    Write a preview of a file to the cache, unless it is already there. Runs in a worker process.
+
+    Args:
+        source (str): The original file.
+        cache_dir (str): The root of the preview cache.
+        digest (str): The SHA-1 digest of the original, if known. Otherwise, it is calculated.
+        max_dimension (int): The longest edge of the preview, in pixels.
+        quality (int): JPEG quality of the preview.
+
+    Returns:
+        str | None: The path of the preview, or None if the original is already small enough.
+    """
+    source_path = Path(source)
+    if not digest:
+        with source_path.open('rb') as f:
+            digest = hashlib.file_digest(f, 'sha1').hexdigest()
+
+    key = PreviewPolicy(max_dimension=max_dimension, quality=quality).get_key(digest)
+    destination = Path(cache_dir) / key[:2] / key / f'{source_path.stem}.jpg'
+    if destination.exists():
+        return str(destination)
+
+    image = open_preview_source(source_path, max_dimension)
+    if max(image.size) <= max_dimension and source_path.suffix.lower().lstrip('.') not in RAW_EXTENSIONS:
+        # Already small enough. Encoding it again would only lose quality.
+        return None
+
+    exif = image.info.get('exif')
+    icc_profile = image.info.get('icc_profile')
+    image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=quality, optimize=True, exif=exif or b'', icc_profile=icc_profile)
+    stat = source_path.stat()
+    if buffer.tell() >= stat.st_size:
+        return None
+
+    # Write to a temporary file first, so a preview is never seen half-written
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=destination.parent, suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as f:
+            f.write(buffer.getbuffer())
+        # Immich dates assets without EXIF by their modification time
+        os.utime(temporary, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.replace(temporary, destination)
+    except BaseException:
+        Path(temporary).unlink(missing_ok=True)
+        raise
+
+    return str(destination)
+
+class PreviewGenerator:
+    """
+    Generate previews in a pool of worker processes, ahead of the uploads which need them.
+
+    Call prepare() with the files which are about to be uploaded, get() when uploading each one, and discard() once it
+    has been uploaded.
+    """
+    def __init__(self, policy : PreviewPolicy, cache_dir : Path, max_workers : int | None = None):
+        if Image is None:
+            raise ImportError('Pillow is required to generate previews')
+
+        self.policy = policy
+        self.cache_dir = Path(cache_dir)
+        self.max_workers = max_workers
+        self._executor : ProcessPoolExecutor | None = None
+        self._pending : dict[Path, Future] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if not self._executor:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def submit(self, file_path : Path, digest : str | None = None) -> Future | None:
+        """
+        Start generating the preview of a file, if the policy applies to it, and it is not already started.
+
+        Args:
+            file_path (Path): The original file.
+            digest (str): The SHA-1 digest of the original, if known.
+
+        Returns:
+            Future | None: The preview's path, or None if the file is uploaded as it is.
+        """
+        with self._lock:
+            if file_path in self._pending:
+                return self._pending[file_path]
+
+            try:
+                size = file_path.stat().st_size
+            except OSError:
+                return None
+            if not self.policy.applies_to(file_path, size):
+                return None
+
+            future = self.executor.submit(
+                render_preview, str(file_path), str(self.cache_dir), digest, self.policy.max_dimension, self.policy.quality
+            )
+            self._pending[file_path] = future
+            return future
+
+    def prepare(self, files : dict[Path, str | None]) -> None:
+        """
+        Start generating the previews of files which are about to be uploaded.
+
+        Args:
+            files (dict[Path, str | None]): The files, and their SHA-1 digests if known.
+        """
+        for file_path, digest in files.items():
+            self.submit(file_path, digest)
+
+    def get(self, file_path : Path, digest : str | None = None) -> Path | None:
+        """
+        Get the preview of a file, waiting for it to be generated.
+
+        Returns:
+            Path | None: The preview, or None if the original should be uploaded.
+        """
+        if not (future := self.submit(file_path, digest)):
+            return None
+
+        try:
+            preview = future.result()
+        except Exception as e:
+            # A preview is only an optimization. Upload the original instead.
+            logger.warning('Unable to generate a preview of %s, uploading the original: %s', file_path, e)
+            return None
+
+        if preview:
+            logger.debug('Uploading preview %s in place of %s', preview, file_path)
+            return Path(preview)
+        return None
+
+    def discard(self, file_path : Path) -> None:
+        """
+        Forget the preview of a file, once it has been uploaded. The cached preview is kept.
+        """
+        with self._lock:
+            if (future := self._pending.pop(file_path, None)):
+                future.cancel()
+
+    def close(self) -> None:
+        with self._lock:
+            self._pending.clear()
+            if self._executor:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
@@ -55,16 +55,18 @@ import sys
 import threading
 import time
 import subprocess
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Protocol
-from dotenv import load_dotenv
-import argparse
+from typing import Callable, Iterable, Iterator, Literal, Protocol, TypeVar
 from pydantic import PrivateAttr
 from alive_progress import alive_bar
+import requests
 
 from scripts.lib.db.images import ImagesDatabase
-from scripts.thumbnails.upload.meta import DEFAULT_DB_PATH
+from scripts.lib.manifest import read_manifest
+from scripts.lib.pairs import index_pair_paths
+from scripts.thumbnails.upload.meta import ALBUM_BATCH_SIZE, DEFAULT_PREVIEW_CACHE, LEASE_SECONDS
 
 # Add the root directory of the project to sys.path
 PARENT_DIR = Path(__file__).resolve().parents[3]
@@ -73,17 +75,247 @@ sys.path.append(PARENT_DIR.absolute().as_posix())
 from scripts import setup_logging
 from scripts.lib.types import ProgressBar, RED, CYAN, CYAN2, YELLOW, YELLOW2, BLUE, PURPLE, RESET
 from scripts.lib.utils import seconds_to_human
-from scripts.exceptions import AppError
-from scripts.thumbnails.upload.meta import MAX_RETRIES, SECONDS_PER_RETRY
-from scripts.thumbnails.upload.exceptions import AuthenticationError, ConfigurationError
+from scripts.thumbnails.upload.meta import EXISTS_QUEUE_SIZE, MAX_RETRIES, SECONDS_PER_RETRY
+from scripts.thumbnails.upload import cli
+from scripts.thumbnails.upload.exceptions import ConfigurationError, UploadError
 from scripts.thumbnails.upload.interface import ImmichInterface
-from scripts.thumbnails.upload.status import FileStatus, DirectoryStatus, StatusOptions
-from scripts.thumbnails.upload.template import PixelFiles
+from scripts.thumbnails.upload.album import AlbumBatcher
+from scripts.thumbnails.upload.client import BULK_CHECK_BATCH_SIZE, UploadResult
+from scripts.thumbnails.upload.concurrency import ConcurrencyController
+from scripts.thumbnails.upload.move import MoveStage
+from scripts.thumbnails.upload.preview import PreviewGenerator, PreviewPolicy
+from scripts.thumbnails.upload.schedule import DEFAULT_LOOKAHEAD, UploadScheduler
+from scripts.thumbnails.upload.shard import LeaseKeeper, shard_of
+from scripts.thumbnails.upload.status import FileDigest, DirectoryStatus, StatusOptions, UploadSession
+from scripts.thumbnails.upload import tree
 
 logger = setup_logging()
 
+T = TypeVar('T')
+
+class DirectoryProgress:
+    """
+    Counts the uploads which are still running in one directory, so its DirectoryStatus can be updated as soon as the
+    last one finishes.
+    """
+    def __init__(
+        self,
+        directory : Path,
+        file_count : int,
+        last_modified_time : float,
+        globs : list[str],
+        remaining : int,
+        digest : str | None = None,
+        *,
+        partial : bool = False,
+    ):
+        self.directory = directory
+        self.file_count = file_count
+        self.last_modified_time = last_modified_time
+        self.globs = globs
+        self.remaining = remaining
+        self.digest = digest
+        # Files were deliberately left for a later run, so the directory is not finished even if every upload succeeds
+        self.partial = partial
+        self.failed = False
+        self._lock = threading.Lock()
+
+    def finish(self, failed : bool = False, *, partial : bool = False) -> bool:
+        """
+        Record that one upload finished.
+
+        Args:
+            failed (bool): Whether the upload failed.
+            partial (bool): Whether the file must be sent again by a later run, e.g. because only its preview was sent.
+
+        Returns:
+            bool: True if it was the last upload in the directory. Check failed to see if any of them failed.
+        """
+        with self._lock:
+            self.remaining -= 1
+            self.failed = self.failed or failed
+            self.partial = self.partial or partial
+            return self.remaining == 0
+
+    def update_status(self) -> None:
+        DirectoryStatus.update(self.directory, self.file_count, self.last_modified_time, self.globs, self.digest)
+
 class ImmichProgressiveUploader(ImmichInterface):
-    
+    # Skip files which Immich already has, by checking their digests before uploading them
+    precheck : bool = True
+
+    # Tune the number of uploads in flight (between min_threads and max_threads) to the link
+    adaptive : bool = True
+    min_threads : int = 1
+
+    # Uploaded assets are added to the album in batches of this size, and whenever a directory finishes
+    album_batch_size : int = ALBUM_BATCH_SIZE
+
+    # Seconds to wait before retrying an upload which failed with a connection or server error
+    retry_delay : float = 10
+
+    # Upload reduced previews of large photos in place of the originals, if set
+    previews : PreviewPolicy | None = None
+    preview_cache : Path = DEFAULT_PREVIEW_CACHE
+
+    # Upload the most important files first (see UPLOAD_ORDERS), choosing from the next lookahead files discovered
+    order : list[str] = []
+    lookahead : int = DEFAULT_LOOKAHEAD
+
+    # Upload only one file of each RAW+JPEG pair: its JPEG, or its RAW. None uploads both. Directories whose partners
+    # were skipped are not recorded as finished, so a later run which uploads both (e.g. on the home network) sends them.
+    prefer_pair : Literal['jpeg', 'raw'] | None = None
+
+    # Upload only the directories in this shard, of shards (see scripts.thumbnails.upload.shard)
+    shard : int = 0
+    shards : int = 1
+
+    # Seconds before the lease on a directory expires, if this process stops renewing it
+    lease_seconds : float = LEASE_SECONDS
+
+    # Cleared if the server does not support the bulk upload check
+    _precheck_supported : bool = PrivateAttr(default=True)
+    _concurrency : ConcurrencyController | None = PrivateAttr(default=None)
+    _failures : list[BaseException] = PrivateAttr(default_factory=list)
+    _failures_lock : threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _preview_generator : PreviewGenerator | None = PrivateAttr(default=None)
+    _album_batcher : AlbumBatcher | None = PrivateAttr(default=None)
+    _leases : LeaseKeeper | None = PrivateAttr(default=None)
+    _move_stage : MoveStage | None = PrivateAttr(default=None)
+
+    @property
+    def concurrency(self) -> ConcurrencyController:
+        if not self._concurrency:
+            # The controller needs at least one upload in flight
+            max_threads = max(1, self.max_threads)
+            if self.adaptive:
+                self._concurrency = ConcurrencyController(
+                    max(1, min(self.min_threads, max_threads)),
+                    max_threads,
+                    throughput=self.throughput.rate,
+                )
+            else:
+                # Keep a few files queued ahead of the workers
+                self._concurrency = ConcurrencyController(1, max_threads * 2, adaptive=False)
+        return self._concurrency
+
+    @property
+    def album_batcher(self) -> AlbumBatcher | None:
+        if self.album and not self._album_batcher:
+            self._album_batcher = AlbumBatcher(self.client, self.album, self.album_batch_size)
+        return self._album_batcher
+
+    def flush_album(self) -> None:
+        """
+        Add every asset collected so far to the album.
+        """
+        if self._album_batcher:
+            self._album_batcher.flush()
+
+    @property
+    def leases(self) -> LeaseKeeper:
+        if not self._leases:
+            self._leases = LeaseKeeper(self.lease_seconds)
+        return self._leases
+
+    def close_leases(self) -> None:
+        """
+        Stop renewing leases, and release any which are still held.
+        """
+        if self._leases:
+            self._leases.close()
+
+    def finish_directory(self, progress : DirectoryProgress) -> None:
+        """
+        Record that every upload in a directory finished: update its status if none failed, and release its lease.
+
+        Both are written after the file statuses queued before them.
+        """
+        if not progress.failed and not progress.partial:
+            self.status_store.after_pending(progress.update_status)
+        self.status_store.after_pending(lambda: self.leases.release(progress.directory))
+        if self._move_stage:
+            self._move_stage.flush_directory(progress.directory)
+
+    @property
+    def move_stage(self) -> MoveStage:
+        if not self._move_stage:
+            self._move_stage = MoveStage(self, self.move_after_upload)
+        return self._move_stage
+
+    def close_moves(self) -> None:
+        """
+        Wait for every file queued by handle_move_after_upload to be moved.
+        """
+        if self._move_stage:
+            self._move_stage.close()
+
+    @property
+    def preview_generator(self) -> PreviewGenerator:
+        if not self._preview_generator:
+            self._preview_generator = PreviewGenerator(self.previews or PreviewPolicy(), self.preview_cache)
+        return self._preview_generator
+
+    def prepare_previews(self, files : list[Path]) -> None:
+        """
+        Start generating previews of files which are about to be uploaded, so they are ready when a worker needs them.
+        """
+        if self.previews and not self.dry_run:
+            self.preview_generator.prepare({file: self.get_known_digest(file) for file in files})
+
+    def get_upload_source(self, image_path : Path) -> Path:
+        """
+        Get the file to send for image_path: its preview, if previews are enabled and the policy applies, or else the file itself.
+
+        Status, digests and moves are still recorded against image_path.
+        """
+        if not self.previews:
+            return image_path
+        return self.preview_generator.get(image_path, self.get_known_digest(image_path)) or image_path
+
+    def schedule(self, items : Iterable[T], *, get_path : Callable[[T], Path] | None = None) -> Iterator[T]:
+        """
+        Reorder files (or items containing them) by self.order, within a window of self.lookahead files.
+        """
+        return UploadScheduler(self.order, self.lookahead, get_path=get_path).schedule(items)
+
+    def close_previews(self) -> None:
+        if self._preview_generator:
+            self._preview_generator.close()
+
+    def get_skipped_partners(self, directory : Path, files : list[Path]) -> set[Path]:
+        """
+        Find the files of a directory which prefer_pair skips, because the other file of their RAW+JPEG pair is uploaded.
+
+        Args:
+            directory (Path): The directory.
+            files (list[Path]): Every file in the directory which would be uploaded, including previous uploads.
+        """
+        if not self.prefer_pair:
+            return set()
+
+        partners = set()
+        for group in index_pair_paths(directory, files).values():
+            if group.is_pair:
+                partners.update(group.raws if self.prefer_pair == 'jpeg' else group.jpegs)
+        return partners
+
+    def skip_partners(self, files : list[Path], partners : set[Path], statuses : dict[str, StatusOptions]) -> list[Path]:
+        """
+        Remove the skipped partners of RAW+JPEG pairs from files, recording them as PAIRED.
+
+        Returns:
+            list[Path]: The files which remain to be uploaded.
+        """
+        remaining = []
+        for file in files:
+            if file not in partners:
+                remaining.append(file)
+            elif statuses.get(file.name) != StatusOptions.PAIRED:
+                self.status_store.update_status(file, StatusOptions.PAIRED)
+                self.record_paired_file()
+        return remaining
+
     @property
     def files_uploaded(self) -> int:
         return self.get_stat('uploaded_file')
@@ -98,17 +330,32 @@ class ImmichProgressiveUploader(ImmichInterface):
     def record_duplicate_file(self, count : int = 1) -> None:
         self.record_stat('duplicate_file', count)
 
-    def _upload_file(self, image_path: Path, retries: int = 3) -> StatusOptions:
+    @property
+    def files_paired(self) -> int:
+        return self.get_stat('paired_file')
+
+    def record_paired_file(self, count : int = 1) -> None:
+        self.record_stat('paired_file', count)
+
+    @property
+    def files_previewed(self) -> int:
+        return self.get_stat('preview_file')
+
+    def record_preview_file(self, count : int = 1) -> None:
+        self.record_stat('preview_file', count)
+
+    def _upload_file(self, image_path: Path, retries: int = 3, *, filtered : bool = False) -> StatusOptions:
         """
         Upload a file to Immich.
 
         Args:
             image_path (Path): The file to upload.
+            filtered (bool): Whether the ignore filter already passed the file (e.g. it was found with scan_files).
 
         Returns:
             UploadStatus: The status of the upload operation.
         """
-        if self.should_ignore_file(image_path):
+        if self.should_ignore_file(image_path, filtered=filtered):
             logger.debug('Ignoring %s', image_path)
             return StatusOptions.SKIPPED
 
@@ -117,8 +364,122 @@ class ImmichProgressiveUploader(ImmichInterface):
         if self.check_dry_run('running immich upload'):
             return StatusOptions.UPLOADED
 
+        source = self.get_upload_source(image_path)
+        if self.backend == 'http':
+            status = self._upload_file_http(source, retries)
+        else:
+            status = self._upload_file_cli(source, retries)
+
+        # Immich has the preview, but not the original
+        if source != image_path and status in (StatusOptions.UPLOADED, StatusOptions.DUPLICATE):
+            return StatusOptions.PREVIEW
+        return status
+
+    def _upload_file_http(self, image_path: Path, retries: int = 3) -> StatusOptions:
+        """
+        Upload a file to Immich with the native HTTP client.
+
+        Args:
+            image_path (Path): The file to upload.
+            retries (int): The number of times to retry after a connection failure or a temporary server error.
+
+        Returns:
+            UploadStatus: The status of the upload operation.
+        """
+        filesize = self.file_size(image_path)
+        chunked = bool(self.large_file_size and filesize > self.large_file_size)
+
+        attempt = 0
+        while attempt <= retries:
+            try:
+                if chunked:
+                    result = self.upload_chunked(image_path)
+                else:
+                    result = self.client.upload_asset(image_path, self.get_known_digest(image_path))
+            except UploadError as e:
+                if chunked and e.status_code in (404, 405):
+                    logger.warning('Server does not support chunked uploads. Skipping large file %s', image_path)
+                    return StatusOptions.SKIPPED
+                if not e.retryable:
+                    logger.error('Failed to upload %s: %s', image_path, e)
+                    return StatusOptions.ERROR
+                reason = f'Server error {e.status_code}'
+            except requests.Timeout:
+                reason = 'Connection timed out'
+            except requests.ConnectionError:
+                reason = 'Connection failed'
+            else:
+                if result.status == StatusOptions.UPLOADED:
+                    # Chunks are recorded as they are sent
+                    if not chunked:
+                        self.record_bytes_uploaded(filesize, 'assets')
+                    logger.debug("Uploaded %s successfully.", image_path)
+                else:
+                    logger.debug("%s already uploaded.", image_path)
+
+                if self.album and result.asset_id:
+                    self.album_batcher.add(result.asset_id)
+
+                return result.status
+
+            logger.error('%s - Failed to upload %s', reason, image_path.name)
+            self.concurrency.record_timeout()
+            attempt += 1
+            if attempt <= retries:
+                logger.debug(f"Retrying upload in {self.retry_delay} seconds... (Attempt {attempt}/{retries})")
+                time.sleep(self.retry_delay)
+
+        logger.error('Max retries reached for %s.', image_path)
+        return StatusOptions.ERROR
+
+    def upload_chunked(self, image_path : Path) -> UploadResult:
+        """
+        Upload a large file in chunks, resuming an earlier, interrupted upload of the same file.
+
+        The server's offset is saved in the status database after every chunk, so an upload interrupted by a
+        dropped connection (or by stopping the script) continues from the last chunk the server received.
+
+        Raises:
+            UploadError: If the server rejected the upload.
+            requests.RequestException: If the connection failed.
+        """
+        stat = image_path.stat()
+        session = UploadSession.get(image_path, stat.st_size, stat.st_mtime)
+        # The offset the server had before the last chunk, to count the bytes each chunk sent
+        sent = session[1] if session else 0
+
+        def save_progress(upload_url : str, offset : int) -> None:
+            nonlocal sent
+            if offset > sent:
+                self.record_bytes_uploaded(offset - sent, 'chunked')
+            sent = offset
+            UploadSession.save(image_path, stat.st_size, stat.st_mtime, upload_url, offset)
+            self.progress_message(f'Uploading {image_path.name[-15:]} {offset * 100 // max(stat.st_size, 1)}%')
+
+        result = self.client.upload_asset_chunked(
+            image_path,
+            self.get_known_digest(image_path),
+            upload_url=session[0] if session else None,
+            on_progress=save_progress,
+        )
+        UploadSession.delete(image_path)
+        return result
+
+    def _upload_file_cli(self, image_path: Path, retries: int = 3) -> StatusOptions:
+        """
+        Upload a file to Immich by running the immich CLI.
+
+        Args:
+            image_path (Path): The file to upload.
+            retries (int): The number of times to retry after a connection failure.
+
+        Returns:
+            UploadStatus: The status of the upload operation.
+        """
         command = ["immich", "upload", image_path.as_posix()]
-        if self.album:
+        # If the checksum is known, the asset is added to the album in a batch later, instead of by this upload
+        album_checksum = self.get_known_digest(image_path) if self.album else None
+        if self.album and not album_checksum:
             command.extend(['-A', self.album])
 
         # Timeout is a minimum of 60 seconds, plus 10 seconds per MB
@@ -139,17 +500,21 @@ class ImmichProgressiveUploader(ImmichInterface):
                     text=True
                 )
                 output = result.stdout + result.stderr
-                self.record_bytes_uploaded(filesize)
-                
+
                 # Analyze the output
                 if "All assets were already uploaded" in output:
                     logger.debug("%s already uploaded.", image_path)
+                    if album_checksum:
+                        self.album_batcher.add_checksum(album_checksum)
                     return StatusOptions.DUPLICATE
                 if "Unsupported file type" in output:
                     logger.debug("Unsupported file type: %s", image_path)
                     return StatusOptions.ERROR
                 if "Successfully uploaded" in output:
+                    self.record_bytes_uploaded(filesize, 'cli')
                     logger.debug("Uploaded %s successfully.", image_path)
+                    if album_checksum:
+                        self.album_batcher.add_checksum(album_checksum)
                     return StatusOptions.UPLOADED
 
                 logger.info('Unknown output: %s', output)
@@ -170,10 +535,11 @@ class ImmichProgressiveUploader(ImmichInterface):
                 if reason:
                     # A known reason, so don't log the output
                     logger.error('%s - Failed to upload %s', reason, image_path.name)
+                    self.concurrency.record_timeout()
                     attempt += 1
                     if attempt <= retries:
-                        logger.debug(f"Retrying upload in 10 seconds... (Attempt {attempt}/{retries})")
-                        time.sleep(10)
+                        logger.debug(f"Retrying upload in {self.retry_delay} seconds... (Attempt {attempt}/{retries})")
+                        time.sleep(self.retry_delay)
                         continue
 
                     logger.error("Max retries reached for %s.", image_path)
@@ -185,12 +551,13 @@ class ImmichProgressiveUploader(ImmichInterface):
         logger.error('Max retries reached for %s.', image_path)
         return StatusOptions.ERROR
 
-    def upload_file_threadsafe(self, image_path: Path) -> StatusOptions:
+    def upload_file_threadsafe(self, image_path: Path, *, filtered : bool = False) -> StatusOptions:
         """
         Upload a file to Immich in a thread-safe manner.
 
         Args:
             image_path (Path): The file to upload.
+            filtered (bool): Whether the ignore filter already passed the file (e.g. it was found with scan_files).
 
         Returns:
             UploadStatus: The status of the upload operation.
@@ -202,18 +569,26 @@ class ImmichProgressiveUploader(ImmichInterface):
 
         for i in range(MAX_RETRIES):
             try:
-                result = self._upload_file(image_path)
+                started = time.monotonic()
+                result = self._upload_file(image_path, filtered=filtered)
+                if result in (StatusOptions.UPLOADED, StatusOptions.PREVIEW, StatusOptions.DUPLICATE, StatusOptions.ERROR):
+                    self.concurrency.record(
+                        time.monotonic() - started,
+                        self.file_size(self.get_upload_source(image_path)) if result in (StatusOptions.UPLOADED, StatusOptions.PREVIEW) else 0,
+                        error=result == StatusOptions.ERROR,
+                    )
 
                 match result:
                     case StatusOptions.UPLOADED:
                         self.record_upload_file()
-                        if self.db:
-                            self.db.mark_uploaded(image_path)
+                        self.mark_db_uploaded(image_path)
                         self.handle_move_after_upload(image_path)
                     case StatusOptions.DUPLICATE:
                         self.record_duplicate_file()
-                        if self.db:
-                            self.db.mark_uploaded(image_path)
+                        self.mark_db_uploaded(image_path)
+                    case StatusOptions.PREVIEW:
+                        # The original is not backed up yet, so it is not marked uploaded, or moved
+                        self.record_preview_file()
                     case StatusOptions.SKIPPED:
                         self.record_skip_file()
                     case StatusOptions.ERROR:
@@ -222,7 +597,7 @@ class ImmichProgressiveUploader(ImmichInterface):
                         logger.error('Unknown upload status: %s', result)
                         self.record_error()
 
-                FileStatus.update_status(image_path, result)
+                self.status_store.update_status(image_path, result, self.get_known_digest(image_path))
 
                 # Finished without an exception, so don't retry
                 break
@@ -237,6 +612,10 @@ class ImmichProgressiveUploader(ImmichInterface):
                 subdir = image_path.parent
                 self.progress_advance(f'/{str(subdir)[-25:]}/')
 
+        if self._preview_generator:
+            self._preview_generator.discard(image_path)
+        self.forget_file(image_path)
+
         # Sleep for 10ms after processing each file to reduce disk I/O pressure
         time.sleep(0.01)
         
@@ -244,7 +623,8 @@ class ImmichProgressiveUploader(ImmichInterface):
 
     def handle_move_after_upload(self, image_path : Path) -> None:
         """
-        Move a file after it has been uploaded to Immich.
+        Queue a file to be moved after it has been uploaded to Immich. Files are moved in batches by the move stage, when
+        their directory finishes, so the upload worker doesn't wait for the filesystem.
 
         Args:
             image_path (Path): The file to move.
@@ -252,16 +632,7 @@ class ImmichProgressiveUploader(ImmichInterface):
         if not self.move_after_upload:
             return
 
-        target_directory = self.move_after_upload
-        if not target_directory.absolute():
-            target_directory = image_path.parent.absolute() / target_directory
-        if not target_directory.exists():
-            self.mkdir(target_directory)
-
-        destination = target_directory / image_path.name
-
-        self.move_file(image_path, destination, rename_on_collision=True)
-        logger.info("Moved %s to %s", image_path, destination)
+        self.move_stage.add(image_path)
 
     def _wait_retry(self, loop : int = 1, message : str = 'Attempt failed') -> None:
         """
@@ -280,10 +651,140 @@ class ImmichProgressiveUploader(ImmichInterface):
 
         time.sleep(wait)
 
+    def get_file_digest(self, image_path : Path, cached : dict[str, tuple[int, float, str]]) -> tuple[Path, int, float, str, bool]:
+        """
+        Get the SHA-1 digest of a file, reusing a cached digest if the file has not changed.
+
+        Args:
+            image_path (Path): The file.
+            cached (dict): The cached digests for the file's directory, from FileDigest.get_directory.
+
+        Returns:
+            tuple: (image_path, size, mtime, sha1, was_calculated)
+        """
+        if not (known_stat := self.get_known_stat(image_path)):
+            stat = image_path.stat()
+            known_stat = (stat.st_size, stat.st_mtime)
+        size, mtime = known_stat
+
+        if (known := self.get_known_digest(image_path)):
+            return image_path, size, mtime, known, False
+
+        if (record := cached.get(image_path.name)) and record[0] == size and record[1] == mtime:
+            return image_path, size, mtime, record[2], False
+
+        self.progress_message(f'Hashing {image_path.name[-15:]}')
+        return image_path, size, mtime, self.hash_file(image_path, hashing_algorithm='sha1'), True
+
+    def precheck_files(self, files : list[Path], *, filtered : bool = False) -> list[Path]:
+        """
+        Drop files which Immich already has, before any of their bytes are sent.
+
+        SHA-1 digests are calculated in parallel (or loaded from the digest cache), and sent to Immich's bulk upload check
+        in batches. Duplicates are recorded as DUPLICATE, and the digests of the remaining files are remembered, so they
+        are sent with the upload.
+
+        Args:
+            files (list[Path]): The files which are about to be uploaded.
+            filtered (bool): Whether the ignore filter already passed the files (e.g. they were found with scan_files).
+
+        Returns:
+            list[Path]: The files which still need to be uploaded, in their original order.
+        """
+        if not self.precheck or not self._precheck_supported or self.dry_run or not files:
+            return files
+
+        # Ignored files are passed through untouched, and are skipped by the upload workers as usual
+        candidates = [f for f in files if not self.should_ignore_file(f, filtered=filtered)]
+        if not candidates:
+            return files
+
+        cached : dict[Path, dict[str, tuple[int, float, str]]] = {}
+        for directory in {f.parent for f in candidates}:
+            cached[directory] = FileDigest.get_directory(directory)
+
+        self.progress_message(f'Hashing {len(candidates)} files')
+        digests : dict[str, str] = {}
+        calculated : list[tuple[Path, int, float, str]] = []
+        with ThreadPoolExecutor(max_workers=self.max_threads) as executor:
+            futures = [executor.submit(self.get_file_digest, f, cached[f.parent]) for f in candidates]
+            for future in as_completed(futures):
+                try:
+                    image_path, size, mtime, sha1, was_calculated = future.result()
+                except OSError as e:
+                    # The upload worker will report it
+                    logger.debug('Unable to hash file before upload: %s', e)
+                    continue
+                digests[str(image_path)] = sha1
+                self.remember_digest(image_path, sha1)
+                if was_calculated:
+                    calculated.append((image_path, size, mtime, sha1))
+
+        FileDigest.save_many(calculated)
+
+        self.progress_message(f'Checking {len(digests)} files')
+        try:
+            results = self.client.bulk_upload_check(digests)
+        except requests.RequestException as e:
+            logger.warning('Bulk upload check failed, so uploading without it: %s', e)
+            self._precheck_supported = False
+            return files
+
+        rejected : set[str] = set()
+        for path_str, result in results.items():
+            if result.action != 'reject':
+                continue
+
+            image_path = Path(path_str)
+            rejected.add(path_str)
+            # Not submitted for upload, so nothing else needs what was remembered about it
+            self.forget_file(image_path)
+            if result.is_duplicate:
+                logger.debug("%s already uploaded.", image_path)
+                self.record_duplicate_file()
+                self.mark_db_uploaded(image_path)
+                if self.album and result.asset_id:
+                    self.album_batcher.add(result.asset_id)
+                self.status_store.update_status(image_path, StatusOptions.DUPLICATE, digests[path_str])
+            else:
+                logger.error('Immich will not accept %s: %s', image_path, result.reason)
+                self.record_error()
+                self.status_store.update_status(image_path, StatusOptions.ERROR, digests[path_str])
+            self.progress_advance(f'/{str(image_path.parent)[-25:]}/')
+
+        if rejected:
+            logger.info('Skipping %d files which are already in Immich', len(rejected))
+        return [f for f in files if str(f) not in rejected]
+
+    def yield_prechecked(self, files : Iterable[Path], *, filtered : bool = False) -> Iterator[Path]:
+        """
+        Pre-check files in batches as they are read, and yield the ones that still need to be uploaded.
+
+        Args:
+            files (Iterable[Path]): The files to upload.
+            filtered (bool): Whether the ignore filter already passed the files.
+
+        Yields:
+            Path: The next file which Immich does not already have.
+        """
+        batch : list[Path] = []
+        for filepath in files:
+            batch.append(filepath)
+            if len(batch) >= BULK_CHECK_BATCH_SIZE:
+                yield from self.precheck_files(batch, filtered=filtered)
+                batch = []
+
+        yield from self.precheck_files(batch, filtered=filtered)
+
     def upload(self, directory: Path | None = None, *, recursive: bool = True):
         """
         Upload files to Immich.
 
+        Directories are searched while earlier files are still uploading, and every file goes to the same pool of
+        workers, in the order chosen by self.order. A directory whose digest matches the one stored when it was last
+        uploaded is passed over without querying the statuses of its files. Each directory's status is updated once its
+        last file finishes.
+
         Args:
             directory (Path): The directory to upload.
             recursive (bool): Whether to upload recursively.
@@ -298,61 +799,306 @@ class ImmichProgressiveUploader(ImmichInterface):
         if not self.exists(directory):
             raise FileNotFoundError(f"Directory {directory} does not exist.")
 
+        globs = self.get_glob_patterns()
+
         with alive_bar(title=f"{CYAN2}Uploading{RESET} {str(directory.absolute())[-25:]}/", unit='files', dual_line=True, unknown='waves') as self._progress_bar:
             self.progress_message('Searching...')
-            
-            for subdir in self.yield_directories(directory, recursive=recursive):
-                self.progress_message(f'Counting files in {subdir.name}')
-                last_modified_time = self.get_last_modified_time(subdir)
-                files_to_upload = self.get_all_files(subdir, recursive=False)
-                file_count = len(files_to_upload)
-
-                if DirectoryStatus.has_directory_changed(subdir, file_count, last_modified_time, self.get_glob_patterns()):
-                    logger.info('Skipping subdir because it has not changed since last upload: %s', subdir)
-                    continue
-                
-                self.progress_message(f'{file_count} files queued')
-
-                # Remove previous uploads from the list
-                successful_uploads = FileStatus.get_all_status(subdir, StatusOptions.UPLOADED)
-                files_to_upload = [f for f in files_to_upload if f not in successful_uploads]
-                if (files_to_upload_count := len(files_to_upload)) < 1:
-                    logger.debug('Pruned all files from %s', subdir)
+
+            # One query for every digest below the directory, instead of one per directory
+            stored_digests = DirectoryStatus.get_digests(directory, globs)
+
+            # One pool for the whole run, so workers stay busy across directory boundaries
+            with ThreadPoolExecutor(max_workers=self.max_threads) as executor:
+                try:
+                    uploads = self.yield_directory_uploads(directory, stored_digests, globs, recursive=recursive)
+                    for filepath, progress in self.schedule(uploads, get_path=lambda upload: upload[0]):
+                        if self._failures:
+                            break
+                        self.submit_upload(executor, filepath, progress, filtered=True)
+                except BaseException:
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    raise
+
+        self.status_store.flush()
+        self.close_leases()
+        self.flush_album()
+        self.close_moves()
+        self.raise_upload_failure()
+
+    def yield_directory_uploads(
+        self,
+        directory : Path,
+        stored_digests : dict[str, str | None],
+        globs : list[str],
+        *,
+        recursive : bool = True,
+    ) -> Iterator[tuple[Path, DirectoryProgress]]:
+        """
+        Walk a tree for files to upload, one directory at a time, listing each directory only when the last one is queued.
+
+        Directories with nothing left to upload have their status recorded here. Every other file is yielded with the
+        progress of its directory.
+
+        Directories which haven't changed since they were uploaded, are in other shards, or are leased by another
+        upload process, are skipped.
+        """
+        if self.should_ignore_directory(directory):
+            return
+
+        for listing in tree.walk(directory, recursive=recursive, should_ignore_directory=self.should_ignore_directory):
+            if self._failures:
+                return
+
+            subdir, key = listing.path, listing.key
+            if self.shards > 1 and shard_of(subdir, directory, self.shards) != self.shard:
+                continue
+
+            # Unchanged since it was uploaded. Its subdirectories are still checked, as the walk reaches them.
+            if (digest := listing.digest) and stored_digests.get(key) == digest:
+                continue
+
+            if not self.leases.acquire(subdir):
+                logger.info('Skipping %s, which another upload process is working on', subdir)
+                continue
+
+            self.progress_message(f'Counting files in {subdir.name}')
+            last_modified_time = self.get_last_modified_time(subdir)
+            files_to_upload = self.scan_files(subdir)
+            file_count = len(files_to_upload)
+            partners = self.get_skipped_partners(subdir, files_to_upload)
+
+            # Records from before digests were stored fall back to the file count and modification time
+            if key in stored_digests and stored_digests[key] is None and DirectoryStatus.has_directory_changed(subdir, file_count, last_modified_time, globs):
+                logger.info('Skipping subdir because it has not changed since last upload: %s', subdir)
+                self.finish_directory(DirectoryProgress(subdir, file_count, last_modified_time, globs, 0, digest))
+                continue
+
+            # Remove previous uploads from the list. This loads the statuses of the whole directory at once.
+            statuses = self.status_store.load_directory(subdir)
+            files_to_upload = [f for f in files_to_upload if statuses.get(f.name) != StatusOptions.UPLOADED]
+
+            # Partners uploaded by an earlier run were pruned above, and don't leave the directory unfinished
+            partial = any(f in partners for f in files_to_upload)
+            if partners:
+                files_to_upload = self.skip_partners(files_to_upload, partners, statuses)
+
+            # Originals which only had a preview sent wait for a run without previews, e.g. on the home network
+            if self.previews:
+                remaining = [f for f in files_to_upload if statuses.get(f.name) != StatusOptions.PREVIEW]
+                partial = partial or len(remaining) < len(files_to_upload)
+                files_to_upload = remaining
+
+            if (files_to_upload_count := len(files_to_upload)) < 1:
+                logger.debug('Pruned all files from %s', subdir)
+                self.finish_directory(DirectoryProgress(subdir, file_count, last_modified_time, globs, 0, digest, partial=partial))
+                continue
+            if (pruned_count := file_count - files_to_upload_count) > 0:
+                logger.info('Pruned %d files from %s', pruned_count, subdir)
+
+            files_to_upload = self.precheck_files(files_to_upload, filtered=True)
+            progress = DirectoryProgress(subdir, file_count, last_modified_time, globs, len(files_to_upload), digest, partial=partial)
+            if not files_to_upload:
+                logger.debug('All files in %s are already in Immich', subdir)
+                self.finish_directory(progress)
+                continue
+
+            self.progress_message(f'{len(files_to_upload)} files queued')
+            self.queue_files(files_to_upload)
+            self.prepare_previews(files_to_upload)
+            for filepath in files_to_upload:
+                yield filepath, progress
+
+    def get_queued_size(self, filepath : Path) -> int:
+        """
+        The size a file counts towards the bytes remaining to upload, from the cached stat, so it is the same when the
+        file is queued and when it finishes.
+        """
+        try:
+            return self.file_size(filepath)
+        except OSError:
+            # Reported by the upload
+            return 0
+
+    def queue_files(self, files : Iterable[Path]) -> None:
+        """
+        Count files towards the bytes remaining to upload as soon as they are found, so the estimated time remaining
+        covers every file found so far, and not only the uploads in flight. submit_upload expects this.
+        """
+        for filepath in files:
+            self.throughput.queue(self.get_queued_size(filepath))
+
+    def yield_queued(self, files : Iterable[Path]) -> Iterator[Path]:
+        """
+        Queue files with queue_files as they are read, ahead of the scheduler's window.
+        """
+        for filepath in files:
+            self.queue_files([filepath])
+            yield filepath
+
+    def submit_upload(self, executor : ThreadPoolExecutor, filepath : Path, progress : DirectoryProgress | None = None, *, filtered : bool = False) -> Future:
+        """
+        Queue a file for upload, once the concurrency controller allows another upload in flight.
+
+        Args:
+            executor (ThreadPoolExecutor): The pool of upload workers.
+            filepath (Path): The file to upload.
+            progress (DirectoryProgress): The directory the file belongs to, if its status should be updated when done.
+            filtered (bool): Whether the ignore filter already passed the file (e.g. it was found with scan_files).
+
+        Returns:
+            Future: The future for upload_file_threadsafe.
+        """
+        # Counted towards the estimated time remaining since it was found (see queue_files), until it finishes
+        size = self.get_queued_size(filepath)
+        self.concurrency.acquire()
+        try:
+            future = executor.submit(self.upload_file_threadsafe, filepath, filtered=filtered)
+        except BaseException:
+            self.concurrency.release()
+            self.throughput.dequeue(size)
+            raise
+        future.add_done_callback(lambda f: self.finish_upload(f, progress, size))
+        return future
+
+    def finish_upload(self, future : Future, progress : DirectoryProgress | None = None, size : int = 0) -> None:
+        """
+        Handle a finished upload. Runs on the worker thread, as soon as the upload finishes.
+
+        Exceptions are saved, and re-raised on the main thread by raise_upload_failure.
+        """
+        status = None
+        try:
+            if (failed := future.cancelled()):
+                return
+            status = self.handle_upload_future(future)
+        except BaseException as e:
+            with self._failures_lock:
+                self._failures.append(e)
+            failed = True
+        finally:
+            self.concurrency.release()
+            self.throughput.dequeue(size)
+            if progress and progress.finish(failed=failed, partial=status == StatusOptions.PREVIEW):
+                # The DirectoryStatus is updated IFF every file finished without error
+                self.finish_directory(progress)
+                self.flush_album()
+
+    def raise_upload_failure(self) -> None:
+        """
+        Re-raise the first exception raised by an upload worker, if any.
+        """
+        with self._failures_lock:
+            failures = self._failures
+            self._failures = []
+        if failures:
+            raise failures[0]
+
+    def handle_upload_future(self, future : Future) -> StatusOptions | None:
+        """
+        Wait for an upload to finish, and handle any exceptions it raised.
+
+        Args:
+            future (Future): The future returned by submitting upload_file_threadsafe.
+
+        Returns:
+            StatusOptions: The status of the upload, or None if the host remained down.
+        """
+        for i in range(MAX_RETRIES):
+            try:
+                return future.result()
+            except OSError as ose:
+                # Catch error 112 (host is down) and retry
+                if ose.errno == 112:
+                    self._wait_retry(i, "Host is down")
                     continue
-                if (pruned_count := file_count - files_to_upload_count) > 0:
-                    logger.info('Pruned %d files from %s', pruned_count, subdir)
+                raise
+            except Exception as e:
+                # Catch, report, and re-raise
+                self.record_error()
+                logger.error("Exception during upload: %s", e)
+                logger.exception(e)
+                raise
 
-                with ThreadPoolExecutor(max_workers=self.max_threads) as executor:
-                    # initialize the start time for calculating upload speed
-                    self._start_ns = time.time_ns()
-                    
-                    futures = []
-                    for filepath in files_to_upload:
-                        future = executor.submit(self.upload_file_threadsafe, filepath)
-                        futures.append(future)
-
-                    for future in as_completed(futures):
-                        for i in range(MAX_RETRIES):
-                            try:
-                                future.result()    
-                            except OSError as ose:
-                                # Catch error 112 (host is down) and retry
-                                if ose.errno == 112:
-                                    self._wait_retry(i, "Host is down")
-                                    continue
-                                raise
-                            except Exception as e:
-                                # Catch, report, and re-raise
-                                self.record_error()
-                                logger.error("Exception during upload: %s", e)
-                                logger.exception(e)
-                                raise
-                                                    
-                            # Finished without an exception, so don't retry
+        return None
+
+    def upload_files(self, files : Iterable[Path], title : str = 'Uploading files', *, filtered : bool = False) -> None:
+        """
+        Upload an explicit set of files to Immich, without searching any directories.
+
+        Files are streamed into the upload workers as they are read, so the first upload starts immediately and only a
+        few files are held in memory at a time.
+
+        Args:
+            files (Iterable[Path]): The files to upload.
+            title (str): The title of the progress bar.
+            filtered (bool): Whether the ignore filter already passed the files.
+
+        Raises:
+            AuthenticationError: If authentication fails with Immich
+        """
+        if not self._authenticated:
+            self.authenticate()
+
+        with alive_bar(title=f"{CYAN2}{title}{RESET}", unit='files', dual_line=True, unknown='waves') as self._progress_bar:
+            self.progress_message('Reading file list...')
+
+            with ThreadPoolExecutor(max_workers=self.max_threads) as executor:
+                try:
+                    for filepath in self.schedule(self.yield_queued(self.yield_prechecked(files, filtered=filtered))):
+                        if self._failures:
                             break
+                        self.submit_upload(executor, filepath, filtered=filtered)
+                except BaseException:
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    raise
+
+        self.status_store.flush()
+        self.flush_album()
+        self.close_moves()
+        self.raise_upload_failure()
+
+    def yield_manifest_files(self, manifest_path : str | Path) -> Iterator[Path]:
+        """
+        Yield the files recorded in a manifest written by organize, remembering their sizes, modification times and
+        digests along the way.
 
-                # IFF we finish looping without error, update the DirectoryStatus
-                DirectoryStatus.update(subdir, file_count, last_modified_time, self.get_glob_patterns())
+        The same ignore rules are applied as when searching a directory, using the sizes in the manifest, so the files
+        are not stat'd again before they are read for upload.
+
+        Args:
+            manifest_path (str | Path): The path to the manifest.
+
+        Yields:
+            Path: The next file in the manifest which should be included.
+        """
+        for entry in read_manifest(manifest_path):
+            if (reason := self.ignore_filter.reason(entry.path, size=entry.size)):
+                logger.debug('Skipping manifest entry %s (%s)', entry.path, reason)
+                continue
+
+            self.remember_stat(entry.path, entry.size, entry.mtime)
+            if entry.digest and entry.algorithm == 'sha1':
+                self.remember_digest(entry.path, entry.digest)
+
+            yield entry.path
+
+    def upload_manifest(self, manifest_path : str | Path) -> None:
+        """
+        Upload exactly the files recorded in a manifest written by organize.
+
+        Args:
+            manifest_path (str | Path): The path to the manifest.
+        """
+        self.upload_files(self.yield_manifest_files(manifest_path), title=f'Uploading files from {Path(manifest_path).name[-20:]}', filtered=True)
+
+    def upload_listed(self, file_list : str | Path) -> None:
+        """
+        Upload the files in a NUL-delimited file list, applying the same include and ignore rules as a directory upload.
+
+        Args:
+            file_list (str | Path): The path to the file list, or '-' for stdin.
+        """
+        self.upload_files(self.yield_listed_files(file_list), title=f'Uploading files from {str(file_list)[-20:]}')
 
     def upload_from_db(self):
         """
@@ -368,26 +1114,46 @@ class ImmichProgressiveUploader(ImmichInterface):
 
         with alive_bar(total=total, title=f"{CYAN2}Uploading from db{RESET}", unit='files', dual_line=True, unknown='waves') as self._progress_bar:
             self.progress_message('Searching DB...')
-            
-            with ThreadPoolExecutor(max_workers=self.max_threads) as executor:
-                futures = []
-                for image_path in self.db.get_images(uploaded=False):
-                    # Ensure the image still exists
-                    if not self.exists(image_path):
-                        logger.warning("File %s no longer exists.", image_path)
-                        continue
 
-                    future = executor.submit(self.upload_file_threadsafe, image_path)
-                    futures.append(future)
-
-                for future in as_completed(futures):
-                    try:
-                        future.result()
-                    except Exception as e:
-                        # Catch, report, and re-raise
-                        self.record_error()
-                        logger.error("Exception during upload: %s", e)
-                        raise
+            # Rows are read in batches, checked for existence ahead of the uploads, and submitted as workers free up
+            with ThreadPoolExecutor(max_workers=self.max_threads) as executor:
+                try:
+                    for image_path in self.schedule(self.yield_queued(self.yield_existing(self.db.get_images(uploaded=False)))):
+                        if self._failures:
+                            break
+                        self.submit_upload(executor, image_path)
+                except BaseException:
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    raise
+
+        self.status_store.flush()
+        self.flush_db()
+        self.flush_album()
+        self.close_moves()
+        self.raise_upload_failure()
+
+    def yield_existing(self, paths : Iterable[Path]) -> Iterator[Path]:
+        """
+        Yield the paths which exist, in order. Up to EXISTS_QUEUE_SIZE paths are checked in parallel, ahead of the
+        caller, so slow (network) drives are not checked one file at a time.
+        """
+        pending : deque[tuple[Path, Future]] = deque()
+        with ThreadPoolExecutor(max_workers=max(4, self.max_threads)) as executor:
+            def next_existing() -> Path | None:
+                image_path, future = pending.popleft()
+                if future.result():
+                    return image_path
+                logger.warning("File %s no longer exists.", image_path)
+                return None
+
+            for image_path in paths:
+                pending.append((image_path, executor.submit(self.exists, image_path)))
+                if len(pending) >= EXISTS_QUEUE_SIZE and (existing := next_existing()):
+                    yield existing
+
+            while pending:
+                if (existing := next_existing()):
+                    yield existing
 
     def handle_sd_card(self, directory : Path | str = '') -> bool:
         """
@@ -448,6 +1214,10 @@ class ImmichProgressiveUploader(ImmichInterface):
             file_buffer.append(f'{self.files_uploaded} uploaded')
         if self.files_duplicated > 0:
             file_buffer.append(f'{self.files_duplicated} duplicates')
+        if self.files_paired > 0:
+            file_buffer.append(f'{self.files_paired} paired')
+        if self.files_previewed > 0:
+            file_buffer.append(f'{self.files_previewed} previews')
         if self.files_moved > 0:
             file_buffer.append(f'{self.files_moved} moved')
         if self.files_deleted > 0:
@@ -469,6 +1239,8 @@ class ImmichProgressiveUploader(ImmichInterface):
         upload_speed = self.get_upload_speed()
         if upload_speed:
             speed_str = f"{BLUE}{upload_speed} MB/s{RESET}"
+            if (eta := self.throughput.eta()):
+                speed_str = f"{BLUE}{upload_speed} MB/s, {seconds_to_human(eta)} left{RESET}"
             buffer.append(f"{speed_str:10s}")
         
         if file_buffer:
@@ -495,139 +1267,11 @@ class ImmichProgressiveUploader(ImmichInterface):
         else:
             self.upload()
 
-class ArgNamespace(argparse.Namespace):
-    """
-    A custom namespace class for argparse.
-    """
-    url: str
-    api_key: str
-    allow_extension: list[str]
-    ignore_extension: list[str]
-    ignore_path: list[str]
-    max_threads: int
-    verbose: bool
-    templates: list[str]
-    sd: bool
-    use_db: bool
-    db_path : str | Path
-    import_path: str
-    album : str
-    skip : bool
-    move_after_upload : str | None = None
-    
-def validate_args(args: ArgNamespace) -> bool:
-    """
-    Validate the arguments passed to the script.
-
-    Args:
-        args (argparse.Namespace): The arguments passed to the script.
-
-    Returns:
-        bool: True if the arguments are valid, False otherwise
-    """
-    if not args.url or not args.api_key:
-        logger.error("IMMICH_INSTANCE_URL and IMMICH_API_KEY must be set.")
-        return False
-
-    if not args.sd and not args.import_path:
-        logger.error("IMAGEINN_THUMBNAILS_DIR must be set if not uploading from an SD card.")
-        return False
-
-    return True
-
 def main():
     """
-    Called when the script is run from the command line. Parses arguments and uploads files to Immich.
+    Called when the script is run from the command line. See scripts.thumbnails.upload.cli.
     """
-    try:
-        load_dotenv()
-
-        api_key = os.getenv("IMMICH_API_KEY")
-        thumbnails_dir = os.getenv("IMMICH_THUMBNAILS_DIR", '.')
-        
-        url = os.getenv("IMMICH_INSTANCE_URL")
-        if home_network := ImmichProgressiveUploader.is_home_network():
-            url = os.getenv("IMMICH_LOCAL_URL")
-
-        parser = argparse.ArgumentParser(description="Upload files to Immich.")
-        parser.add_argument("--url", help="Immich URL", default=url)
-        parser.add_argument("--api-key", help="Immich API key", default=api_key)
-        parser.add_argument('--allow-extension', '-e', help="Allow only files with these extensions", nargs='+')
-        parser.add_argument("--ignore-extension", help="Ignore files with these extensions", nargs='+')
-        parser.add_argument('--ignore-path', help="Ignore files with these paths", nargs='+')
-        parser.add_argument('--max-threads', type=int, default=0, help="Maximum number of threads for concurrent uploads")
-        parser.add_argument('--verbose', '-v', action='store_true', help="Verbose output")
-        parser.add_argument('--templates', '-T', help="File templates to match", nargs='+')
-        parser.add_argument('--sd', help="Upload files from an SD card", action='store_true')
-        parser.add_argument('--use_db', action='store_true', help='Use the SQLite database to retrieve upload targets')
-        parser.add_argument('--db-path', help='Path to the SQLite database', default=DEFAULT_DB_PATH)
-        parser.add_argument('--album', '-A', help='Immich album to upload files to')
-        parser.add_argument('--skip', help='Skip assets that were previously uploaded.', action='store_true')
-        parser.add_argument('--move-after-upload', help='Move files to this directory after uploading', default=None)
-        parser.add_argument("import_path", nargs='?', default=thumbnails_dir, help="Path to import files from")
-        args = parser.parse_args(namespace=ArgNamespace())
-
-        if args.verbose:
-            logger.setLevel(logging.DEBUG)
-
-        if not validate_args(args):
-            sys.exit(1)
-
-        templates = []
-        if args.templates:
-            template : str
-            for template in args.templates:
-                match template.lower():
-                    case 'pixel':
-                        templates.append(PixelFiles)
-                    case _:
-                        logger.error("Unknown template: %s. See --help for available templates.", template)
-                        sys.exit(1)
-
-        immich = ImmichProgressiveUploader(
-            url=args.url,
-            api_key=args.api_key,
-            directory=args.import_path,
-            ignore_extensions=args.ignore_extension,
-            ignore_paths=args.ignore_path,
-            extensions=args.allow_extension,
-            templates=templates,
-            use_db=args.use_db,
-            db_path=args.db_path,
-            album=args.album,
-            skip=args.skip,
-            max_threads=args.max_threads,
-            # Cloudflare prevents uploads over 100MB. 
-            # ...On the local network, disable skipping large files.
-            # ...Everywhere else, use the default large file size of 100MB.
-            large_file_size = 0 if home_network else (1024 * 1024 * 100),
-            move_after_upload=args.move_after_upload
-        )
-
-        try:
-            if args.sd:
-                immich.handle_sd_card()
-            else:
-                immich.run()
-
-        except AuthenticationError:
-            logger.error("Authentication failed. Check your API key and URL.")
-            sys.exit(1)
-        except (FileNotFoundError, FileExistsError, AppError) as e:
-            logger.error('Exiting. %s', e)
-            raise
-            sys.exit(1)
-        finally:
-            logger.info("Stats: %d uploaded, %d skipped, %d duplicates, %d errors",
-                immich.files_uploaded,
-                immich.files_skipped,
-                immich.files_duplicated,
-                immich.errors
-            )
-    except KeyboardInterrupt:
-        logger.info("Upload cancelled by user.")
-
-    sys.exit(0)
+    cli.main()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,120 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+    Choose which discovered files to upload first.
+
+    Files are discovered one directory at a time, oldest backlog first. The scheduler holds a bounded window of
+    discovered files in a priority queue, and releases the most important one each time another is discovered, so the
+    important uploads start early without listing the whole tree first.
+
+    Orders:
+        newest:         Most recently modified first. Cameras set the modification time to the capture time.
+        smallest:       Smallest first, so a few huge videos don't hold up everything else.
+        round-robin:    One file from each directory in the window in turn, instead of one directory at a time.
+
+    Orders can be combined. Later orders break ties in earlier ones, e.g. ['round-robin', 'newest'].
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    schedule.py                                                                                          *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+from __future__ import annotations
+import heapq
+import itertools
+import logging
+import os
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, Generic, Iterable, Iterator, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+UPLOAD_ORDERS = ['newest', 'smallest', 'round-robin']
+
+# The number of discovered files held back to choose from
+DEFAULT_LOOKAHEAD = 1000
+
+class UploadScheduler(Generic[T]):
+    """
+    Reorder a stream of files within a bounded lookahead window.
+
+    Args:
+        orders: The orders to apply, most significant first. With no orders, files keep the order they were discovered in.
+        lookahead: The number of files held back to choose from.
+        get_path: Get the file from an item of the stream, if the items are not paths.
+    """
+    def __init__(self, orders : Iterable[str] = (), lookahead : int = DEFAULT_LOOKAHEAD, *, get_path : Callable[[T], Path] | None = None):
+        self.orders = list(orders)
+        if (unknown := [order for order in self.orders if order not in UPLOAD_ORDERS]):
+            raise ValueError(f"Unknown upload order: {', '.join(unknown)}. Choose from {', '.join(UPLOAD_ORDERS)}.")
+        if lookahead < 1:
+            raise ValueError(f"Invalid lookahead: {lookahead}")
+
+        self.lookahead = lookahead
+        self.get_path = get_path or (lambda item: item)
+        # The number of files from each directory queued so far, for round-robin
+        self._queued : defaultdict[Path, int] = defaultdict(int)
+
+    def get_key(self, path : Path) -> tuple:
+        """
+        Get the sort key of a file. Smaller keys are uploaded first.
+        """
+        stat = None
+        if 'newest' in self.orders or 'smallest' in self.orders:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # Upload (and report) missing files last
+                return (1,)
+
+        key : list[float] = [0]
+        for order in self.orders:
+            match order:
+                case 'newest':
+                    key.append(-stat.st_mtime)
+                case 'smallest':
+                    key.append(stat.st_size)
+                case 'round-robin':
+                    # The nth file of every directory is uploaded before the n+1th of any of them
+                    key.append(self._queued[path.parent])
+                    self._queued[path.parent] += 1
+        return tuple(key)
+
+    def schedule(self, items : Iterable[T]) -> Iterator[T]:
+        """
+        Yield the items in order of priority, holding at most lookahead items at a time.
+
+        Items are pulled from the stream lazily, so a slow directory search runs alongside the uploads.
+        """
+        if not self.orders:
+            yield from items
+            return
+
+        # The sequence number keeps equal keys in discovery order, and avoids comparing the items themselves
+        sequence = itertools.count()
+        heap : list[tuple[tuple, int, T]] = []
+        for item in items:
+            heapq.heappush(heap, (self.get_key(self.get_path(item)), next(sequence), item))
+            if len(heap) >= self.lookahead:
+                yield heapq.heappop(heap)[2]
+
+        while heap:
+            yield heapq.heappop(heap)[2]
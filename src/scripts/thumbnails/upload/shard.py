@@ -0,0 +1,157 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+    Upload one tree with several processes, without uploading any directory twice.
+
+    With --workers N, the upload command starts N copies of itself, each with --shard set to its index. Every copy
+    scans the whole tree, but only uploads the directories whose path hashes to its shard, so the shards don't overlap
+    and stay the same from one run to the next.
+
+    Before uploading a directory, a process leases it in the status database. Other processes (including uploads
+    started by hand on an overlapping tree) skip directories leased by someone else. Leases are renewed by a heartbeat,
+    and expire if their owner stops, so a crashed process never blocks a directory for long.
+
+    Each process writes its statuses through its own single writer thread, in batched transactions, so the processes
+    rarely wait on each other for SQLite's write lock.
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    shard.py                                                                                             *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+from __future__ import annotations
+import hashlib
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from scripts.thumbnails.upload.meta import LEASE_SECONDS
+from scripts.thumbnails.upload.status import DirectoryLease
+
+logger = logging.getLogger(__name__)
+
+def shard_of(directory : Path, root : Path, shards : int) -> int:
+    """
+    Choose the shard which uploads a directory, from a hash of its path relative to the root of the upload.
+
+    Unlike hash(), the result is the same in every process, and on every run.
+    """
+    try:
+        relative = directory.absolute().relative_to(root.absolute()).as_posix()
+    except ValueError:
+        relative = directory.absolute().as_posix()
+    digest = hashlib.sha1(relative.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % shards
+
+class LeaseKeeper:
+    """
+    Hold leases on directories for one process, and renew them in the background until they are released.
+
+    Args:
+        seconds: How long a lease lasts without being renewed.
+        owner: The name of the owner of the leases. Defaults to the host name and process id.
+    """
+    def __init__(self, seconds : float = LEASE_SECONDS, owner : str | None = None):
+        self.seconds = seconds
+        self.owner = owner or f'{socket.gethostname()}:{os.getpid()}'
+        self._held : set[Path] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._heartbeat : threading.Thread | None = None
+
+    @property
+    def held(self) -> set[Path]:
+        with self._lock:
+            return set(self._held)
+
+    def acquire(self, directory : Path) -> bool:
+        """
+        Lease a directory, unless another process holds it.
+
+        Returns:
+            bool: True if this process holds the lease.
+        """
+        if not DirectoryLease.acquire(directory, self.owner, self.seconds):
+            return False
+
+        with self._lock:
+            self._held.add(directory)
+            if self._heartbeat is None:
+                self._stop.clear()
+                self._heartbeat = threading.Thread(target=self._renew_loop, name='LeaseHeartbeat', daemon=True)
+                self._heartbeat.start()
+        return True
+
+    def release(self, directory : Path) -> None:
+        with self._lock:
+            self._held.discard(directory)
+        DirectoryLease.release(self.owner, directory)
+
+    def close(self) -> None:
+        """
+        Stop renewing, and release every lease.
+        """
+        with self._lock:
+            heartbeat, self._heartbeat = self._heartbeat, None
+            held, self._held = self._held, set()
+
+        if heartbeat is None:
+            return
+        self._stop.set()
+        heartbeat.join()
+        if held:
+            DirectoryLease.release(self.owner)
+
+    def _renew_loop(self) -> None:
+        # Renew well before the leases expire, so one slow write doesn't lose them
+        while not self._stop.wait(self.seconds / 3):
+            if self.held:
+                DirectoryLease.renew(self.owner, self.seconds)
+
+def run_workers(workers : int, argv : list[str], module : str = 'scripts.thumbnails.upload.cli') -> int:
+    """
+    Run the upload command in several processes, one per shard, and wait for all of them to finish.
+
+    Args:
+        workers: The number of processes.
+        argv: The arguments of the upload command. Each process is given --shard with its index as well.
+        module: The module to run in each process.
+
+    Returns:
+        int: The exit code of the first process which failed, or 0 if every process succeeded.
+    """
+    logger.info('Starting %d upload processes', workers)
+    processes = [
+        subprocess.Popen([sys.executable, '-m', module, *argv, '--shard', str(shard)])
+        for shard in range(workers)
+    ]
+    try:
+        codes = [process.wait() for process in processes]
+        return next((code for code in codes if code), 0)
+    except KeyboardInterrupt:
+        # A terminal sends the interrupt to every process. Anything else only interrupts this one.
+        for process in processes:
+            if process.poll() is None:
+                process.send_signal(signal.SIGINT)
+        for process in processes:
+            process.wait()
+        raise
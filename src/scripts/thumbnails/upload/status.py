@@ -29,12 +29,17 @@ import sys
 # Add the root directory of the project to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
 
+import queue
+import threading
+import time
+from collections import defaultdict
 from enum import Enum
 from pathlib import Path
-from typing import Iterator, Self
+from typing import Callable, Iterator, Self
 
 import sqlalchemy.exc
-from sqlalchemy import create_engine, Column, String, Float, Integer, Enum as SQLEnum
+from sqlalchemy import create_engine, event, func, text, Column, Engine, Index, String, Float, Integer, Enum as SQLEnum
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session, Query
 
@@ -43,45 +48,188 @@ from scripts import setup_logging
 logger = setup_logging()
 
 # When version increases, directories will be reprocessed even if their last modified time hasn't changed.
+# ...Directories with a digest are skipped while their digest matches, regardless of version.
 VERSION = 3
 
+# The version of the database schema, stored in PRAGMA user_version. Existing databases are migrated in place.
+SCHEMA_VERSION = 2
+
+# The maximum number of status updates written in one transaction
+STATUS_BATCH_SIZE = 500
+
+# The longest a status update waits in the write-behind buffer before it is written, in seconds
+STATUS_FLUSH_INTERVAL = 2.0
+
 class StatusOptions(Enum):
     UPLOADED = 'uploaded'
     SKIPPED = 'skipped'
     DUPLICATE = 'duplicate'
     ERROR = 'error'
+    # Not uploaded, because the other file of its RAW+JPEG pair was uploaded instead (see pair policies)
+    PAIRED = 'paired'
+    # Only a reduced preview was uploaded in place of the file (see PreviewPolicy), so the file itself still needs to be
+    PREVIEW = 'preview'
 
 Base = declarative_base()
 
+def canonical_globs(globs : str | list[str] | None) -> str:
+    """
+    Convert globs into the form they are stored in: sorted, without duplicates, and joined by commas.
+
+    The same set of globs is always stored the same way, regardless of the order they were given in. No globs are
+    stored as an empty string (not NULL), so the unique index on (directory, globs) applies to them too.
+    """
+    if not globs:
+        return ''
+    if isinstance(globs, str):
+        globs = globs.split(',')
+    return ','.join(sorted({glob.strip() for glob in globs if glob.strip()}))
+
 class DbManager:
     """
     A class to manage the database connection and session.
+
+    The database is opened the first time a session is needed, so importing this module (or running --help) does not
+    touch it.
     """
     _sessionmaker: sessionmaker | None = None
+    _db_path : Path | None = None
+    _lock = threading.RLock()
+
+    @classmethod
+    def configure(cls, db_path : Path | None) -> None:
+        """
+        Set the database file to open on first use, instead of the default.
+        """
+        with cls._lock:
+            cls._db_path = db_path
+            cls._sessionmaker = None
 
     @classmethod
-    def initialize_db(cls):
+    def initialize_db(cls, db_path : Path | None = None):
         """
         Initialize the database and create the tables.
+
+        Args:
+            db_path (Path): The database file. Defaults to the configured file, or file_status.db in the project root.
         """
-        project_root = Path(__file__).parent.parent.parent.parent
-        db_path = project_root / 'file_status.db'
-        engine = create_engine(f'sqlite:///{db_path}', pool_size=10, max_overflow=20)
+        if db_path is None:
+            db_path = cls._db_path
+        if db_path is None:
+            project_root = Path(__file__).parent.parent.parent.parent
+            db_path = project_root / 'file_status.db'
+        # SQLite connections are cheap, and a file database does not benefit from a large pool
+        engine = create_engine(f'sqlite:///{db_path}')
+        event.listen(engine, 'connect', cls.set_pragmas)
         Base.metadata.create_all(engine)
+        cls.migrate(engine)
         cls._sessionmaker = sessionmaker(bind=engine)
 
-        file_records = FileStatus.count_records()
-        directory_records = DirectoryStatus.count_records()
-        logger.info(f"Database initialized with {file_records} file records and {directory_records} directory records.")
+        # Counting every row is a full table scan. The largest id is a single index lookup, and close enough for a log.
+        logger.debug(
+            "Database initialized with about %d file records and %d directory records.",
+            cls.estimate_rows(FileStatus),
+            cls.estimate_rows(DirectoryStatus),
+        )
+
+    @classmethod
+    def estimate_rows(cls, model : type[Base]) -> int:
+        """
+        Estimate the number of rows in a table from its largest id, without scanning it. Deleted rows are still counted.
+        """
+        session = cls.get_session()
+        try:
+            return session.query(func.max(model.id)).scalar() or 0
+        finally:
+            session.close()
+
+    @classmethod
+    def set_pragmas(cls, dbapi_connection, connection_record) -> None:
+        """
+        Configure every new connection.
+
+        WAL lets reader threads continue while the status writer commits, and synchronous=NORMAL is durable enough in WAL
+        mode, while avoiding an fsync on every commit.
+        """
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute('PRAGMA journal_mode=WAL')
+            cursor.execute('PRAGMA synchronous=NORMAL')
+            cursor.execute('PRAGMA busy_timeout=10000')
+            cursor.execute('PRAGMA temp_store=MEMORY')
+            # 256MB of memory mapped I/O, and a 64MB page cache (negative values are in KB)
+            cursor.execute('PRAGMA mmap_size=268435456')
+            cursor.execute('PRAGMA cache_size=-65536')
+        finally:
+            cursor.close()
+
+    @classmethod
+    def migrate(cls, engine : Engine) -> None:
+        """
+        Upgrade an existing database to SCHEMA_VERSION, in place.
+
+        Version 1:
+            - Stores globs in canonical form (sorted, without duplicates).
+            - Removes duplicate rows, keeping the most recent one.
+            - Adds unique indexes on (directory, filename) and (directory, globs).
+
+        Version 2:
+            - Adds the digest of each directory's tree to directory_status.
+        """
+        with engine.begin() as connection:
+            version = connection.execute(text('PRAGMA user_version')).scalar() or 0
+            if version >= SCHEMA_VERSION:
+                return
+
+            logger.info("Migrating status database from schema version %d to %d", version, SCHEMA_VERSION)
+            if version < 1:
+                cls._migrate_v1(connection)
+            if version < 2:
+                cls._migrate_v2(connection)
+            connection.execute(text(f'PRAGMA user_version = {SCHEMA_VERSION}'))
+
+    @classmethod
+    def _migrate_v1(cls, connection) -> None:
+        rows = connection.execute(text('SELECT id, globs FROM directory_status')).all()
+        for row_id, globs in rows:
+            if (canonical := canonical_globs(globs)) != globs:
+                connection.execute(text('UPDATE directory_status SET globs = :globs WHERE id = :id'), {'globs': canonical, 'id': row_id})
+
+        for table, columns in [('upload_status', 'directory, filename'), ('directory_status', 'directory, globs'), ('file_digest', 'directory, filename')]:
+            result = connection.execute(text(
+                f'DELETE FROM {table} WHERE id NOT IN (SELECT MAX(id) FROM {table} GROUP BY {columns})'
+            ))
+            if result.rowcount:
+                logger.info("Removed %d duplicate rows from %s", result.rowcount, table)
+
+        # The same indexes as __table_args__, which create_all only adds to new tables
+        for table in [FileStatus.__table__, DirectoryStatus.__table__, FileDigest.__table__]:
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+
+        # Indexes on single columns are covered by the composite indexes
+        connection.execute(text('DROP INDEX IF EXISTS ix_file_digest_directory'))
+
+    @classmethod
+    def _migrate_v2(cls, connection) -> None:
+        # create_all only adds columns to new tables
+        columns = {row[1] for row in connection.execute(text('PRAGMA table_info(directory_status)'))}
+        if 'digest' not in columns:
+            connection.execute(text('ALTER TABLE directory_status ADD COLUMN digest VARCHAR'))
 
     @classmethod
     def get_session(cls) -> Session:
         if cls._sessionmaker is None:
-            raise ValueError("Database not initialized.")
+            with cls._lock:
+                if cls._sessionmaker is None:
+                    cls.initialize_db()
         return cls._sessionmaker()
 
 class FileStatus(Base):
     __tablename__ = 'upload_status'
+    __table_args__ = (
+        Index('ix_upload_status_directory_filename', 'directory', 'filename', unique=True),
+    )
     
     id = Column(Integer, primary_key=True)
     directory = Column(String, nullable=False)
@@ -93,7 +241,7 @@ class FileStatus(Base):
         
     @classmethod
     def get_status(cls, file_path : Path) -> StatusOptions | None:
-        directory = file_path.parent
+        directory = file_path.parent.absolute()
         filename = file_path.name
         
         session = DbManager.get_session()
@@ -106,44 +254,36 @@ class FileStatus(Base):
             session.close()
 
     @classmethod
-    def update_status(cls, file_path : Path, status: StatusOptions):
+    def update_status(cls, file_path : Path, status: StatusOptions, file_hash : str | None = None):
         directory = file_path.parent.absolute()
-        filename = file_path.name
 
         # We need directory to exist and be a directory
         if not directory.exists():
             raise FileNotFoundError(f"Directory {directory} does not exist.")
 
-        session = DbManager.get_session()
-        try:
-            record = (session.query(FileStatus)
-                             .filter_by(directory=str(directory), filename=filename)
-                             .first())
+        cls.update_many([(file_path, status, file_hash)])
 
-            last_processed_time = directory.stat().st_mtime
-            if record is None:
-                record = FileStatus(
-                    directory=str(directory),
-                    filename=filename,
-                    status=status,
-                    last_processed_time=last_processed_time,
-                    version=VERSION
-                )
-                session.add(record)
-            else:
-                # If updating to SKIPPED, do not overwrite an existing status
-                if status in [StatusOptions.SKIPPED, StatusOptions.DUPLICATE]:
-                    return
-                
-                record.status = status
-                record.last_processed_time = last_processed_time
-                record.version = VERSION
-            session.commit()
-        except sqlalchemy.exc.SQLAlchemyError as e:
-            logger.error("Error updating status: %s", e)
-            session.rollback()
-        finally:
-            session.close()
+    @classmethod
+    def upsert_statement(cls, overwrite : bool):
+        """
+        Build an INSERT ... ON CONFLICT statement for (directory, filename).
+
+        Args:
+            overwrite: Whether to replace the status of an existing record. If False, existing records are left as-is.
+        """
+        statement = sqlite_insert(FileStatus)
+        if not overwrite:
+            return statement.on_conflict_do_nothing(index_elements=['directory', 'filename'])
+
+        return statement.on_conflict_do_update(
+            index_elements=['directory', 'filename'],
+            set_={
+                'status': statement.excluded.status,
+                'last_processed_time': statement.excluded.last_processed_time,
+                'version': statement.excluded.version,
+                'file_hash': func.coalesce(statement.excluded.file_hash, FileStatus.file_hash),
+            }
+        )
 
     @classmethod
     def upload_success(cls, file_path : Path):
@@ -178,7 +318,7 @@ class FileStatus(Base):
         session = DbManager.get_session()
         try:
             records = (session.query(FileStatus)
-                              .filter_by(directory=str(directory))
+                              .filter_by(directory=str(directory.absolute()))
                               .all())
             for r in records:
                 yield (r.filename, r.status)
@@ -193,7 +333,7 @@ class FileStatus(Base):
         session = DbManager.get_session()
         try:
             records = (session.query(FileStatus)
-                              .filter_by(directory=str(directory), status=status)
+                              .filter_by(directory=str(directory.absolute()), status=status)
                               .all())
             for r in records:
                 yield r.filename
@@ -205,7 +345,7 @@ class FileStatus(Base):
         """
         Delete the status of a file.
         """
-        directory = file_path.parent
+        directory = file_path.parent.absolute()
         filename = file_path.name
         
         session = DbManager.get_session()
@@ -229,7 +369,7 @@ class FileStatus(Base):
         session = DbManager.get_session()
         try:
             return (session.query(FileStatus)
-                          .filter_by(directory=str(directory))
+                          .filter_by(directory=str(directory.absolute()))
                           .count())
         finally:
             session.close()
@@ -245,8 +385,212 @@ class FileStatus(Base):
         finally:
             session.close()
 
+    @classmethod
+    def get_directory(cls, directory : Path) -> dict[str, StatusOptions]:
+        """
+        Load the status of every file in a directory in one query.
+
+        Returns:
+            A dict of filename -> status.
+        """
+        session = DbManager.get_session()
+        try:
+            records = (session.query(FileStatus.filename, FileStatus.status)
+                              .filter_by(directory=str(directory.absolute()))
+                              .all())
+            return {filename: status for filename, status in records}
+        finally:
+            session.close()
+
+    @classmethod
+    def update_many(cls, updates : list[tuple[Path, StatusOptions, str | None]]):
+        """
+        Write many status updates in a single transaction, with the same rules as update_status.
+
+        Args:
+            updates: A list of (file_path, status, file_hash), in the order they happened.
+        """
+        if not updates:
+            return
+
+        # Collapse repeated updates to the same file, as if they were applied in order
+        directories : dict[str, dict[str, tuple[StatusOptions, str | None]]] = defaultdict(dict)
+        for file_path, status, file_hash in updates:
+            files = directories[str(file_path.parent.absolute())]
+            if file_path.name in files:
+                previous_status, previous_hash = files[file_path.name]
+                if status in [StatusOptions.SKIPPED, StatusOptions.DUPLICATE]:
+                    status = previous_status
+                file_hash = file_hash or previous_hash
+            files[file_path.name] = (status, file_hash)
+
+        # If updating to SKIPPED, do not overwrite an existing status
+        rows : dict[bool, list[dict]] = {True: [], False: []}
+        for directory, files in directories.items():
+            try:
+                last_processed_time = Path(directory).stat().st_mtime
+            except OSError as e:
+                logger.error("Unable to update status of %d files in %s: %s", len(files), directory, e)
+                continue
+
+            for filename, (status, file_hash) in files.items():
+                overwrite = status not in [StatusOptions.SKIPPED, StatusOptions.DUPLICATE]
+                rows[overwrite].append({
+                    'directory': directory,
+                    'filename': filename,
+                    'status': status,
+                    'last_processed_time': last_processed_time,
+                    'version': VERSION,
+                    'file_hash': file_hash,
+                })
+
+        session = DbManager.get_session()
+        try:
+            for overwrite, values in rows.items():
+                if values:
+                    session.execute(cls.upsert_statement(overwrite), values)
+            session.commit()
+        except sqlalchemy.exc.SQLAlchemyError as e:
+            logger.error("Error updating %d statuses: %s", len(updates), e)
+            session.rollback()
+        finally:
+            session.close()
+
+class StatusStore:
+    """
+    An in-memory view of FileStatus, with a write-behind buffer.
+
+    The statuses of a directory are loaded in one query, the first time any file in it is looked up. Updates change the
+    in-memory view immediately, and are written to the database by a single writer thread, in batched transactions.
+    Call flush() to wait for every pending update to be written.
+    """
+    _FLUSH = object()
+    _STOP = object()
+
+    def __init__(self, batch_size : int = STATUS_BATCH_SIZE, flush_interval : float = STATUS_FLUSH_INTERVAL):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._directories : dict[str, dict[str, StatusOptions]] = {}
+        self._lock = threading.Lock()
+        self._queue : queue.Queue = queue.Queue()
+        self._writer : threading.Thread | None = None
+        # Written by the writer thread, to measure how long transactions take
+        self.batches_written = 0
+        self.write_seconds = 0.0
+        self.max_write_seconds = 0.0
+
+    def load_directory(self, directory : Path) -> dict[str, StatusOptions]:
+        """
+        Get the status of every file in a directory, loading them from the database the first time.
+
+        Returns:
+            A dict of filename -> status. Do not modify it.
+        """
+        key = str(directory.absolute())
+        with self._lock:
+            if key not in self._directories:
+                self._directories[key] = FileStatus.get_directory(directory)
+            return self._directories[key]
+
+    def get_status(self, file_path : Path) -> StatusOptions | None:
+        return self.load_directory(file_path.parent).get(file_path.name)
+
+    def was_successful(self, file_path : Path) -> bool:
+        return self.get_status(file_path) in [StatusOptions.DUPLICATE, StatusOptions.UPLOADED]
+
+    def update_status(self, file_path : Path, status : StatusOptions, file_hash : str | None = None):
+        """
+        Update the status of a file. It is written to the database in the background.
+        """
+        statuses = self.load_directory(file_path.parent)
+        with self._lock:
+            # If updating to SKIPPED, do not overwrite an existing status
+            if file_path.name not in statuses or status not in [StatusOptions.SKIPPED, StatusOptions.DUPLICATE]:
+                statuses[file_path.name] = status
+
+        self._start_writer()
+        self._queue.put((file_path, status, file_hash))
+
+    def after_pending(self, callback : Callable[[], None]):
+        """
+        Run a callback on the writer thread, once every update queued before it has been written.
+
+        Use this to write records that summarize file statuses (such as DirectoryStatus) without waiting for a flush.
+        """
+        self._start_writer()
+        self._queue.put(callback)
+
+    def flush(self):
+        """
+        Block until every pending update has been written to the database.
+        """
+        if self._writer is None:
+            return
+        self._queue.put(self._FLUSH)
+        self._queue.join()
+
+    def close(self):
+        """
+        Write every pending update, and stop the writer thread.
+        """
+        with self._lock:
+            writer = self._writer
+            self._writer = None
+
+        if writer is None:
+            return
+        self._queue.put(self._STOP)
+        writer.join()
+
+    def _start_writer(self):
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name='StatusStoreWriter', daemon=True)
+                self._writer.start()
+
+    def _write_loop(self):
+        while True:
+            batch = []
+            item = self._queue.get()
+            items_taken = 1
+            # Gather updates for the same transaction, until flush_interval after the first one, or something else is
+            # queued. The deadline doesn't move as more updates arrive, so a steady stream is still written.
+            deadline = time.monotonic() + self.flush_interval
+            while isinstance(item, tuple):
+                batch.append(item)
+                if len(batch) >= self.batch_size or (remaining := deadline - time.monotonic()) <= 0:
+                    item = None
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    item = None
+                    break
+                items_taken += 1
+
+            try:
+                started = time.monotonic()
+                FileStatus.update_many(batch)
+                if callable(item):
+                    item()
+                elapsed = time.monotonic() - started
+                self.batches_written += 1
+                self.write_seconds += elapsed
+                self.max_write_seconds = max(self.max_write_seconds, elapsed)
+            except Exception as e:
+                logger.error("Failed to write %d status updates: %s", len(batch), e)
+            finally:
+                for _ in range(items_taken):
+                    self._queue.task_done()
+
+            if item is self._STOP:
+                return
+
 class DirectoryStatus(Base):
     __tablename__ = 'directory_status'
+    __table_args__ = (
+        Index('ix_directory_status_directory_globs', 'directory', 'globs', unique=True),
+    )
     __allow_unmapped__ = True
 
     id = Column(Integer, primary_key=True)
@@ -255,6 +599,8 @@ class DirectoryStatus(Base):
     file_count = Column(Integer, nullable=False, default=0)
     last_modified_time = Column(Float, nullable=False, default=0.0)
     version = Column(Integer, nullable=False, default=-1)
+    # The digest of the directory's listing when it was last uploaded. See tree.DirectoryListing.
+    digest = Column(String, nullable=True)
 
     _sessionmaker: sessionmaker | None = None
 
@@ -266,15 +612,13 @@ class DirectoryStatus(Base):
     def query(cls, session : Session, directory : Path | None = None, globs : str | list[str] | None = None) -> Query[Self]:
         q = cls.get_queryset(session)
         if directory:
-            q = q.filter_by(directory=str(directory))
+            # Directories are stored as absolute paths
+            q = q.filter_by(directory=str(directory.absolute()))
             
         # TODO: Likely a bug here, in the event of globs = None returning records with any glob value
         # ...instead of the expected behavior of returning records with no glob value
-        # TODO: Another bug exists with the ordering of the list. If the list is not sorted, the query will sometimes fail.
         if globs:
-            if isinstance(globs, list):
-                globs = ",".join(globs)
-            q = q.filter_by(globs=globs)
+            q = q.filter_by(globs=canonical_globs(globs))
         return q
 
     @classmethod
@@ -286,39 +630,39 @@ class DirectoryStatus(Base):
             session.close()
 
     @classmethod
-    def update(cls, directory: Path, file_count: int, last_modified_time : float | None = None, globs: str | list[str] | None = None):
+    def update(cls, directory: Path, file_count: int, last_modified_time : float | None = None, globs: str | list[str] | None = None, digest : str | None = None):
         """
         Update or create the directory status record with the current file_count,
-        the directory's last modified time, and the current VERSION.
+        the directory's last modified time, the digest of its tree, and the current VERSION.
         """
         directory = directory.absolute()
-        session = DbManager.get_session()
 
-        # Convert list of globs into a str
-        if globs and isinstance(globs, list):
-            globs = ",".join(globs)
-        
-        try:
-            record = (cls.query(session, directory, globs).first())
+        if not last_modified_time:
+            if not directory.exists():
+                raise FileNotFoundError(f"Directory {directory} does not exist, and no last mod time provided.")
+            last_modified_time = directory.stat().st_mtime
 
-            if not last_modified_time:
-                if not directory.exists():
-                    raise FileNotFoundError(f"Directory {directory} does not exist, and no last mod time provided.")
-                last_modified_time = directory.stat().st_mtime
+        statement = sqlite_insert(DirectoryStatus).values(
+            directory=str(directory),
+            globs=canonical_globs(globs),
+            file_count=file_count,
+            last_modified_time=last_modified_time,
+            version=VERSION,
+            digest=digest,
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=['directory', 'globs'],
+            set_={
+                'file_count': statement.excluded.file_count,
+                'last_modified_time': statement.excluded.last_modified_time,
+                'version': statement.excluded.version,
+                'digest': statement.excluded.digest,
+            }
+        )
 
-            if record is None:
-                record = DirectoryStatus(
-                    directory=str(directory),
-                    file_count=file_count,
-                    last_modified_time=last_modified_time,
-                    version=VERSION,
-                    globs=globs
-                )
-                session.add(record)
-            else:
-                record.file_count = file_count
-                record.last_modified_time = last_modified_time
-                record.version = VERSION
+        session = DbManager.get_session()
+        try:
+            session.execute(statement)
             session.commit()
         except sqlalchemy.exc.SQLAlchemyError as e:
             logger.error("Error updating directory status: %s", e)
@@ -358,6 +702,27 @@ class DirectoryStatus(Base):
         finally:
             session.close()
 
+    @classmethod
+    def get_digests(cls, root : Path, globs : str | list[str] | None = None) -> dict[str, str | None]:
+        """
+        Load the digest of root, and of every directory below it, in one query.
+
+        Returns:
+            A dict of absolute directory -> digest, for every directory with a record. Records written before digests
+            were stored have a digest of None.
+        """
+        root_str = str(root.absolute())
+        session = DbManager.get_session()
+        try:
+            records = (session.query(DirectoryStatus.directory, DirectoryStatus.digest)
+                              .filter(DirectoryStatus.globs == canonical_globs(globs))
+                              .filter((DirectoryStatus.directory == root_str)
+                                      | DirectoryStatus.directory.startswith(root_str.rstrip(os.sep) + os.sep, autoescape=True))
+                              .all())
+            return {directory: digest for directory, digest in records}
+        finally:
+            session.close()
+
     @classmethod
     def delete_directory_status(cls, directory: Path, globs: str | list[str] | None = None):
         """
@@ -384,5 +749,299 @@ class DirectoryStatus(Base):
         finally:
             session.close()
 
-# Initialize the database at app start
-DbManager.initialize_db()
\ No newline at end of file
+class FileDigest(Base):
+    """
+    The SHA-1 digest of a file, cached by its identity (path, size, and modification time).
+
+    Any change to the file changes its size or mtime, which invalidates the cached digest.
+    """
+    __tablename__ = 'file_digest'
+    __table_args__ = (
+        Index('ix_file_digest_directory_filename', 'directory', 'filename', unique=True),
+    )
+
+    id = Column(Integer, primary_key=True)
+    directory = Column(String, nullable=False)
+    filename = Column(String, nullable=False)
+    size = Column(Integer, nullable=False)
+    mtime = Column(Float, nullable=False)
+    sha1 = Column(String, nullable=False)
+
+    @classmethod
+    def get_directory(cls, directory : Path) -> dict[str, tuple[int, float, str]]:
+        """
+        Load every cached digest for a directory in one query.
+
+        Returns:
+            A dict of filename -> (size, mtime, sha1).
+        """
+        session = DbManager.get_session()
+        try:
+            records = (session.query(FileDigest.filename, FileDigest.size, FileDigest.mtime, FileDigest.sha1)
+                              .filter_by(directory=str(directory.absolute()))
+                              .all())
+            return {filename: (size, mtime, sha1) for filename, size, mtime, sha1 in records}
+        finally:
+            session.close()
+
+    @classmethod
+    def save_many(cls, digests : list[tuple[Path, int, float, str]]):
+        """
+        Cache the digests of many files in a single transaction.
+
+        Args:
+            digests: A list of (file_path, size, mtime, sha1).
+        """
+        if not digests:
+            return
+
+        session = DbManager.get_session()
+        try:
+            for file_path, size, mtime, sha1 in digests:
+                directory = str(file_path.parent.absolute())
+                (session.query(FileDigest)
+                        .filter_by(directory=directory, filename=file_path.name)
+                        .delete(synchronize_session=False))
+                session.add(FileDigest(directory=directory, filename=file_path.name, size=size, mtime=mtime, sha1=sha1))
+            session.commit()
+        except sqlalchemy.exc.SQLAlchemyError as e:
+            logger.error("Error saving digests: %s", e)
+            session.rollback()
+        finally:
+            session.close()
+
+class UploadSession(Base):
+    """
+    An unfinished chunked upload: where it is on the server, and how much of the file the server has received.
+
+    A session belongs to one version of a file (its size and modification time). If the file changes, the session is
+    ignored, and the upload starts over.
+    """
+    __tablename__ = 'upload_session'
+    __table_args__ = (
+        Index('ix_upload_session_directory_filename', 'directory', 'filename', unique=True),
+    )
+
+    id = Column(Integer, primary_key=True)
+    directory = Column(String, nullable=False)
+    filename = Column(String, nullable=False)
+    size = Column(Integer, nullable=False)
+    mtime = Column(Float, nullable=False)
+    upload_url = Column(String, nullable=False)
+    offset = Column(Integer, nullable=False, default=0)
+    updated_time = Column(Float, nullable=False, default=0.0)
+
+    @classmethod
+    def get(cls, file_path : Path, size : int, mtime : float) -> tuple[str, int] | None:
+        """
+        Find the unfinished upload of a file.
+
+        Returns:
+            (upload_url, offset), or None if there is no upload of this version of the file.
+        """
+        session = DbManager.get_session()
+        try:
+            record = (session.query(UploadSession)
+                             .filter_by(directory=str(file_path.parent.absolute()), filename=file_path.name)
+                             .first())
+            if not record or record.size != size or record.mtime != mtime:
+                return None
+            return record.upload_url, record.offset
+        finally:
+            session.close()
+
+    @classmethod
+    def save(cls, file_path : Path, size : int, mtime : float, upload_url : str, offset : int):
+        """
+        Record the progress of an upload, replacing any earlier session for the file.
+        """
+        statement = sqlite_insert(UploadSession).values(
+            directory=str(file_path.parent.absolute()),
+            filename=file_path.name,
+            size=size,
+            mtime=mtime,
+            upload_url=upload_url,
+            offset=offset,
+            updated_time=time.time(),
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=['directory', 'filename'],
+            set_={
+                'size': statement.excluded.size,
+                'mtime': statement.excluded.mtime,
+                'upload_url': statement.excluded.upload_url,
+                'offset': statement.excluded.offset,
+                'updated_time': statement.excluded.updated_time,
+            }
+        )
+
+        session = DbManager.get_session()
+        try:
+            session.execute(statement)
+            session.commit()
+        except sqlalchemy.exc.SQLAlchemyError as e:
+            logger.error("Error saving upload session for %s: %s", file_path, e)
+            session.rollback()
+        finally:
+            session.close()
+
+    @classmethod
+    def delete(cls, file_path : Path):
+        """
+        Forget the upload of a file, once it has finished.
+        """
+        session = DbManager.get_session()
+        try:
+            (session.query(UploadSession)
+                    .filter_by(directory=str(file_path.parent.absolute()), filename=file_path.name)
+                    .delete(synchronize_session=False))
+            session.commit()
+        except sqlalchemy.exc.SQLAlchemyError as e:
+            logger.error("Error deleting upload session for %s: %s", file_path, e)
+            session.rollback()
+        finally:
+            session.close()
+
+class AlbumMembership(Base):
+    """
+    An asset which the uploader has added to an album, so a resumed run does not add it again.
+    """
+    __tablename__ = 'album_membership'
+    __table_args__ = (
+        Index('ix_album_membership_album_asset', 'album', 'asset_id', unique=True),
+    )
+
+    id = Column(Integer, primary_key=True)
+    album = Column(String, nullable=False)
+    asset_id = Column(String, nullable=False)
+    added_time = Column(Float, nullable=False, default=0.0)
+
+    @classmethod
+    def get_members(cls, album : str, asset_ids : list[str]) -> set[str]:
+        """
+        Find which of the given assets were already added to an album.
+        """
+        members : set[str] = set()
+        session = DbManager.get_session()
+        try:
+            # Stay well below SQLite's limit on query parameters
+            for start in range(0, len(asset_ids), STATUS_BATCH_SIZE):
+                batch = asset_ids[start:start + STATUS_BATCH_SIZE]
+                query = (session.query(AlbumMembership.asset_id)
+                                .filter(AlbumMembership.album == album, AlbumMembership.asset_id.in_(batch)))
+                members.update(asset_id for (asset_id,) in query)
+            return members
+        finally:
+            session.close()
+
+    @classmethod
+    def save_many(cls, album : str, asset_ids : list[str]):
+        """
+        Record that assets were added to an album.
+        """
+        if not asset_ids:
+            return
+
+        now = time.time()
+        statement = sqlite_insert(AlbumMembership).values([
+            {'album': album, 'asset_id': asset_id, 'added_time': now}
+            for asset_id in asset_ids
+        ]).on_conflict_do_nothing(index_elements=['album', 'asset_id'])
+
+        session = DbManager.get_session()
+        try:
+            session.execute(statement)
+            session.commit()
+        except sqlalchemy.exc.SQLAlchemyError as e:
+            logger.error("Error saving members of album %s: %s", album, e)
+            session.rollback()
+        finally:
+            session.close()
+
+class DirectoryLease(Base):
+    """
+    A directory which an upload process is working on, so other processes skip it instead of uploading it again.
+
+    A lease expires unless its owner renews it. A process which stops (or crashes) without releasing its leases holds
+    them for at most the lease time.
+    """
+    __tablename__ = 'directory_lease'
+    __table_args__ = (
+        Index('ix_directory_lease_directory', 'directory', unique=True),
+    )
+
+    id = Column(Integer, primary_key=True)
+    directory = Column(String, nullable=False)
+    owner = Column(String, nullable=False, index=True)
+    expires = Column(Float, nullable=False, default=0.0)
+
+    @classmethod
+    def acquire(cls, directory : Path, owner : str, seconds : float) -> bool:
+        """
+        Lease a directory, if no other owner holds an unexpired lease on it. Renews the lease if owner already holds it.
+
+        Returns:
+            bool: True if owner holds the lease.
+        """
+        key = str(directory.absolute())
+        now = time.time()
+        statement = sqlite_insert(DirectoryLease).values(directory=key, owner=owner, expires=now + seconds)
+        statement = statement.on_conflict_do_update(
+            index_elements=['directory'],
+            set_={'owner': statement.excluded.owner, 'expires': statement.excluded.expires},
+            where=(DirectoryLease.owner == statement.excluded.owner) | (DirectoryLease.expires < now),
+        )
+
+        session = DbManager.get_session()
+        try:
+            session.execute(statement)
+            # Read back in the same transaction, which holds SQLite's write lock
+            holder = session.query(DirectoryLease.owner).filter_by(directory=key).scalar()
+            session.commit()
+            return holder == owner
+        except sqlalchemy.exc.SQLAlchemyError as e:
+            logger.error("Error leasing %s: %s", directory, e)
+            session.rollback()
+            return False
+        finally:
+            session.close()
+
+    @classmethod
+    def renew(cls, owner : str, seconds : float) -> int:
+        """
+        Extend every lease held by owner.
+
+        Returns:
+            int: The number of leases renewed.
+        """
+        session = DbManager.get_session()
+        try:
+            count = (session.query(DirectoryLease)
+                            .filter_by(owner=owner)
+                            .update({'expires': time.time() + seconds}, synchronize_session=False))
+            session.commit()
+            return count
+        except sqlalchemy.exc.SQLAlchemyError as e:
+            logger.error("Error renewing the leases of %s: %s", owner, e)
+            session.rollback()
+            return 0
+        finally:
+            session.close()
+
+    @classmethod
+    def release(cls, owner : str, directory : Path | None = None):
+        """
+        Give up the lease owner holds on a directory, or every lease owner holds if directory is None.
+        """
+        session = DbManager.get_session()
+        try:
+            query = session.query(DirectoryLease).filter_by(owner=owner)
+            if directory is not None:
+                query = query.filter_by(directory=str(directory.absolute()))
+            query.delete(synchronize_session=False)
+            session.commit()
+        except sqlalchemy.exc.SQLAlchemyError as e:
+            logger.error("Error releasing the leases of %s: %s", owner, e)
+            session.rollback()
+        finally:
+            session.close()
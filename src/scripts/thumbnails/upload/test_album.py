@@ -0,0 +1,120 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    test_album.py                                                                                        *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from scripts.thumbnails.upload.album import AlbumBatcher
+from scripts.thumbnails.upload.client import ImmichClient
+from scripts.thumbnails.upload.fake_immich import FakeImmichServer
+from scripts.thumbnails.upload.status import AlbumMembership, Base, DbManager
+import logging
+
+# Disable logging during tests to keep the output clean
+logging.disable(logging.CRITICAL)
+
+class TestAlbumBatcher(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+
+        # Use a temporary database, instead of the real one
+        self.original_sessionmaker = DbManager._sessionmaker
+        engine = create_engine(f'sqlite:///{self.test_dir / "status.db"}')
+        Base.metadata.create_all(engine)
+        DbManager._sessionmaker = sessionmaker(bind=engine)
+
+        self.server = FakeImmichServer(api_key='secret')
+        self.server.start()
+        self.client = ImmichClient(url=self.server.url, api_key='secret')
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+        DbManager._sessionmaker = self.original_sessionmaker
+        shutil.rmtree(self.test_dir)
+
+    def upload(self, count : int) -> list[tuple[str, str]]:
+        """
+        Upload files with random contents, and return their (asset_id, checksum).
+        """
+        assets = []
+        for i in range(count):
+            content = os.urandom(256)
+            path = self.test_dir / f'IMG_{i:04d}.jpg'
+            path.write_bytes(content)
+            assets.append((self.client.upload_asset(path).asset_id, hashlib.sha1(content).hexdigest()))
+        return assets
+
+    def album_puts(self) -> int:
+        return sum(1 for method, path in self.server.requests if method == 'PUT' and path.startswith('/api/albums/'))
+
+    def album_assets(self) -> set[str]:
+        return next(iter(self.server.albums.values()))['assets']
+
+    def test_added_in_batches(self):
+        assets = self.upload(5)
+        batcher = AlbumBatcher(self.client, 'Trip', batch_size=2)
+        for asset_id, _ in assets:
+            batcher.add(asset_id)
+
+        # Two full batches were sent as they filled, and the last asset waits for a flush
+        self.assertEqual(self.album_puts(), 2)
+        self.assertEqual(batcher.pending, 1)
+        self.assertEqual(batcher.flush(), 1)
+
+        self.assertEqual(self.album_puts(), 3)
+        self.assertEqual(self.album_assets(), {asset_id for asset_id, _ in assets})
+        self.assertEqual(AlbumMembership.get_members('Trip', [asset_id for asset_id, _ in assets]), self.album_assets())
+
+    def test_resumed_run_does_not_add_again(self):
+        assets = self.upload(3)
+        first = AlbumBatcher(self.client, 'Trip')
+        first.add(assets[0][0])
+        first.add(assets[1][0])
+        first.flush()
+
+        second = AlbumBatcher(self.client, 'Trip')
+        for asset_id, _ in assets:
+            second.add(asset_id)
+        self.assertEqual(second.flush(), 1)
+        self.assertEqual(self.album_puts(), 2)
+        self.assertEqual(len(self.album_assets()), 3)
+
+    def test_add_by_checksum(self):
+        assets = self.upload(3)
+        batcher = AlbumBatcher(self.client, 'Trip')
+        for _, checksum in assets:
+            batcher.add_checksum(checksum)
+
+        self.assertEqual(batcher.flush(), 3)
+        self.assertEqual(self.server.requests.count(('POST', '/api/assets/bulk-upload-check')), 1)
+        self.assertEqual(self.album_assets(), {asset_id for asset_id, _ in assets})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    test_bench.py                                                                                        *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+import unittest
+from scripts.thumbnails.upload.bench import parse_size, run_benchmark
+import logging
+
+# Disable logging during tests to keep the output clean
+logging.disable(logging.CRITICAL)
+
+class TestBenchmark(unittest.TestCase):
+    def test_parse_size(self):
+        self.assertEqual(parse_size('256KB'), 256 * 1024)
+        self.assertEqual(parse_size('1.5mb'), 1536 * 1024)
+        self.assertEqual(parse_size('100'), 100)
+
+    def test_run_benchmark(self):
+        result = run_benchmark(2, 10, 4 * 1024, error_rate=0.3, duplicate_ratio=0.5, max_threads=4)
+
+        self.assertEqual(result.files, 20)
+        self.assertEqual(result.uploaded + result.duplicates + result.errors, 20)
+        self.assertGreater(result.duplicates, 0)
+        # Duplicates are never sent
+        self.assertGreater(result.bytes_sent, 0)
+        self.assertLess(result.bytes_sent, result.total_bytes)
+        self.assertGreater(result.errors_injected, 0)
+        self.assertGreater(result.db_batches, 0)
+        self.assertGreater(result.files_per_second, 0)
+        self.assertLessEqual(result.worker_utilization, 1)
+        self.assertEqual(result.throughput['bytes_sent'], result.bytes_sent)
+        self.assertIn('bytes_per_second.assets', result.throughput)
+        self.assertIn('assets', result.report())
+
+if __name__ == '__main__':
+    unittest.main()
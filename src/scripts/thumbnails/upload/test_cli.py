@@ -0,0 +1,62 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    test_cli.py                                                                                          *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+import os
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parents[3]
+
+# Modules which the upload command must not load before its arguments are parsed
+HEAVY_MODULES = {'sqlalchemy', 'pydantic', 'alive_progress', 'requests', 'PIL', 'rawpy'}
+
+class TestStartup(unittest.TestCase):
+    def run_python(self, *args : str) -> tuple[subprocess.CompletedProcess, set[str]]:
+        """
+        Run python with -X importtime, and return the result and the top level packages it imported.
+        """
+        env = {**os.environ, 'PYTHONPATH': str(SRC_DIR)}
+        result = subprocess.run([sys.executable, '-X', 'importtime', *args], capture_output=True, text=True, env=env, timeout=60)
+        packages = set()
+        for line in result.stderr.splitlines():
+            if line.startswith('import time:') and '|' in line:
+                packages.add(line.rsplit('|', 1)[1].strip().split('.')[0])
+        return result, packages
+
+    def test_import_is_light(self):
+        result, packages = self.run_python('-c', 'import scripts.thumbnails.upload.cli')
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn('scripts', packages)
+        self.assertFalse(packages & HEAVY_MODULES)
+
+    def test_help(self):
+        result, packages = self.run_python('-m', 'scripts.thumbnails.upload.cli', '--help')
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn('usage:', result.stdout)
+        self.assertFalse(packages & HEAVY_MODULES)
+
+if __name__ == '__main__':
+    unittest.main()
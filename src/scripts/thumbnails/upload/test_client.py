@@ -0,0 +1,186 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    test_client.py                                                                                       *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+import requests
+from scripts.thumbnails.upload.client import BULK_CHECK_BATCH_SIZE, ImmichClient, MultipartStream
+from scripts.thumbnails.upload.exceptions import AuthenticationError, UploadError
+from scripts.thumbnails.upload.fake_immich import FakeImmichServer
+from scripts.thumbnails.upload.status import StatusOptions
+import logging
+
+# Disable logging during tests to keep the output clean
+logging.disable(logging.CRITICAL)
+
+class TestImmichClient(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.server = FakeImmichServer(api_key='secret')
+        self.server.start()
+        self.client = ImmichClient(url=f'{self.server.url}/api/', api_key='secret', max_connections=2)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+        shutil.rmtree(self.test_dir)
+
+    def create_file(self, name : str, content : bytes) -> Path:
+        path = self.test_dir / name
+        path.write_bytes(content)
+        return path
+
+    def test_multipart_length_matches_body(self):
+        path = self.create_file('IMG_0001.jpg', os.urandom(3 * 1024 * 1024 + 5))
+        with MultipartStream({'deviceId': 'test'}, 'assetData', path) as body:
+            data = body.read(1000) + body.read()
+            self.assertEqual(len(data), len(body))
+            self.assertIn(path.read_bytes(), data)
+
+    def test_upload_and_duplicate(self):
+        content = os.urandom(64 * 1024)
+        path = self.create_file('IMG_0001.jpg', content)
+
+        first = self.client.upload_asset(path)
+        self.assertEqual(first.status, StatusOptions.UPLOADED)
+        self.assertIn(hashlib.sha1(content).hexdigest(), self.server.assets)
+
+        second = self.client.upload_asset(self.create_file('IMG_0001 copy.jpg', content))
+        self.assertEqual(second, first._replace(status=StatusOptions.DUPLICATE))
+
+    def test_bulk_upload_check(self):
+        existing = os.urandom(1024)
+        self.client.upload_asset(self.create_file('IMG_0001.jpg', existing))
+
+        checksums = {f'file-{i}': hashlib.sha1(os.urandom(16)).hexdigest() for i in range(BULK_CHECK_BATCH_SIZE + 10)}
+        checksums['copy'] = hashlib.sha1(existing).hexdigest()
+        results = self.client.bulk_upload_check(checksums)
+
+        self.assertEqual(set(results), set(checksums))
+        self.assertTrue(results['copy'].is_duplicate)
+        self.assertEqual(sum(result.action == 'accept' for result in results.values()), BULK_CHECK_BATCH_SIZE + 10)
+        # Sent in two batches
+        self.assertEqual(self.server.requests.count(('POST', '/api/assets/bulk-upload-check')), 2)
+
+    def test_connections_are_reused(self):
+        paths = [self.create_file(f'IMG_{i:04d}.jpg', os.urandom(1024)) for i in range(5)]
+        for path in paths:
+            self.client.upload_asset(path)
+
+        self.assertEqual(len(self.server.assets), 5)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_invalid_api_key(self):
+        client = ImmichClient(url=self.server.url, api_key='wrong')
+        with self.assertRaises(AuthenticationError):
+            client.authenticate()
+        with self.assertRaises(AuthenticationError):
+            client.upload_asset(self.create_file('IMG_0001.jpg', b'photo'))
+
+    def test_add_to_album(self):
+        result = self.client.upload_asset(self.create_file('IMG_0001.jpg', b'photo'))
+        self.client.add_to_album('Trip', [result.asset_id])
+        self.client.add_to_album('Trip', [result.asset_id])
+
+        self.assertEqual(len(self.server.albums), 1)
+        album = next(iter(self.server.albums.values()))
+        self.assertEqual(album['albumName'], 'Trip')
+        self.assertEqual(album['assets'], {result.asset_id})
+
+class TestChunkedUpload(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        # Reject requests over 64KB, as Cloudflare rejects requests over 100MB
+        self.server = FakeImmichServer(api_key='secret', max_request_size=64 * 1024)
+        self.server.start()
+        self.client = ImmichClient(url=self.server.url, api_key='secret', chunk_size=16 * 1024)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+        shutil.rmtree(self.test_dir)
+
+    def create_file(self, name : str, size : int) -> tuple[Path, bytes]:
+        content = os.urandom(size)
+        path = self.test_dir / name
+        path.write_bytes(content)
+        return path, content
+
+    def test_large_file_rejected_in_one_request(self):
+        path, _ = self.create_file('VID_0001.mp4', 100 * 1024)
+        with self.assertRaises((UploadError, requests.RequestException)):
+            self.client.upload_asset(path)
+
+    def test_chunked_upload(self):
+        path, content = self.create_file('VID_0001.mp4', 100 * 1024 + 7)
+        progress = []
+        result = self.client.upload_asset_chunked(path, on_progress=lambda url, offset: progress.append(offset))
+
+        self.assertEqual(result.status, StatusOptions.UPLOADED)
+        asset = self.server.assets[hashlib.sha1(content).hexdigest()]
+        self.assertEqual(asset['id'], result.asset_id)
+        self.assertEqual(asset['filename'], 'VID_0001.mp4')
+        self.assertEqual(progress, [0, *range(16 * 1024, len(content), 16 * 1024), len(content)])
+        self.assertEqual(self.server.requests.count(('POST', '/api/upload')), 1)
+
+        # The same content again is a duplicate
+        copy = self.test_dir / 'VID_0001 copy.mp4'
+        copy.write_bytes(content)
+        self.assertEqual(self.client.upload_asset_chunked(copy).status, StatusOptions.DUPLICATE)
+
+    def test_resume_interrupted_upload(self):
+        path, content = self.create_file('VID_0001.mp4', 100 * 1024)
+        saved = {}
+
+        def interrupt(url : str, offset : int) -> None:
+            saved['url'], saved['offset'] = url, offset
+            if offset >= 48 * 1024:
+                raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            self.client.upload_asset_chunked(path, on_progress=interrupt)
+        self.assertEqual(saved['offset'], 48 * 1024)
+        patches = sum(1 for method, _ in self.server.requests if method == 'PATCH')
+
+        result = self.client.upload_asset_chunked(path, upload_url=saved['url'])
+        self.assertEqual(result.status, StatusOptions.UPLOADED)
+        self.assertIn(hashlib.sha1(content).hexdigest(), self.server.assets)
+        # Only the remaining chunks were sent, to the same upload
+        self.assertEqual(self.server.requests.count(('POST', '/api/upload')), 1)
+        self.assertEqual(sum(1 for method, _ in self.server.requests if method == 'PATCH') - patches, 4)
+
+    def test_resume_unknown_upload_restarts(self):
+        path, content = self.create_file('VID_0001.mp4', 40 * 1024)
+        result = self.client.upload_asset_chunked(path, upload_url=f'{self.server.url}/api/upload/missing')
+
+        self.assertEqual(result.status, StatusOptions.UPLOADED)
+        self.assertIn(hashlib.sha1(content).hexdigest(), self.server.assets)
+        self.assertEqual(self.server.requests.count(('POST', '/api/upload')), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    test_concurrency.py                                                                                  *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+import threading
+import time
+import unittest
+from unittest import mock
+from scripts.thumbnails.upload import concurrency
+from scripts.thumbnails.upload.concurrency import ConcurrencyController
+import logging
+
+# Disable logging during tests to keep the output clean
+logging.disable(logging.CRITICAL)
+
+MB = 1024 * 1024
+
+class TestConcurrencyController(unittest.TestCase):
+    def setUp(self):
+        # A fake clock, which only moves when a test advances it
+        self.now = 0.0
+        patcher = mock.patch.object(concurrency, 'time', mock.Mock(monotonic=lambda: self.now))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def record_window(self, controller : ConcurrencyController, latency : float = 1.0, bytes_sent : int = MB, errors : int = 0) -> None:
+        """
+        Record enough samples for the controller to adjust, over one window.
+        """
+        self.now += concurrency.WINDOW_SECONDS
+        count = max(concurrency.WINDOW_SAMPLES, controller.limit)
+        for i in range(count):
+            controller.record(latency, 0 if i < errors else bytes_sent, error=i < errors)
+
+    def test_bounds(self):
+        with self.assertRaises(ValueError):
+            ConcurrencyController(0, 4)
+        with self.assertRaises(ValueError):
+            ConcurrencyController(4, 2)
+        self.assertEqual(ConcurrencyController(1, 8).limit, 2)
+        self.assertEqual(ConcurrencyController(3, 8).limit, 3)
+        self.assertEqual(ConcurrencyController(1, 8, initial=20).limit, 8)
+
+    def test_not_adaptive(self):
+        controller = ConcurrencyController(1, 6, adaptive=False)
+        self.assertEqual(controller.limit, 6)
+        for _ in range(5):
+            self.record_window(controller, errors=4)
+        self.assertEqual(controller.limit, 6)
+
+    def test_waits_for_window(self):
+        controller = ConcurrencyController(1, 8)
+        for _ in range(20):
+            controller.record(1.0, MB)
+        self.assertEqual(controller.limit, 2)
+
+    def test_increase_while_throughput_improves(self):
+        controller = ConcurrencyController(1, 8)
+        for i in range(4):
+            self.record_window(controller, bytes_sent=(i + 1) * MB)
+        self.assertEqual(controller.limit, 6)
+
+    def test_increase_stops_at_maximum(self):
+        controller = ConcurrencyController(1, 3)
+        for i in range(6):
+            self.record_window(controller, bytes_sent=(i + 1) * MB)
+        self.assertEqual(controller.limit, 3)
+
+    def test_hold_when_throughput_flat(self):
+        controller = ConcurrencyController(1, 8)
+        for _ in range(3):
+            self.record_window(controller)
+        # The first window increases (no previous throughput), then it holds
+        self.assertEqual(controller.limit, 3)
+
+    def test_throughput_callable_replaces_window_bytes(self):
+        # The bytes finished in each window rise, but the smoothed rate stays flat
+        controller = ConcurrencyController(1, 8, throughput=lambda: MB)
+        for i in range(4):
+            self.record_window(controller, bytes_sent=(i + 1) * MB)
+        self.assertEqual(controller.limit, 3)
+
+    def test_decrease_on_errors(self):
+        controller = ConcurrencyController(1, 16, initial=8)
+        self.record_window(controller, errors=2)
+        self.assertEqual(controller.limit, 4)
+        self.record_window(controller, errors=2)
+        self.assertEqual(controller.limit, 2)
+        self.record_window(controller, errors=4)
+        self.record_window(controller, errors=4)
+        self.assertEqual(controller.limit, 1)
+
+    def test_decrease_on_timeouts(self):
+        controller = ConcurrencyController(2, 16, initial=8)
+        self.now += concurrency.WINDOW_SECONDS
+        for _ in range(8):
+            controller.record_timeout(30)
+        self.assertEqual(controller.limit, 4)
+
+    def test_decrease_on_latency(self):
+        controller = ConcurrencyController(1, 16, initial=8)
+        self.record_window(controller, latency=1.0)
+        self.assertEqual(controller.limit, 9)
+        # Twice the data, but ten times the latency
+        self.record_window(controller, latency=10.0, bytes_sent=2 * MB)
+        self.assertEqual(controller.limit, 4)
+
+    def test_acquire_blocks_at_limit(self):
+        controller = ConcurrencyController(1, 2, initial=2)
+        controller.acquire()
+        controller.acquire()
+        self.assertEqual(controller.in_flight, 2)
+
+        acquired = threading.Event()
+        def worker():
+            controller.acquire()
+            acquired.set()
+
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        self.assertFalse(acquired.wait(0.1))
+
+        controller.release()
+        self.assertTrue(acquired.wait(1))
+        thread.join(1)
+        self.assertEqual(controller.in_flight, 2)
+
+    def test_in_flight_never_exceeds_limit(self):
+        controller = ConcurrencyController(1, 4, initial=3)
+        peak = 0
+        lock = threading.Lock()
+
+        def worker():
+            nonlocal peak
+            for _ in range(20):
+                controller.acquire()
+                with lock:
+                    peak = max(peak, controller.in_flight)
+                time.sleep(0.001)
+                controller.release()
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertLessEqual(peak, 3)
+        self.assertEqual(controller.in_flight, 0)
+
+if __name__ == '__main__':
+    unittest.main()
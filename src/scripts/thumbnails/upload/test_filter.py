@@ -0,0 +1,109 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    test_filter.py                                                                                       *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+import os
+import re
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from scripts.thumbnails.upload.filter import IgnoreFilter, PathTrie, compile_templates
+from scripts.thumbnails.upload.template import FileTemplate, PixelFiles
+import logging
+
+# Disable logging during tests to keep the output clean
+logging.disable(logging.CRITICAL)
+
+class TestPathTrie(unittest.TestCase):
+    def test_contains_paths_and_children(self):
+        trie = PathTrie(['/photos/ignored', '/photos/2024/skip.jpg'])
+        self.assertTrue(trie.contains('/photos/ignored'))
+        self.assertTrue(trie.contains('/photos/ignored/a/b.jpg'))
+        self.assertTrue(trie.contains('/photos/2024/skip.jpg'))
+        self.assertFalse(trie.contains('/photos/2024/keep.jpg'))
+        self.assertFalse(trie.contains('/photos'))
+        self.assertFalse(trie.contains('/photos/ignored2/a.jpg'))
+        self.assertFalse(PathTrie())
+
+class TestCompileTemplates(unittest.TestCase):
+    def test_every_template_must_match(self):
+        jpg = FileTemplate(name='jpg', patterns=[r'.*\.jpg', r'.*\.jpeg'])
+        pattern = compile_templates([PixelFiles, jpg])
+        self.assertTrue(pattern.match('PXL_20241019_101010.jpg'))
+        self.assertFalse(pattern.match('DSC01234.jpg'))
+        self.assertFalse(pattern.match('PXL_20241019_101010.mp4'))
+        self.assertIsNone(compile_templates([]))
+
+    def test_case_insensitive_patterns(self):
+        template = FileTemplate(name='sony', patterns=[re.compile(r'dsc\d+\.arw', re.IGNORECASE)])
+        self.assertTrue(compile_templates([template]).match('DSC01234.ARW'))
+
+class TestIgnoreFilter(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.filter = IgnoreFilter(
+            extensions=['jpg', 'arw', 'mp4'],
+            ignore_extensions=['ARW'],
+            ignore_paths=[self.test_dir / 'ignored'],
+            large_file_size=100,
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def create_file(self, name : str, size : int = 10) -> Path:
+        path = self.test_dir / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'x' * size)
+        return path
+
+    def test_reasons(self):
+        self.assertIsNone(self.filter.reason(self.create_file('IMG_0001.JPG')))
+        self.assertEqual(self.filter.reason(self.create_file('DSC01234.ARW')), 'extension')
+        self.assertEqual(self.filter.reason(self.create_file('notes.txt')), 'extension')
+        self.assertEqual(self.filter.reason(self.create_file('.hidden.jpg'), allow_hidden=False), 'hidden')
+        self.assertEqual(self.filter.reason(self.create_file('ignored/IMG_0002.jpg')), 'path')
+        self.assertEqual(self.filter.reason(self.create_file('VID_0001.mp4', 200)), 'larger than 100 bytes')
+        self.assertEqual(self.filter.reason(self.test_dir / 'missing.jpg'), 'not a file')
+        (self.test_dir / 'folder.jpg').mkdir()
+        self.assertEqual(self.filter.reason(self.test_dir / 'folder.jpg'), 'not a file')
+
+    def test_scan_matches_paths(self):
+        for name, size in [('a.jpg', 10), ('b.arw', 10), ('c.mp4', 200), ('d.mp4', 50), ('e.txt', 10)]:
+            self.create_file(name, size)
+        (self.test_dir / 'f.jpg').mkdir()
+
+        scanned = sorted(entry.name for entry in self.filter.scan(self.test_dir))
+        self.assertEqual(scanned, ['a.jpg', 'd.mp4'])
+        expected = sorted(path.name for path in self.test_dir.iterdir() if not self.filter.should_ignore(path))
+        self.assertEqual(scanned, expected)
+
+    def test_globs_and_filename_pattern(self):
+        self.create_file('PXL_20241019_101010.jpg')
+        self.create_file('IMG_0001.jpg')
+        photo_filter = IgnoreFilter(extensions=['jpg'], globs=['pxl_*'], filename_pattern=re.compile('.*'))
+        self.assertEqual([entry.name for entry in photo_filter.scan(self.test_dir)], ['PXL_20241019_101010.jpg'])
+
+if __name__ == '__main__':
+    unittest.main()
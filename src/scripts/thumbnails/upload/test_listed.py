@@ -0,0 +1,206 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    test_listed.py                                                                                       *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from scripts.lib.manifest import ManifestEntry, ManifestWriter
+from scripts.thumbnails.upload.fake_immich import FakeImmichServer
+from scripts.thumbnails.upload.progressive import ImmichProgressiveUploader
+from scripts.thumbnails.upload.status import Base, DbManager, FileStatus, StatusOptions
+import logging
+
+# Disable logging during tests to keep the output clean
+logging.disable(logging.CRITICAL)
+
+class UploadFilesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.photos = self.test_dir / 'photos'
+        (self.photos / 'private').mkdir(parents=True)
+        self.files = {
+            name: self.create_file(self.photos / name)
+            for name in ['IMG_0001.jpg', 'IMG_0002.jpg', 'IMG_0003.png', 'private/IMG_0004.jpg', 'notes.txt']
+        }
+
+        # Use a temporary database, instead of the real one
+        self.original_sessionmaker = DbManager._sessionmaker
+        engine = create_engine(f'sqlite:///{self.test_dir / "status.db"}')
+        Base.metadata.create_all(engine)
+        DbManager._sessionmaker = sessionmaker(bind=engine)
+
+        self.server = FakeImmichServer()
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+        DbManager._sessionmaker = self.original_sessionmaker
+        shutil.rmtree(self.test_dir)
+
+    def create_file(self, path : Path) -> Path:
+        path.write_bytes(os.urandom(256))
+        return path
+
+    def file_list(self, *names : str) -> bytes:
+        return b''.join(os.fsencode(self.photos / name) + b'\0' for name in names)
+
+    def create_uploader(self, *, max_threads : int = 2, **kwargs) -> ImmichProgressiveUploader:
+        return ImmichProgressiveUploader(
+            url=self.server.url,
+            api_key=self.server.api_key,
+            directory=self.photos,
+            backend='http',
+            max_threads=max_threads,
+            large_file_size=0,
+            retry_delay=0.1,
+            **kwargs,
+        )
+
+    def uploaded_names(self) -> set[str]:
+        return {asset['filename'] for asset in self.server.assets.values()}
+
+class TestUploadListed(UploadFilesTestCase):
+    def upload(self, file_list : str | Path, **kwargs) -> ImmichProgressiveUploader:
+        uploader = self.create_uploader(**kwargs)
+        try:
+            uploader.upload_listed(file_list)
+        finally:
+            uploader.status_store.close()
+            uploader.client.close()
+        return uploader
+
+    def test_uploads_only_listed_files(self):
+        file_list = self.test_dir / 'files.lst'
+        file_list.write_bytes(self.file_list('IMG_0001.jpg', 'IMG_0003.png'))
+
+        uploader = self.upload(file_list)
+        self.assertEqual(self.uploaded_names(), {'IMG_0001.jpg', 'IMG_0003.png'})
+        self.assertEqual(uploader.files_uploaded, 2)
+        self.assertEqual(FileStatus.get_status(self.files['IMG_0001.jpg']), StatusOptions.UPLOADED)
+        self.assertIsNone(FileStatus.get_status(self.files['IMG_0002.jpg']))
+
+    def test_ignore_rules_are_applied(self):
+        file_list = self.test_dir / 'files.lst'
+        file_list.write_bytes(self.file_list(*self.files, 'IMG_0005.jpg'))
+
+        self.upload(file_list, ignore_extensions=['png'], ignore_paths=[str(self.photos / 'private')])
+        # Ignored, unsupported and missing files are all skipped
+        self.assertEqual(self.uploaded_names(), {'IMG_0001.jpg', 'IMG_0002.jpg'})
+
+    def test_reads_stdin(self):
+        stdin = io.TextIOWrapper(io.BytesIO(self.file_list('IMG_0002.jpg')))
+        with patch('sys.stdin', stdin):
+            self.upload('-')
+        self.assertEqual(self.uploaded_names(), {'IMG_0002.jpg'})
+
+    def test_interrupt_cancels_queued_uploads(self):
+        submit_upload = ImmichProgressiveUploader.submit_upload
+        def submit(uploader, *args, **kwargs):
+            if submit.calls == 2:
+                raise KeyboardInterrupt
+            submit.calls += 1
+            return submit_upload(uploader, *args, **kwargs)
+        submit.calls = 0
+
+        def upload(uploader, image_path, **kwargs):
+            time.sleep(0.5)
+            return StatusOptions.SKIPPED
+
+        uploader = self.create_uploader(max_threads=1, adaptive=False, precheck=False)
+        with patch.object(ImmichProgressiveUploader, 'submit_upload', autospec=True, side_effect=submit), \
+             patch.object(ImmichProgressiveUploader, 'upload_file_threadsafe', autospec=True, side_effect=upload) as upload_file:
+            try:
+                with self.assertRaises(KeyboardInterrupt):
+                    uploader.upload_files(self.files.values())
+            finally:
+                uploader.status_store.close()
+                uploader.client.close()
+
+        # The first file was uploading, and the second was waiting for a worker
+        self.assertEqual(upload_file.call_count, 1)
+
+class TestUploadManifest(UploadFilesTestCase):
+    def write_manifest(self, *names : str) -> Path:
+        manifest_path = self.test_dir / 'manifest.jsonl'
+        with ManifestWriter(manifest_path) as manifest:
+            for name in names:
+                path = self.photos / name
+                stat = path.stat()
+                digest = hashlib.sha1(path.read_bytes()).hexdigest()
+                manifest.write(ManifestEntry(path=path, size=stat.st_size, mtime=stat.st_mtime, digest=digest, algorithm='sha1'))
+        return manifest_path
+
+    def upload_manifest(self, manifest_path : Path, **kwargs) -> ImmichProgressiveUploader:
+        uploader = self.create_uploader(**kwargs)
+        try:
+            uploader.upload_manifest(manifest_path)
+        finally:
+            uploader.status_store.close()
+            uploader.client.close()
+        return uploader
+
+    def test_uploads_manifest_files(self):
+        manifest_path = self.write_manifest(*self.files)
+
+        with patch.object(ImmichProgressiveUploader, 'hash_file', autospec=True) as hash_file:
+            uploader = self.upload_manifest(manifest_path, ignore_extensions=['png'], ignore_paths=[str(self.photos / 'private')])
+        self.assertEqual(self.uploaded_names(), {'IMG_0001.jpg', 'IMG_0002.jpg'})
+        # The digests in the manifest were used, and forgotten once each file was done
+        hash_file.assert_not_called()
+        self.assertIsNone(uploader.get_known_digest(self.files['IMG_0001.jpg']))
+        self.assertIsNone(uploader.get_known_stat(self.files['IMG_0001.jpg']))
+
+    def test_files_are_not_statted(self):
+        manifest_path = self.write_manifest('IMG_0001.jpg', 'IMG_0002.jpg', 'notes.txt')
+        expected = [self.files['IMG_0001.jpg'], self.files['IMG_0002.jpg']]
+        for path in self.files.values():
+            path.unlink()
+
+        # Any stat would find the files missing
+        uploader = self.create_uploader()
+        try:
+            self.assertEqual(list(uploader.yield_queued(uploader.yield_manifest_files(manifest_path))), expected)
+            self.assertEqual(uploader.throughput.remaining, 256 * 2)
+        finally:
+            uploader.status_store.close()
+            uploader.client.close()
+
+    def test_duplicates_are_forgotten(self):
+        manifest_path = self.write_manifest('IMG_0001.jpg')
+        self.upload_manifest(manifest_path)
+
+        uploader = self.upload_manifest(manifest_path)
+        self.assertEqual(uploader.files_duplicated, 1)
+        self.assertIsNone(uploader.get_known_digest(self.files['IMG_0001.jpg']))
+
+if __name__ == '__main__':
+    unittest.main()
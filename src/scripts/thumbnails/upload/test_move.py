@@ -0,0 +1,107 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    test_move.py                                                                                         *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from scripts.lib.file_manager import FileManager
+from scripts.thumbnails.upload.move import MoveStage
+import logging
+
+# Disable logging during tests to keep the output clean
+logging.disable(logging.CRITICAL)
+
+class TestMoveStage(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.manager = FileManager(directory=self.test_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def create_file(self, relative_path : str) -> Path:
+        path = self.test_dir / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(relative_path.encode())
+        return path
+
+    def test_relative_target_is_below_each_directory(self):
+        first = self.create_file('a/IMG_1.jpg')
+        second = self.create_file('b/IMG_2.jpg')
+        stage = MoveStage(self.manager, Path('uploaded'))
+        stage.add(first)
+        stage.add(second)
+        stage.close()
+
+        self.assertTrue((self.test_dir / 'a' / 'uploaded' / 'IMG_1.jpg').exists())
+        self.assertTrue((self.test_dir / 'b' / 'uploaded' / 'IMG_2.jpg').exists())
+        self.assertFalse(first.exists())
+        self.assertEqual(self.manager.files_moved, 2)
+
+    def test_moved_when_directory_finishes(self):
+        photo = self.create_file('a/IMG_1.jpg')
+        stage = MoveStage(self.manager, self.test_dir / 'done')
+        stage.add(photo)
+        # Nothing is moved until the directory finishes
+        self.assertTrue(photo.exists())
+
+        stage.flush_directory(photo.parent)
+        stage.close()
+        self.assertTrue((self.test_dir / 'done' / 'IMG_1.jpg').exists())
+
+    def test_moved_in_batches(self):
+        photos = [self.create_file(f'a/IMG_{i}.jpg') for i in range(3)]
+        stage = MoveStage(self.manager, self.test_dir / 'done', batch_size=2)
+        for photo in photos:
+            stage.add(photo)
+        # The first batch was submitted as soon as it filled
+        stage._executor.shutdown(wait=True)
+        self.assertEqual(sorted(p.name for p in (self.test_dir / 'done').iterdir()), ['IMG_0.jpg', 'IMG_1.jpg'])
+
+    def test_collisions_are_renamed(self):
+        self.create_file('done/IMG_1.jpg')
+        self.create_file('done/IMG_1_1.jpg')
+        photo = self.create_file('a/IMG_1.jpg')
+        stage = MoveStage(self.manager, self.test_dir / 'done')
+        stage.add(photo)
+        stage.close()
+
+        self.assertEqual((self.test_dir / 'done' / 'IMG_1_2.jpg').read_bytes(), b'a/IMG_1.jpg')
+        self.assertEqual((self.test_dir / 'done' / 'IMG_1.jpg').read_bytes(), b'done/IMG_1.jpg')
+
+    def test_sidecar_moves_with_photo(self):
+        photo = self.create_file('a/IMG_1.jpg')
+        self.create_file('a/IMG_1.xmp')
+        stage = MoveStage(self.manager, self.test_dir / 'done')
+        stage.add(photo)
+        stage.close()
+        self.assertTrue((self.test_dir / 'done' / 'IMG_1.xmp').exists())
+
+    def test_get_unique_name(self):
+        self.assertEqual(MoveStage.get_unique_name('IMG.jpg', set()), 'IMG.jpg')
+        self.assertEqual(MoveStage.get_unique_name('IMG.jpg', {'IMG.jpg', 'IMG_1.jpg'}), 'IMG_2.jpg')
+
+if __name__ == '__main__':
+    unittest.main()
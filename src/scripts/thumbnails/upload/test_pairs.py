@@ -0,0 +1,120 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    test_pairs.py                                                                                        *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from scripts.thumbnails.upload.fake_immich import FakeImmichServer
+from scripts.thumbnails.upload.progressive import ImmichProgressiveUploader
+from scripts.thumbnails.upload.status import Base, DbManager, FileStatus, StatusOptions
+import logging
+
+# Disable logging during tests to keep the output clean
+logging.disable(logging.CRITICAL)
+
+class TestPairPolicy(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.photos = self.test_dir / 'photos'
+        self.photos.mkdir()
+        for name in ['DSC0001.ARW', 'DSC0001.JPG', 'DSC0002.ARW', 'DSC0003.jpg']:
+            (self.photos / name).write_bytes(os.urandom(256))
+
+        # Use a temporary database, instead of the real one
+        self.original_sessionmaker = DbManager._sessionmaker
+        engine = create_engine(f'sqlite:///{self.test_dir / "status.db"}')
+        Base.metadata.create_all(engine)
+        DbManager._sessionmaker = sessionmaker(bind=engine)
+
+        self.server = FakeImmichServer()
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+        DbManager._sessionmaker = self.original_sessionmaker
+        shutil.rmtree(self.test_dir)
+
+    def upload(self, **kwargs) -> ImmichProgressiveUploader:
+        uploader = ImmichProgressiveUploader(
+            url=self.server.url,
+            api_key=self.server.api_key,
+            directory=self.photos,
+            backend='http',
+            max_threads=2,
+            large_file_size=0,
+            retry_delay=0.1,
+            **kwargs,
+        )
+        try:
+            uploader.upload()
+        finally:
+            uploader.status_store.close()
+            uploader.client.close()
+        return uploader
+
+    def uploaded_names(self) -> set[str]:
+        return {asset['filename'] for asset in self.server.assets.values()}
+
+    def test_both_by_default(self):
+        self.upload()
+        self.assertEqual(self.uploaded_names(), {'DSC0001.ARW', 'DSC0001.JPG', 'DSC0002.ARW', 'DSC0003.jpg'})
+
+    def test_prefer_jpeg(self):
+        uploader = self.upload(prefer_pair='jpeg')
+        # Files without a partner are always uploaded
+        self.assertEqual(self.uploaded_names(), {'DSC0001.JPG', 'DSC0002.ARW', 'DSC0003.jpg'})
+        self.assertEqual(uploader.files_paired, 1)
+        self.assertEqual(FileStatus.get_status(self.photos / 'DSC0001.ARW'), StatusOptions.PAIRED)
+
+    def test_prefer_raw(self):
+        self.upload(prefer_pair='raw')
+        self.assertEqual(self.uploaded_names(), {'DSC0001.ARW', 'DSC0002.ARW', 'DSC0003.jpg'})
+
+    def test_revisit_uploads_partner_later(self):
+        # Away from home, only the JPEG is sent
+        self.upload(prefer_pair='jpeg')
+        self.assertNotIn('DSC0001.ARW', self.uploaded_names())
+
+        # The next run on the home network sends the RAW, because the directory was left unfinished
+        uploader = self.upload()
+        self.assertIn('DSC0001.ARW', self.uploaded_names())
+        self.assertEqual(uploader.files_uploaded, 1)
+
+    def test_partner_is_uploaded_by_later_run_with_both(self):
+        self.upload(prefer_pair='raw')
+        self.assertNotIn('DSC0001.JPG', self.uploaded_names())
+
+        # Only the skipped JPEG is left, and the directory is finished once it is sent
+        uploader = self.upload()
+        self.assertIn('DSC0001.JPG', self.uploaded_names())
+        self.assertEqual(uploader.files_uploaded, 1)
+        uploader = self.upload()
+        self.assertEqual(uploader.files_uploaded, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,180 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    test_preview.py                                                                                      *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from scripts.thumbnails.upload.fake_immich import FakeImmichServer
+from scripts.thumbnails.upload.preview import Image, PreviewGenerator, PreviewPolicy, render_preview
+from scripts.thumbnails.upload.progressive import ImmichProgressiveUploader
+from scripts.thumbnails.upload.status import Base, DbManager, DirectoryStatus, FileStatus, StatusOptions
+import logging
+
+# Disable logging during tests to keep the output clean
+logging.disable(logging.CRITICAL)
+
+# EXIF DateTime
+DATETIME_TAG = 0x0132
+
+def create_photo(path : Path, size : tuple[int, int]) -> Path:
+    # Noise compresses poorly, like a detailed photo
+    image = Image.effect_noise(size, 64).convert('RGB')
+    exif = Image.Exif()
+    exif[DATETIME_TAG] = '2024:06:01 12:00:00'
+    image.save(path, 'JPEG', quality=95, exif=exif)
+    os.utime(path, (1_700_000_000, 1_700_000_000))
+    return path
+
+@unittest.skipUnless(Image, 'Pillow is not installed')
+class TestPreview(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.cache_dir = self.test_dir / 'cache'
+        self.photo = create_photo(self.test_dir / 'IMG_0001.jpg', (3000, 2000))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_render_preview(self):
+        preview = Path(render_preview(str(self.photo), str(self.cache_dir), None, 500, 85))
+
+        self.assertEqual(preview.name, 'IMG_0001.jpg')
+        self.assertTrue(preview.is_relative_to(self.cache_dir))
+        self.assertLess(preview.stat().st_size, self.photo.stat().st_size)
+        self.assertEqual(preview.stat().st_mtime, self.photo.stat().st_mtime)
+        with Image.open(preview) as image:
+            self.assertEqual(image.size, (500, 333))
+            self.assertEqual(image.getexif()[DATETIME_TAG], '2024:06:01 12:00:00')
+
+    def test_cache_is_content_addressed(self):
+        preview = render_preview(str(self.photo), str(self.cache_dir), None, 500, 85)
+
+        # The same photo, moved elsewhere, reuses the preview
+        moved = self.test_dir / 'moved' / 'IMG_0001.jpg'
+        moved.parent.mkdir()
+        shutil.copy2(self.photo, moved)
+        self.assertEqual(render_preview(str(moved), str(self.cache_dir), None, 500, 85), preview)
+
+        # Different settings never reuse it
+        self.assertNotEqual(render_preview(str(self.photo), str(self.cache_dir), None, 500, 70), preview)
+        self.assertNotEqual(render_preview(str(self.photo), str(self.cache_dir), None, 400, 85), preview)
+
+    def test_small_photo_is_not_replaced(self):
+        small = create_photo(self.test_dir / 'IMG_0002.jpg', (100, 100))
+        self.assertIsNone(render_preview(str(small), str(self.cache_dir), None, 500, 85))
+
+    def test_policy(self):
+        policy = PreviewPolicy(min_file_size=1024)
+        self.assertTrue(policy.applies_to(Path('IMG_0001.JPG'), 2048))
+        self.assertFalse(policy.applies_to(Path('IMG_0001.jpg'), 512))
+        self.assertFalse(policy.applies_to(Path('VID_0001.mp4'), 2048))
+
+    def test_generator(self):
+        generator = PreviewGenerator(PreviewPolicy(max_dimension=500, min_file_size=0), self.cache_dir, max_workers=1)
+        corrupt = self.test_dir / 'IMG_0003.jpg'
+        corrupt.write_bytes(b'not a photo')
+        video = self.test_dir / 'VID_0001.mp4'
+        video.write_bytes(os.urandom(1024))
+        try:
+            generator.prepare({self.photo: None, corrupt: None, video: None})
+
+            preview = generator.get(self.photo)
+            self.assertIsNotNone(preview)
+            self.assertTrue(preview.is_relative_to(self.cache_dir))
+            # Files the policy does not apply to, or which can't be read, are uploaded as they are
+            self.assertIsNone(generator.get(corrupt))
+            self.assertIsNone(generator.get(video))
+
+            generator.discard(self.photo)
+            self.assertEqual(generator.get(self.photo), preview)
+        finally:
+            generator.close()
+
+@unittest.skipUnless(Image, 'Pillow is not installed')
+class TestPreviewUploads(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.photos = self.test_dir / 'photos'
+        self.photos.mkdir()
+        self.photo = create_photo(self.photos / 'IMG_0001.jpg', (1200, 800))
+
+        # Use a temporary database, instead of the real one
+        self.original_sessionmaker = DbManager._sessionmaker
+        engine = create_engine(f'sqlite:///{self.test_dir / "status.db"}')
+        Base.metadata.create_all(engine)
+        DbManager._sessionmaker = sessionmaker(bind=engine)
+
+        self.server = FakeImmichServer()
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+        DbManager._sessionmaker = self.original_sessionmaker
+        shutil.rmtree(self.test_dir)
+
+    def upload(self, **kwargs) -> ImmichProgressiveUploader:
+        uploader = ImmichProgressiveUploader(
+            url=self.server.url,
+            api_key=self.server.api_key,
+            directory=self.photos,
+            backend='http',
+            max_threads=2,
+            large_file_size=0,
+            retry_delay=0.1,
+            preview_cache=self.test_dir / 'cache',
+            **kwargs,
+        )
+        try:
+            uploader.upload()
+        finally:
+            uploader.status_store.close()
+            uploader.close_previews()
+            uploader.client.close()
+        return uploader
+
+    def test_original_is_uploaded_later(self):
+        # Away from home, only the preview is sent, and the original stays where it is
+        uploader = self.upload(previews=PreviewPolicy(max_dimension=500, min_file_size=0), move_after_upload=Path('uploaded'))
+        self.assertEqual(uploader.files_previewed, 1)
+        self.assertEqual(uploader.files_uploaded, 0)
+        self.assertEqual(FileStatus.get_status(self.photo), StatusOptions.PREVIEW)
+        self.assertTrue(self.photo.exists())
+        self.assertIsNone(DirectoryStatus.get_digests(self.photos).get(str(self.photos.absolute())))
+
+        # Another run with previews doesn't send the preview again
+        uploader = self.upload(previews=PreviewPolicy(max_dimension=500, min_file_size=0))
+        self.assertEqual(uploader.files_previewed, 0)
+
+        # The next run on the home network sends the original, because the directory was left unfinished
+        uploader = self.upload()
+        self.assertEqual(uploader.files_uploaded, 1)
+        self.assertEqual(FileStatus.get_status(self.photo), StatusOptions.UPLOADED)
+        self.assertEqual(len(self.server.assets), 2)
+
+if __name__ == '__main__':
+    unittest.main()
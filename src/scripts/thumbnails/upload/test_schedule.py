@@ -0,0 +1,97 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    test_schedule.py                                                                                     *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from scripts.thumbnails.upload.schedule import UploadScheduler
+
+class TestUploadScheduler(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def create_file(self, name : str, size : int = 1, mtime : int = 1_700_000_000) -> Path:
+        path = self.test_dir / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'x' * size)
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_discovery_order_by_default(self):
+        files = [self.create_file(f'IMG_{i}.jpg') for i in range(5)]
+        self.assertEqual(list(UploadScheduler().schedule(files)), files)
+
+    def test_newest_first(self):
+        old = self.create_file('2019/IMG_1.jpg', mtime=1_500_000_000)
+        older = self.create_file('2018/IMG_2.jpg', mtime=1_400_000_000)
+        new = self.create_file('2024/IMG_3.jpg', mtime=1_700_000_000)
+        self.assertEqual(list(UploadScheduler(['newest']).schedule([older, old, new])), [new, old, older])
+
+    def test_smallest_first_ties_in_discovery_order(self):
+        video = self.create_file('VID_1.mp4', size=1000)
+        first = self.create_file('IMG_1.jpg', size=10)
+        second = self.create_file('IMG_2.jpg', size=10)
+        self.assertEqual(list(UploadScheduler(['smallest']).schedule([video, first, second])), [first, second, video])
+
+    def test_round_robin(self):
+        a = [self.create_file(f'a/IMG_{i}.jpg') for i in range(3)]
+        b = [self.create_file(f'b/IMG_{i}.jpg') for i in range(2)]
+        scheduled = list(UploadScheduler(['round-robin']).schedule(a + b))
+        self.assertEqual(scheduled, [a[0], b[0], a[1], b[1], a[2]])
+
+    def test_lookahead_is_bounded(self):
+        # The newest file is only found after the window is full, so it can't jump ahead of the first file
+        files = [self.create_file(f'IMG_{i}.jpg', mtime=1_600_000_000 + i) for i in range(4)]
+        scheduled = list(UploadScheduler(['newest'], lookahead=2).schedule(files))
+        self.assertEqual(scheduled, [files[1], files[2], files[3], files[0]])
+
+    def test_items_are_pulled_lazily(self):
+        pulled = []
+
+        def discover():
+            for i in range(10):
+                pulled.append(i)
+                yield self.create_file(f'IMG_{i}.jpg', size=10 - i)
+
+        scheduled = UploadScheduler(['smallest'], lookahead=3).schedule(discover())
+        next(scheduled)
+        self.assertEqual(pulled, [0, 1, 2])
+
+    def test_get_path(self):
+        big = self.create_file('VID_1.mp4', size=100)
+        small = self.create_file('IMG_1.jpg', size=1)
+        scheduled = UploadScheduler(['smallest'], get_path=lambda item: item[0]).schedule([(big, 'a'), (small, 'b')])
+        self.assertEqual([label for _, label in scheduled], ['b', 'a'])
+
+    def test_unknown_order(self):
+        with self.assertRaises(ValueError):
+            UploadScheduler(['largest'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    test_shard.py                                                                                        *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+import shutil
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from scripts.thumbnails.upload import status
+from scripts.thumbnails.upload.shard import LeaseKeeper, shard_of
+from scripts.thumbnails.upload.status import Base, DbManager, DirectoryLease
+import logging
+
+# Disable logging during tests to keep the output clean
+logging.disable(logging.CRITICAL)
+
+class TestShardOf(unittest.TestCase):
+    def test_stable_and_relative_to_root(self):
+        # The same directory is in the same shard, wherever the tree is mounted
+        first = shard_of(Path('/mnt/a/photos/2024/01'), Path('/mnt/a/photos'), 4)
+        second = shard_of(Path('/media/b/photos/2024/01'), Path('/media/b/photos'), 4)
+        self.assertEqual(first, second)
+
+    def test_every_shard_is_used(self):
+        root = Path('/photos')
+        shards = [shard_of(root / f'{2000 + i // 12}' / f'{i % 12 + 1:02d}', root, 4) for i in range(120)]
+        self.assertEqual(set(shards), {0, 1, 2, 3})
+        # Roughly even
+        self.assertTrue(all(shards.count(shard) > 15 for shard in range(4)))
+
+class TestLeaseKeeper(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.photos = self.test_dir / 'photos'
+        self.photos.mkdir()
+
+        # Use a temporary database, instead of the real one
+        self.original_sessionmaker = DbManager._sessionmaker
+        engine = create_engine(f'sqlite:///{self.test_dir / "status.db"}')
+        Base.metadata.create_all(engine)
+        DbManager._sessionmaker = sessionmaker(bind=engine)
+
+        self.first = LeaseKeeper(60, owner='first')
+        self.second = LeaseKeeper(60, owner='second')
+
+    def tearDown(self):
+        self.first.close()
+        self.second.close()
+        DbManager._sessionmaker = self.original_sessionmaker
+        shutil.rmtree(self.test_dir)
+
+    def test_only_one_owner(self):
+        self.assertTrue(self.first.acquire(self.photos))
+        self.assertFalse(self.second.acquire(self.photos))
+        # Acquiring again renews it
+        self.assertTrue(self.first.acquire(self.photos))
+        self.assertEqual(self.first.held, {self.photos})
+        self.assertEqual(self.second.held, set())
+
+    def test_release(self):
+        self.first.acquire(self.photos)
+        self.first.release(self.photos)
+        self.assertTrue(self.second.acquire(self.photos))
+
+    def test_close_releases_every_lease(self):
+        self.first.acquire(self.photos)
+        self.first.acquire(self.test_dir)
+        self.first.close()
+        self.assertTrue(self.second.acquire(self.photos))
+        self.assertTrue(self.second.acquire(self.test_dir))
+
+    def test_expired_lease_is_taken_over(self):
+        self.first.acquire(self.photos)
+        later = time.time() + 61
+        with mock.patch.object(status.time, 'time', return_value=later):
+            self.assertTrue(self.second.acquire(self.photos))
+        self.assertFalse(self.first.acquire(self.photos))
+
+    def test_renew(self):
+        self.first.acquire(self.photos)
+        later = time.time() + 45
+        with mock.patch.object(status.time, 'time', return_value=later):
+            self.assertEqual(DirectoryLease.renew('first', 60), 1)
+        with mock.patch.object(status.time, 'time', return_value=later + 30):
+            # Would have expired without the renewal
+            self.assertFalse(self.second.acquire(self.photos))
+
+if __name__ == '__main__':
+    unittest.main()
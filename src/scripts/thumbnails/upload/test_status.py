@@ -0,0 +1,181 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    test_status.py                                                                                       *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from scripts.thumbnails.upload.status import SCHEMA_VERSION, Base, DbManager, DirectoryStatus, FileStatus, StatusOptions, StatusStore
+import logging
+
+# Disable logging during tests to keep the output clean
+logging.disable(logging.CRITICAL)
+
+class TestStatusStore(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.photos = self.test_dir / 'photos'
+        self.photos.mkdir()
+
+        # Use a temporary database, instead of the real one
+        self.original_sessionmaker = DbManager._sessionmaker
+        engine = create_engine(f'sqlite:///{self.test_dir / "status.db"}')
+        Base.metadata.create_all(engine)
+        DbManager._sessionmaker = sessionmaker(bind=engine)
+
+        self.store = StatusStore(batch_size=10, flush_interval=0.05)
+
+    def tearDown(self):
+        self.store.close()
+        DbManager._sessionmaker = self.original_sessionmaker
+        shutil.rmtree(self.test_dir)
+
+    def test_updates_are_written_in_batches(self):
+        paths = [self.photos / f'IMG_{i:04d}.jpg' for i in range(25)]
+        for path in paths:
+            self.store.update_status(path, StatusOptions.UPLOADED, 'digest')
+
+        # Visible immediately, before they are written
+        self.assertTrue(self.store.was_successful(paths[0]))
+
+        self.store.flush()
+        statuses = FileStatus.get_directory(self.photos)
+        self.assertEqual(len(statuses), 25)
+        self.assertTrue(all(status == StatusOptions.UPLOADED for status in statuses.values()))
+
+    def test_steady_updates_are_written_within_flush_interval(self):
+        store = StatusStore(batch_size=500, flush_interval=0.3)
+        try:
+            # One update every 0.1s never lets the queue go quiet for flush_interval
+            for i in range(15):
+                store.update_status(self.photos / f'IMG_{i:04d}.jpg', StatusOptions.UPLOADED)
+                time.sleep(0.1)
+            written = len(FileStatus.get_directory(self.photos))
+        finally:
+            store.close()
+
+        self.assertGreaterEqual(written, 10)
+
+    def test_skipped_does_not_overwrite(self):
+        path = self.photos / 'IMG_0001.jpg'
+        self.store.update_status(path, StatusOptions.UPLOADED)
+        self.store.update_status(path, StatusOptions.SKIPPED)
+        self.store.flush()
+        self.store.update_status(path, StatusOptions.DUPLICATE)
+        self.store.close()
+
+        self.assertEqual(self.store.get_status(path), StatusOptions.UPLOADED)
+        self.assertEqual(FileStatus.get_directory(self.photos), {'IMG_0001.jpg': StatusOptions.UPLOADED})
+        self.assertEqual(FileStatus.count_records(), 1)
+
+    def test_directory_is_loaded_once(self):
+        FileStatus.update_status(self.photos / 'IMG_0001.jpg', StatusOptions.UPLOADED)
+        self.assertTrue(self.store.was_successful(self.photos / 'IMG_0001.jpg'))
+
+        # Written directly, after the directory was loaded, so it is not seen
+        FileStatus.update_status(self.photos / 'IMG_0002.jpg', StatusOptions.UPLOADED)
+        self.assertFalse(self.store.was_successful(self.photos / 'IMG_0002.jpg'))
+
+class TestMigration(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.db_path = self.test_dir / 'status.db'
+        self.original_sessionmaker = DbManager._sessionmaker
+
+    def tearDown(self):
+        DbManager._sessionmaker = self.original_sessionmaker
+        shutil.rmtree(self.test_dir)
+
+    def create_old_database(self):
+        # The schema before indexes were added, with the duplicates it allowed
+        with sqlite3.connect(self.db_path) as connection:
+            connection.executescript("""
+                CREATE TABLE upload_status (id INTEGER PRIMARY KEY, directory VARCHAR NOT NULL, filename VARCHAR NOT NULL,
+                    status VARCHAR(9) NOT NULL, file_hash VARCHAR, last_processed_time FLOAT NOT NULL, version INTEGER NOT NULL);
+                CREATE TABLE directory_status (id INTEGER PRIMARY KEY, directory VARCHAR NOT NULL, globs VARCHAR,
+                    file_count INTEGER NOT NULL, last_modified_time FLOAT NOT NULL, version INTEGER NOT NULL);
+                INSERT INTO upload_status VALUES (1, '/photos', 'a.jpg', 'ERROR', NULL, 1.0, 3);
+                INSERT INTO upload_status VALUES (2, '/photos', 'a.jpg', 'UPLOADED', NULL, 2.0, 3);
+                INSERT INTO upload_status VALUES (3, '/photos', 'b.jpg', 'UPLOADED', NULL, 2.0, 3);
+                INSERT INTO directory_status VALUES (1, '/photos', '*.jpg,*.arw', 2, 2.0, 3);
+                INSERT INTO directory_status VALUES (2, '/photos', '*.arw,*.jpg', 3, 3.0, 3);
+            """)
+
+    def test_migrates_in_place(self):
+        self.create_old_database()
+
+        engine = create_engine(f'sqlite:///{self.db_path}')
+        event.listen(engine, 'connect', DbManager.set_pragmas)
+        Base.metadata.create_all(engine)
+        DbManager.migrate(engine)
+        DbManager._sessionmaker = sessionmaker(bind=engine)
+
+        self.assertEqual(FileStatus.count_records(), 2)
+        self.assertEqual(FileStatus.get_status(Path('/photos/a.jpg')), StatusOptions.UPLOADED)
+
+        record = DirectoryStatus.get_directory_status(Path('/photos'), ['*.jpg', '*.arw'])
+        self.assertEqual((record.globs, record.file_count), ('*.arw,*.jpg', 3))
+        self.assertEqual(DirectoryStatus.count_records(), 1)
+
+        # Upserts now update the existing rows
+        self.assertEqual(DirectoryStatus.get_digests(Path('/photos'), '*.arw,*.jpg'), {'/photos': None})
+        DirectoryStatus.update(Path('/photos'), 4, 4.0, ['*.jpg', '*.arw', '*.jpg'], digest='abc')
+        self.assertEqual(DirectoryStatus.count_records(), 1)
+        self.assertTrue(DirectoryStatus.has_directory_changed(Path('/photos'), 4, 4.0, '*.arw,*.jpg'))
+        self.assertEqual(DirectoryStatus.get_digests(Path('/photos'), '*.arw,*.jpg'), {'/photos': 'abc'})
+
+        with sqlite3.connect(self.db_path) as connection:
+            self.assertEqual(connection.execute('PRAGMA user_version').fetchone()[0], SCHEMA_VERSION)
+            self.assertEqual(connection.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+            plan = connection.execute("EXPLAIN QUERY PLAN SELECT * FROM upload_status WHERE directory = '/photos' AND filename = 'a.jpg'").fetchall()
+            self.assertIn('ix_upload_status_directory_filename', str(plan))
+
+class TestDbManager(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.db_path = self.test_dir / 'status.db'
+        self.original_sessionmaker = DbManager._sessionmaker
+        self.original_db_path = DbManager._db_path
+
+    def tearDown(self):
+        DbManager._sessionmaker = self.original_sessionmaker
+        DbManager._db_path = self.original_db_path
+        shutil.rmtree(self.test_dir)
+
+    def test_opened_on_first_use(self):
+        DbManager.configure(self.db_path)
+        self.assertFalse(self.db_path.exists())
+
+        photo = self.test_dir / 'a.jpg'
+        FileStatus.update_status(photo, StatusOptions.UPLOADED)
+        self.assertTrue(self.db_path.exists())
+        self.assertEqual(FileStatus.get_status(photo), StatusOptions.UPLOADED)
+        self.assertEqual(DbManager.estimate_rows(FileStatus), 1)
+
+if __name__ == '__main__':
+    unittest.main()
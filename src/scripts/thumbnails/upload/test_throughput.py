@@ -0,0 +1,178 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    test_throughput.py                                                                                   *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from scripts.thumbnails.upload.fake_immich import FakeImmichServer
+from scripts.thumbnails.upload.progressive import ImmichProgressiveUploader
+from scripts.thumbnails.upload.status import Base, DbManager
+from scripts.thumbnails.upload.throughput import ThroughputTracker, format_snapshot
+import logging
+
+# Disable logging during tests to keep the output clean
+logging.disable(logging.CRITICAL)
+
+MB = 1024 * 1024
+
+class TestThroughputTracker(unittest.TestCase):
+    def setUp(self):
+        # A fake clock, which only moves when a test advances it
+        self.now = 0.0
+        self.tracker = ThroughputTracker(half_life=10, clock=lambda: self.now)
+
+    def send(self, seconds : int, bytes_per_second : int, endpoint : str = 'default') -> None:
+        """
+        Send bytes_per_second every second, for seconds.
+        """
+        for _ in range(seconds):
+            self.now += 1
+            self.tracker.record(bytes_per_second, endpoint)
+
+    def test_no_rate_before_sending(self):
+        self.assertEqual(self.tracker.rate(), 0)
+        self.assertEqual(self.tracker.eta(), 0)
+
+    def test_steady_rate(self):
+        self.tracker.queue(0)
+        self.send(60, MB)
+        self.assertAlmostEqual(self.tracker.rate() / MB, 1, delta=0.05)
+        self.assertEqual(self.tracker.total, 60 * MB)
+
+    def test_rate_is_not_diluted_by_a_slow_start(self):
+        # Nothing is sent while the first files are searched for and queued
+        self.tracker.queue(100 * MB)
+        self.now += 120
+        self.send(30, MB)
+        self.assertAlmostEqual(self.tracker.rate() / MB, 1, delta=0.1)
+
+    def test_rate_follows_a_change(self):
+        self.tracker.queue(0)
+        self.send(60, MB)
+        self.send(60, 4 * MB)
+        self.assertAlmostEqual(self.tracker.rate() / MB, 4, delta=0.1)
+
+    def test_rate_decays_while_stalled(self):
+        self.tracker.queue(0)
+        self.send(60, MB)
+        self.now += 10
+        self.assertAlmostEqual(self.tracker.rate() / MB, 0.5, delta=0.05)
+
+    def test_rate_per_endpoint(self):
+        self.tracker.queue(0)
+        for _ in range(60):
+            self.now += 1
+            self.tracker.record(MB, 'assets')
+            self.tracker.record(2 * MB, 'chunked')
+        rates = self.tracker.rates()
+        self.assertAlmostEqual(rates['assets'] / MB, 1, delta=0.05)
+        self.assertAlmostEqual(rates['chunked'] / MB, 2, delta=0.1)
+        self.assertAlmostEqual(self.tracker.rate() / MB, 3, delta=0.15)
+
+    def test_format_snapshot(self):
+        snapshot = {
+            'bytes_sent': 60 * MB,
+            'bytes_remaining': 0,
+            'bytes_per_second': 3 * MB,
+            'eta_seconds': 0.0,
+            'bytes_per_second.assets': MB,
+            'bytes_per_second.chunked': 2 * MB,
+        }
+        self.assertEqual(format_snapshot(snapshot), '60.0 MB sent, at 3.00 MB/s (assets 1.00 MB/s, chunked 2.00 MB/s)')
+        # Nothing sent yet
+        self.assertEqual(format_snapshot(ThroughputTracker().snapshot()), '0.0 MB sent, at 0.00 MB/s')
+
+    def test_eta(self):
+        self.tracker.queue(120 * MB)
+        self.send(60, MB)
+        self.tracker.dequeue(60 * MB)
+        self.assertEqual(self.tracker.remaining, 60 * MB)
+        self.assertAlmostEqual(self.tracker.eta(), 60, delta=3)
+
+        self.tracker.dequeue(60 * MB)
+        self.assertEqual(self.tracker.eta(), 0)
+
+    def test_eta_unknown_when_nothing_is_sent(self):
+        self.tracker.queue(MB)
+        self.now += 5
+        self.assertIsNone(self.tracker.eta())
+
+    def test_invalid_half_life(self):
+        with self.assertRaises(ValueError):
+            ThroughputTracker(half_life=0)
+
+class TestRemainingBytes(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.photos = self.test_dir / 'photos'
+        self.photos.mkdir()
+        for i in range(6):
+            (self.photos / f'IMG_{i:04d}.jpg').write_bytes(os.urandom(1000))
+
+        # Use a temporary database, instead of the real one
+        self.original_sessionmaker = DbManager._sessionmaker
+        engine = create_engine(f'sqlite:///{self.test_dir / "status.db"}')
+        Base.metadata.create_all(engine)
+        DbManager._sessionmaker = sessionmaker(bind=engine)
+
+        self.server = FakeImmichServer()
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+        DbManager._sessionmaker = self.original_sessionmaker
+        shutil.rmtree(self.test_dir)
+
+    def test_found_files_are_queued_before_upload(self):
+        uploader = ImmichProgressiveUploader(
+            url=self.server.url,
+            api_key=self.server.api_key,
+            directory=self.photos,
+            backend='http',
+            max_threads=1,
+        )
+        remaining = []
+        upload_file = ImmichProgressiveUploader.upload_file_threadsafe
+        def record_remaining(self, *args, **kwargs):
+            remaining.append(self.throughput.remaining)
+            return upload_file(self, *args, **kwargs)
+
+        try:
+            with patch.object(ImmichProgressiveUploader, 'upload_file_threadsafe', autospec=True, side_effect=record_remaining):
+                uploader.upload()
+        finally:
+            uploader.status_store.close()
+            uploader.client.close()
+
+        # Every file in the directory counts from the start, not only the uploads in flight
+        self.assertEqual(remaining[0], 6000)
+        self.assertEqual(uploader.throughput.remaining, 0)
+
+if __name__ == '__main__':
+    unittest.main()
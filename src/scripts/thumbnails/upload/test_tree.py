@@ -0,0 +1,120 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    test_tree.py                                                                                         *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+from scripts.thumbnails.upload import tree
+import logging
+
+# Disable logging during tests to keep the output clean
+logging.disable(logging.CRITICAL)
+
+class TestTreeWalk(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.create_file('2023/2023-01-01/a.jpg')
+        self.create_file('2023/2023-01-02/b.jpg')
+        self.create_file('2024/2024-05-05/c.jpg')
+        self.create_file('2024/2024-05-06/d.jpg')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def create_file(self, name : str, content : bytes = b'photo') -> Path:
+        path = self.test_dir / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        return path
+
+    def digests(self, **kwargs) -> dict[str, str | None]:
+        return {listing.key: listing.digest for listing in tree.walk(self.test_dir, **kwargs)}
+
+    def key(self, name : str = '') -> str:
+        return str((self.test_dir / name).absolute()) if name else str(self.test_dir.absolute())
+
+    def test_digest_is_stable(self):
+        first = self.digests()
+        second = self.digests()
+        self.assertEqual(first, second)
+        self.assertEqual(len(first), 7)
+
+    def test_new_file_changes_its_directory_only(self):
+        before = self.digests()
+        self.create_file('2024/2024-05-05/e.jpg')
+        after = self.digests()
+
+        changed = {directory for directory in after if after[directory] != before[directory]}
+        self.assertEqual(changed, {self.key('2024/2024-05-05')})
+
+    def test_rewritten_file_changes_its_directory(self):
+        before = self.digests()
+        path = self.create_file('2023/2023-01-01/a.jpg', b'edited photo')
+        after = self.digests()
+        self.assertNotEqual(after[self.key('2023/2023-01-01')], before[self.key('2023/2023-01-01')])
+
+        # The same size, but a different modification time
+        self.create_file('2023/2023-01-01/a.jpg', b'EDITED PHOTO')
+        os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 1_000_000_000))
+        self.assertNotEqual(self.digests()[self.key('2023/2023-01-01')], after[self.key('2023/2023-01-01')])
+
+    def test_directories_are_statted_once(self):
+        real_stat = os.stat
+        with patch.object(tree.os, 'stat', side_effect=real_stat) as stat:
+            digests = self.digests()
+        # One stat per directory, for its own modification time. Files are stat'd through their DirEntry.
+        self.assertEqual(stat.call_count, len(digests))
+
+    def test_walk_is_lazy(self):
+        with patch.object(tree, 'list_directory', side_effect=tree.list_directory) as list_directory:
+            walk = tree.walk(self.test_dir)
+            self.assertEqual(next(walk).path, self.test_dir.absolute())
+            self.assertEqual(list_directory.call_count, 1)
+            self.assertEqual([listing.key for listing in walk], [
+                self.key('2023'), self.key('2023/2023-01-01'), self.key('2023/2023-01-02'),
+                self.key('2024'), self.key('2024/2024-05-05'), self.key('2024/2024-05-06'),
+            ])
+
+    def test_ignored_directories(self):
+        self.create_file('.thumbnails/x.jpg')
+        ignore = lambda path: path.name.startswith('.')
+        listing = tree.list_directory(self.test_dir, should_ignore_directory=ignore)
+
+        self.assertEqual([path.name for path in listing.subdirs], ['2023', '2024'])
+        self.assertNotIn('d\0.thumbnails', listing.entries)
+        self.assertNotIn(self.key('.thumbnails'), self.digests(should_ignore_directory=ignore))
+
+    def test_not_recursive(self):
+        self.assertEqual(list(self.digests(recursive=False)), [self.key()])
+
+    def test_unreadable_directory_has_no_digest(self):
+        listing = tree.list_directory(self.test_dir / 'missing')
+        self.assertIsNone(listing.digest)
+        self.assertEqual(listing.subdirs, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,203 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+    Measure upload throughput over a rolling window, and estimate how long the queued uploads will take.
+
+    Only bytes which were actually sent are counted: duplicates which Immich already had, and failed attempts, add
+    nothing. Each byte counts towards the rate with a weight that halves every half_life seconds, so the rate follows
+    the link as it speeds up or slows down, and falls towards zero while nothing is being sent.
+
+    Bytes are counted per endpoint (e.g. whole assets, chunks of large files, or the immich CLI), so a slow chunked
+    upload of a video doesn't hide the rate of everything else.
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    throughput.py                                                                                        *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+from __future__ import annotations
+import logging
+import math
+import threading
+import time
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# Bytes sent this many seconds ago count half as much towards the rate as bytes sent now
+DEFAULT_HALF_LIFE = 10.0
+
+# The rate is not reported until bytes have been sent for at least this long, to avoid wild first estimates
+MIN_ELAPSED_SECONDS = 1.0
+
+MB = 1024 * 1024
+
+def format_snapshot(snapshot : dict[str, float | int | None]) -> str:
+    """
+    Describe a ThroughputTracker.snapshot() in one line, e.g. "12.0 MB sent, at 1.50 MB/s (assets 1.00 MB/s, ...)".
+    """
+    endpoints = [
+        f"{key.removeprefix('bytes_per_second.')} {(rate or 0) / MB:.2f} MB/s"
+        for key, rate in snapshot.items()
+        if key.startswith('bytes_per_second.')
+    ]
+    description = f"{(snapshot['bytes_sent'] or 0) / MB:.1f} MB sent, at {(snapshot['bytes_per_second'] or 0) / MB:.2f} MB/s"
+    return f"{description} ({', '.join(endpoints)})" if endpoints else description
+
+class ThroughputTracker:
+    """
+    An exponentially weighted rate of bytes sent, per endpoint, and the bytes still queued to send.
+
+    record() is called as bytes are sent, queue() when a file is queued for upload, and dequeue() when it finishes.
+    All methods are safe to call from upload workers.
+
+    Args:
+        half_life: The number of seconds after which bytes sent count half as much towards the rate.
+        clock: The source of the time, in seconds. Defaults to time.monotonic.
+    """
+    def __init__(self, half_life : float = DEFAULT_HALF_LIFE, *, clock : Callable[[], float] | None = None):
+        if half_life <= 0:
+            raise ValueError(f"Invalid half life: {half_life}")
+
+        self.half_life = half_life
+        self.clock = clock or time.monotonic
+        self._decay = math.log(2) / half_life
+        self._lock = threading.Lock()
+        # The weighted sum of bytes sent to each endpoint, and when it was last decayed
+        self._weighted : dict[str, tuple[float, float]] = {}
+        self._totals : dict[str, int] = {}
+        self._start : float | None = None
+        self._remaining = 0
+
+    @property
+    def total(self) -> int:
+        """
+        The number of bytes sent so far, to every endpoint.
+        """
+        with self._lock:
+            return sum(self._totals.values())
+
+    @property
+    def remaining(self) -> int:
+        """
+        The number of bytes queued, and not yet finished.
+        """
+        with self._lock:
+            return self._remaining
+
+    @property
+    def endpoints(self) -> list[str]:
+        with self._lock:
+            return list(self._totals)
+
+    def _now(self) -> float:
+        now = self.clock()
+        if self._start is None:
+            self._start = now
+        return now
+
+    def record(self, bytes_sent : int, endpoint : str = 'default') -> None:
+        """
+        Record bytes which were sent.
+
+        Args:
+            bytes_sent: The number of bytes sent.
+            endpoint: Where they were sent.
+        """
+        if bytes_sent <= 0:
+            return
+
+        with self._lock:
+            now = self._now()
+            weighted, updated = self._weighted.get(endpoint, (0.0, now))
+            weighted = weighted * math.exp(-self._decay * (now - updated)) + bytes_sent * self._decay
+            self._weighted[endpoint] = (weighted, now)
+            self._totals[endpoint] = self._totals.get(endpoint, 0) + bytes_sent
+
+    def rate(self, endpoint : str | None = None) -> float:
+        """
+        The rate bytes are being sent, in bytes per second.
+
+        Args:
+            endpoint: The endpoint to get the rate of. If None, the combined rate of every endpoint.
+        """
+        with self._lock:
+            if self._start is None:
+                return 0.0
+            now = self.clock()
+            elapsed = now - self._start
+            if elapsed < MIN_ELAPSED_SECONDS:
+                return 0.0
+
+            endpoints = [endpoint] if endpoint is not None else list(self._weighted)
+            weighted = 0.0
+            for name in endpoints:
+                if name in self._weighted:
+                    value, updated = self._weighted[name]
+                    weighted += value * math.exp(-self._decay * (now - updated))
+
+            # Before a few half lives have passed, the weights of every byte sent don't yet add up to one second
+            return weighted / (1 - math.exp(-self._decay * elapsed))
+
+    def rates(self) -> dict[str, float]:
+        """
+        The rate of each endpoint, in bytes per second.
+        """
+        return {endpoint: self.rate(endpoint) for endpoint in self.endpoints}
+
+    def queue(self, size : int) -> None:
+        """
+        Add a file of size bytes to the bytes which remain to be sent.
+        """
+        with self._lock:
+            self._now()
+            self._remaining += size
+
+    def dequeue(self, size : int) -> None:
+        """
+        Remove a finished file of size bytes from the bytes which remain to be sent, whether or not it was sent.
+        """
+        with self._lock:
+            self._remaining = max(0, self._remaining - size)
+
+    def eta(self) -> float | None:
+        """
+        Estimate the number of seconds until every queued byte is sent, at the current rate.
+
+        Returns:
+            float: The number of seconds, or None if nothing is being sent.
+        """
+        remaining = self.remaining
+        if not remaining:
+            return 0.0
+        rate = self.rate()
+        if not rate:
+            return None
+        return remaining / rate
+
+    def snapshot(self) -> dict[str, float | int | None]:
+        """
+        The current measurements, for reports and metrics.
+        """
+        return {
+            'bytes_sent': self.total,
+            'bytes_remaining': self.remaining,
+            'bytes_per_second': self.rate(),
+            'eta_seconds': self.eta(),
+            **{f'bytes_per_second.{endpoint}': rate for endpoint, rate in self.rates().items()},
+        }
@@ -0,0 +1,131 @@
+"""*********************************************************************************************************************
+*                                                                                                                      *
+*                                                                                                                      *
+    Walk a directory tree lazily, and summarize each directory well enough to tell that it hasn't changed since it was
+    uploaded, without querying the status of each file.
+
+    Each directory is listed with a single scandir, as the walk reaches it, so uploads start while the rest of the tree
+    is still being searched. Its digest covers the directory's own modification time, the names of its subdirectories,
+    and the name, size and modification time of each of its files. Those come from the DirEntry, which has them without
+    another system call on Windows, and with one lstat per file elsewhere. Adding, removing, renaming or rewriting a file
+    changes the digest, so a directory whose digest matches the one stored when it was last uploaded is passed over
+    without querying the statuses of its files. Its subdirectories have digests of their own, and are checked in turn.
+
+    Example:
+        >>> for listing in walk(Path('/mnt/i/Phone')):
+        ...     print(listing.path, listing.digest)
+        /mnt/i/Phone 3f786850e387550fdab836ed7e6dc881de23001b
+*                                                                                                                      *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    METADATA:                                                                                                         *
+*                                                                                                                      *
+*        File:    tree.py                                                                                              *
+*        Project: imageinn                                                                                             *
+*        Version: 0.1.0                                                                                                *
+*        Created: 2026-10-18                                                                                           *
+*        Author:  Jess Mann                                                                                            *
+*        Email:   jess.a.mann@gmail.com                                                                                *
+*        Copyright (c) 2026 Jess Mann                                                                                  *
+*                                                                                                                      *
+* -------------------------------------------------------------------------------------------------------------------- *
+*                                                                                                                      *
+*    LAST MODIFIED:                                                                                                    *
+*                                                                                                                      *
+*        2026-10-18     By Jess Mann                                                                                   *
+*                                                                                                                      *
+*********************************************************************************************************************"""
+from __future__ import annotations
+import hashlib
+import logging
+import os
+from pathlib import Path
+from typing import Callable, Iterator
+
+logger = logging.getLogger(__name__)
+
+class DirectoryListing:
+    """
+    One directory, as listed by a single scandir.
+
+    Directories are identified by their absolute path, as a string, as they are stored in DirectoryStatus.
+    A digest of None means the directory could not be read, so it must not be treated as unchanged.
+    """
+    def __init__(self, path : Path, entries : list[str] | None, subdirs : list[Path]):
+        self.path = path
+        # Sorted lines for each subdirectory and file, or None if the directory could not be listed
+        self.entries = entries
+        self.subdirs = subdirs
+        self._digest : str | None = None
+
+    @property
+    def key(self) -> str:
+        return str(self.path)
+
+    @property
+    def digest(self) -> str | None:
+        """
+        The digest of the directory's modification time and entries. Stats the directory (not its files) the first time.
+        """
+        if self._digest is None and self.entries is not None:
+            try:
+                mtime_ns = os.stat(self.path).st_mtime_ns
+            except OSError as e:
+                logger.warning("Unable to stat %s: %s", self.path, e)
+                return None
+            lines = [str(mtime_ns), *self.entries]
+            self._digest = hashlib.sha1('\n'.join(lines).encode('utf-8', 'surrogateescape')).hexdigest()
+        return self._digest
+
+def list_directory(directory : Path, *, should_ignore_directory : Callable[[Path], bool] | None = None) -> DirectoryListing:
+    """
+    List one directory with a single scandir. Subdirectories are not stat'd, and files only through their DirEntry.
+
+    Args:
+        directory: The directory to list.
+        should_ignore_directory: Called with each subdirectory. Ignored subdirectories are not walked, and do not
+            contribute to the digest.
+    """
+    directory = Path(directory).absolute()
+    entries : list[str] = []
+    subdirs : list[Path] = []
+    try:
+        with os.scandir(directory) as iterator:
+            for entry in iterator:
+                # The type comes from the listing itself on most filesystems, so this doesn't stat the entry
+                if entry.is_dir(follow_symlinks=False):
+                    path = Path(entry.path)
+                    if should_ignore_directory and should_ignore_directory(path):
+                        continue
+                    subdirs.append(path)
+                    entries.append(f'd\0{entry.name}')
+                else:
+                    try:
+                        stat = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        # Removed since it was listed, which changes the directory's modification time anyway
+                        continue
+                    # So a file rewritten in place, under the same name, is noticed
+                    entries.append(f'f\0{entry.name}\0{stat.st_size}\0{stat.st_mtime_ns}')
+    except OSError as e:
+        logger.warning("Unable to list %s: %s", directory, e)
+        return DirectoryListing(directory, None, subdirs)
+
+    entries.sort()
+    subdirs.sort()
+    return DirectoryListing(directory, entries, subdirs)
+
+def walk(root : Path, *, recursive : bool = True, should_ignore_directory : Callable[[Path], bool] | None = None) -> Iterator[DirectoryListing]:
+    """
+    List root, and every directory below it if recursive, as the walk reaches them.
+
+    Directories are yielded parents first, each subtree in name order. A directory is only listed when the caller asks
+    for the next one, so a caller can start working on the first directories before the rest of the tree is listed.
+    """
+    stack = [Path(root).absolute()]
+    while stack:
+        listing = list_directory(stack.pop(), should_ignore_directory=should_ignore_directory)
+        yield listing
+        if recursive:
+            stack.extend(reversed(listing.subdirs))